@@ -1,20 +1,338 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, has_request_context, send_from_directory, send_file, abort, Response, g
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from markupsafe import Markup
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.http import parse_accept_header
+from logging.handlers import RotatingFileHandler
+from collections import Counter, deque, OrderedDict
+from functools import wraps
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from poster_pipeline import POSTER_DIR, POSTER_VARIANTS_SCHEMA, build_poster_variants, save_poster_variants
+import poster_pipeline
+from ticket_pdf import render_tickets_pdf, ticket_state_key
+from archive import ARCHIVE_SCHEMA, archive_finished_shows
+from pricing import SEAT_CLASS_PRICES, build_price_table, promo_discount, seat_row
+from recommendations import RECOMMENDATIONS_SCHEMA, RebuildBusy, rebuild_recommendations
+from backup import LockBusy, ShipperBusy, WalShipper, list_bases, lock_exclusive
+import threading
+import hashlib
+import base64
+import secrets
+import io
+import gzip
+import zlib
+import mimetypes
+import zipfile
+import glob
+import csv
+import atexit
+import bisect
 import sqlite3
-import random
 import string
+import logging
+import json
+import time
+import re
+import datetime
 
 import os
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_2025_movie_booking'
 
+DATABASE = 'database.db'
+
+app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+app.config['SLOW_QUERY_BUFFER_SIZE'] = int(os.environ.get('SLOW_QUERY_BUFFER_SIZE', 200))
+app.config['SLOW_QUERY_LOG_FILE'] = os.environ.get('SLOW_QUERY_LOG_FILE', os.path.join('logs', 'slow_queries.log'))
+
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+app.config['HASH_POOL_WORKERS'] = int(os.environ.get('HASH_POOL_WORKERS', 2))
+app.config['HASH_POOL_MAX_PENDING'] = int(os.environ.get('HASH_POOL_MAX_PENDING', 16))
+app.config['HASH_TIMEOUT_SECONDS'] = float(os.environ.get('HASH_TIMEOUT_SECONDS', 10))
+
+app.config['AVAILABILITY_CHECK_LIMIT'] = int(os.environ.get('AVAILABILITY_CHECK_LIMIT', 30))
+app.config['AVAILABILITY_CHECK_WINDOW_SECONDS'] = float(os.environ.get('AVAILABILITY_CHECK_WINDOW_SECONDS', 10))
+
+app.config['SESSION_CACHE_SIZE'] = int(os.environ.get('SESSION_CACHE_SIZE', 10000))
+app.config['SESSION_CACHE_SECONDS'] = float(os.environ.get('SESSION_CACHE_SECONDS', 60))
+app.config['SESSION_EXPIRY_INTERVAL_SECONDS'] = float(os.environ.get('SESSION_EXPIRY_INTERVAL_SECONDS', 300))
+
+app.config['FRAGMENT_CACHE_MAX_BYTES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 2 * 1024 * 1024))
+
+app.config['POSTER_WORKERS'] = int(os.environ.get('POSTER_WORKERS', 2))
+
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+app.config['COMPRESSION_GZIP_LEVEL'] = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+app.config['COMPRESSION_BROTLI_QUALITY'] = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+app.config['COMPRESSION_CACHE_SIZE'] = int(os.environ.get('COMPRESSION_CACHE_SIZE', 256))
+
+app.config['TICKET_WORKERS'] = int(os.environ.get('TICKET_WORKERS', 2))
+app.config['TICKET_MAX_PENDING'] = int(os.environ.get('TICKET_MAX_PENDING', 200))
+# Renders one job keeps in flight; the rest of a bulk job waits its turn
+app.config['TICKET_JOB_CHUNK'] = int(os.environ.get('TICKET_JOB_CHUNK', 20))
+app.config['TICKET_CACHE_DIR'] = os.environ.get('TICKET_CACHE_DIR', 'ticket_cache')
+
+# Every process needs its own node id (0-31). Unset, each process claims the
+# first free one through a lock file in BOOKING_REF_STATE_DIR; set it
+# explicitly (and distinctly) when several hosts share one database.
+app.config['BOOKING_REF_NODE'] = int(os.environ['BOOKING_REF_NODE']) if os.environ.get('BOOKING_REF_NODE') else None
+app.config['BOOKING_REF_STATE_DIR'] = os.environ.get('BOOKING_REF_STATE_DIR', 'booking_refs')
+app.config['BOOKING_REF_KEY'] = os.environ.get('BOOKING_REF_KEY', app.secret_key)
+
+app.config['SCHEDULE_IMPORT_MAX_ROWS'] = int(os.environ.get('SCHEDULE_IMPORT_MAX_ROWS', 5000))
+# Cleaning/changeover time required between two shows in the same hall
+app.config['SCHEDULE_TURNAROUND_MINUTES'] = int(os.environ.get('SCHEDULE_TURNAROUND_MINUTES', 20))
+# Assumed length of movies whose duration text cannot be parsed
+app.config['SCHEDULE_DEFAULT_DURATION_MINUTES'] = int(os.environ.get('SCHEDULE_DEFAULT_DURATION_MINUTES', 180))
+
+# Finished shows are moved to the archive_* tables every ARCHIVE_INTERVAL_HOURS (0 disables)
+app.config['ARCHIVE_INTERVAL_HOURS'] = float(os.environ.get('ARCHIVE_INTERVAL_HOURS', 24))
+app.config['ARCHIVE_KEEP_DAYS'] = int(os.environ.get('ARCHIVE_KEEP_DAYS', 1))
+app.config['ARCHIVE_BATCH_SIZE'] = int(os.environ.get('ARCHIVE_BATCH_SIZE', 50))
+
+app.config['PRICE_CACHE_SIZE'] = int(os.environ.get('PRICE_CACHE_SIZE', 512))
+# Per-user ticket wallets kept in memory; entries also expire when a show ends
+app.config['WALLET_CACHE_SIZE'] = int(os.environ.get('WALLET_CACHE_SIZE', 1024))
+app.config['WALLET_CACHE_SECONDS'] = int(os.environ.get('WALLET_CACHE_SECONDS', 300))
+# Seat layouts kept in memory for /seat_map bitmaps
+app.config['SEAT_LAYOUT_CACHE_SIZE'] = int(os.environ.get('SEAT_LAYOUT_CACHE_SIZE', 512))
+
+# Waiting room in front of the purchase flow. These seed the shared waiting_room row when
+# the database is first set up; after that admins change them live through /admission_control
+app.config['WAITING_ROOM_ENABLED'] = os.environ.get('WAITING_ROOM_ENABLED', '1') == '1'
+app.config['ADMISSION_RATE_PER_SECOND'] = float(os.environ.get('ADMISSION_RATE_PER_SECOND', 10))
+app.config['ADMISSION_BURST'] = int(os.environ.get('ADMISSION_BURST', 50))
+app.config['ADMISSION_PASS_SECONDS'] = int(os.environ.get('ADMISSION_PASS_SECONDS', 600))
+app.config['QUEUE_TICKET_SECONDS'] = int(os.environ.get('QUEUE_TICKET_SECONDS', 3600))
+
+# Replays of booking/cancel POSTs that carry the same Idempotency-Key
+app.config['IDEMPOTENCY_TTL_SECONDS'] = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+app.config['IDEMPOTENCY_CACHE_SIZE'] = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', 2048))
+app.config['IDEMPOTENCY_WAIT_SECONDS'] = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', 15))
+
+# Online base backups every BACKUP_INTERVAL_HOURS, plus committed WAL frames shipped
+# every WAL_SHIP_SECONDS for point-in-time restore (0 disables either)
+app.config['BACKUP_DIR'] = os.environ.get('BACKUP_DIR', 'backups')
+app.config['BACKUP_INTERVAL_HOURS'] = float(os.environ.get('BACKUP_INTERVAL_HOURS', 24))
+app.config['BACKUP_KEEP'] = int(os.environ.get('BACKUP_KEEP', 3))
+app.config['BACKUP_PAGES_PER_STEP'] = int(os.environ.get('BACKUP_PAGES_PER_STEP', 256))
+app.config['BACKUP_STEP_PAUSE'] = float(os.environ.get('BACKUP_STEP_PAUSE', 0.005))
+app.config['WAL_SHIP_SECONDS'] = float(os.environ.get('WAL_SHIP_SECONDS', 10))
+app.config['WAL_CHECKPOINT_BYTES'] = int(os.environ.get('WAL_CHECKPOINT_BYTES', 16 * 1024 * 1024))
+
+# Co-booking recommendations are rebuilt every RECOMMENDATION_INTERVAL_HOURS (0 disables)
+app.config['RECOMMENDATION_INTERVAL_HOURS'] = float(os.environ.get('RECOMMENDATION_INTERVAL_HOURS', 6))
+
+app.config['CHECKIN_ROLES'] = ('Admin', 'Usher')
+
+# movie_schedules.available_seats is recomputed from seat_availability for schedules that
+# triggers mark dirty, every SEAT_RECONCILE_SECONDS; a full audit runs every SEAT_AUDIT_INTERVAL_HOURS
+app.config['SEAT_RECONCILE_SECONDS'] = float(os.environ.get('SEAT_RECONCILE_SECONDS', 15))
+app.config['SEAT_RECONCILE_BATCH_SIZE'] = int(os.environ.get('SEAT_RECONCILE_BATCH_SIZE', 200))
+app.config['SEAT_AUDIT_INTERVAL_HOURS'] = float(os.environ.get('SEAT_AUDIT_INTERVAL_HOURS', 24))
+app.config['SEAT_DRIFT_BUFFER_SIZE'] = int(os.environ.get('SEAT_DRIFT_BUFFER_SIZE', 200))
+
+# A schedule's journaled seat changes are folded into a new snapshot once it has this many
+app.config['JOURNAL_SNAPSHOT_EVERY'] = int(os.environ.get('JOURNAL_SNAPSHOT_EVERY', 100))
+app.config['JOURNAL_SNAPSHOT_SECONDS'] = float(os.environ.get('JOURNAL_SNAPSHOT_SECONDS', 30))
+
+# ---------------- SLOW QUERY LOG ----------------
+# Every statement issued through get_db_connection() is timed. Anything over
+# SLOW_QUERY_THRESHOLD_MS is written to a rotating log file and kept in an
+# in-memory ring buffer that the admin dashboard displays.
+REDACTED_COLUMNS = ('u_pass',)
+
+slow_query_buffer = deque(maxlen=app.config['SLOW_QUERY_BUFFER_SIZE'])
+
+os.makedirs(os.path.dirname(app.config['SLOW_QUERY_LOG_FILE']) or '.', exist_ok=True)
+slow_query_logger = logging.getLogger('slow_queries')
+slow_query_logger.setLevel(logging.INFO)
+slow_query_logger.propagate = False
+if not slow_query_logger.handlers:
+    slow_query_handler = RotatingFileHandler(app.config['SLOW_QUERY_LOG_FILE'],
+                                             maxBytes=5 * 1024 * 1024, backupCount=5)
+    slow_query_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_query_logger.addHandler(slow_query_handler)
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace literals so similar queries group together"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    return ' '.join(sql.split())
+
+
+def redact_query_params(sql, params):
+    """Mask bound parameters that are written to sensitive columns"""
+    if not params:
+        return params
+    if isinstance(params, dict):
+        return {key: '***' if key in REDACTED_COLUMNS else value for key, value in params.items()}
+
+    params = list(params)
+    for column in REDACTED_COLUMNS:
+        if column not in sql:
+            continue
+
+        # INSERT INTO user_table (u_name, u_email, u_pass, ...) VALUES (?, ?, ?, ...)
+        insert_match = re.search(r'INSERT\s+(?:OR\s+\w+\s+)?INTO\s+\w+\s*\(([^)]*)\)', sql, re.IGNORECASE)
+        if insert_match:
+            columns = [col.strip() for col in insert_match.group(1).split(',')]
+            for index, name in enumerate(columns):
+                if name == column and index < len(params):
+                    params[index] = '***'
+
+        # UPDATE user_table SET u_pass = ? / WHERE u_pass = ?
+        for match in re.finditer(r'\b' + column + r'\s*=\s*\?', sql):
+            index = sql.count('?', 0, match.end()) - 1
+            if index < len(params):
+                params[index] = '***'
+    return params
+
+
+def explain_query_plan(conn, sql, params):
+    """Return the EXPLAIN QUERY PLAN details for a statement, or [] if it has none"""
+    if not sql.lstrip().upper().startswith(('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')):
+        return []
+    try:
+        # A plain cursor so the EXPLAIN itself is not timed and logged again
+        rows = sqlite3.Cursor(conn).execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+        return [row[3] for row in rows]
+    except sqlite3.Error:
+        return []
+
+
+def record_query_time(conn, sql, params, started):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms < app.config['SLOW_QUERY_THRESHOLD_MS']:
+        return
+
+    entry = {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'duration_ms': round(elapsed_ms, 2),
+        'query': normalize_sql(sql),
+        'params': redact_query_params(sql, params),
+        'route': request.endpoint if has_request_context() else 'startup',
+        'plan': explain_query_plan(conn, sql, params),
+    }
+    slow_query_buffer.append(entry)
+    slow_query_logger.warning(json.dumps(entry, default=str))
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_query_time(self.connection, sql, parameters, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            # Plan and redaction use the first row; the batch size is in the query text
+            first_row = seq_of_parameters[0] if seq_of_parameters else ()
+            record_query_time(self.connection, f"{sql} /* x{len(seq_of_parameters)} */", first_row, started)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def get_db_connection():
+    return sqlite3.connect(DATABASE, factory=TimedConnection)
+
+# ---------------- PASSWORD HASHING POOL ----------------
+# Password hashing is deliberately CPU-heavy, so it runs in a small process
+# pool instead of on the request thread. At most HASH_POOL_MAX_PENDING jobs
+# may be queued or running; beyond that requests are shed with a 503.
+class HashPoolBusy(Exception):
+    pass
+
+
+hash_pool = None
+hash_pool_lock = threading.Lock()
+hash_pool_slots = threading.BoundedSemaphore(app.config['HASH_POOL_MAX_PENDING'])
+
+
+def get_hash_pool():
+    global hash_pool
+    with hash_pool_lock:
+        if hash_pool is None:
+            hash_pool = ProcessPoolExecutor(max_workers=app.config['HASH_POOL_WORKERS'])
+        return hash_pool
+
+
+def run_in_hash_pool(func, *args):
+    if not hash_pool_slots.acquire(blocking=False):
+        raise HashPoolBusy()
+    try:
+        future = get_hash_pool().submit(func, *args)
+    except Exception:
+        hash_pool_slots.release()
+        raise
+    future.add_done_callback(lambda _: hash_pool_slots.release())
+
+    try:
+        return future.result(timeout=app.config['HASH_TIMEOUT_SECONDS'])
+    except FutureTimeoutError:
+        raise HashPoolBusy()
+
+
+def hash_password(password):
+    return run_in_hash_pool(generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(pwhash, password):
+    return run_in_hash_pool(check_password_hash, pwhash, password)
+
+
+password_hash_prefixes = {}  # PASSWORD_HASH_METHOD -> prefix werkzeug writes for it
+
+
+def password_needs_rehash(pwhash):
+    """True when a stored hash was made with different parameters than PASSWORD_HASH_METHOD"""
+    # Compare against a real hash's prefix: werkzeug fills in defaults, so
+    # 'pbkdf2:sha256' is written as 'pbkdf2:sha256:<iterations>'
+    method = app.config['PASSWORD_HASH_METHOD']
+    if method not in password_hash_prefixes:
+        password_hash_prefixes[method] = hash_password('').split('$', 1)[0]
+    return pwhash.split('$', 1)[0] != password_hash_prefixes[method]
+
+
 # ---------------- DATABASE SETUP ----------------
+def add_column_if_missing(c, table, column, definition):
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in c.fetchall()]:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
 def init_db():
     # Don't delete existing database to preserve data
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
 
+    # Readers never block writers (or online backups), and committed frames can be shipped
+    c.execute("PRAGMA journal_mode = WAL")
+
     # Users table
     c.execute('''CREATE TABLE IF NOT EXISTS user_table (
                     u_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -84,20 +402,190 @@ def init_db():
             UNIQUE(schedule_id, seat_number)
         )''')
 
+    # Server-side sessions (the cookie only carries session_id)
+    c.execute('''CREATE TABLE IF NOT EXISTS user_sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            role TEXT,
+            status TEXT,
+            data TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_user_sessions_user ON user_sessions (user_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_user_sessions_expires ON user_sessions (expires_at)")
+
+    # Resized poster variants produced by poster_pipeline.py
+    c.execute(POSTER_VARIANTS_SCHEMA)
+
+    # Per-user booking lookups (ticket counts, ticket history)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_booking_user ON tbl_booking (u_id)")
+
+    # Door check-ins look bookings up by reference
+    try:
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_booking_reference ON tbl_booking (booking_reference)")
+    except sqlite3.IntegrityError:
+        print("⚠️ Duplicate booking references found - using a non-unique index until they are fixed")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_booking_reference_dup ON tbl_booking (booking_reference)")
+
+    # Schedule lookups by (movie_title, show_date, showtime) from bookings
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_schedule_title_date_time
+                 ON movie_schedules (movie_title, show_date, showtime)''')
+
+    # Door check-ins, one row per admitted booking reference
+    c.execute('''CREATE TABLE IF NOT EXISTS checkins (
+            booking_reference TEXT PRIMARY KEY,
+            booking_id INTEGER NOT NULL,
+            schedule_id INTEGER,
+            checked_in_at TEXT NOT NULL,
+            device TEXT
+        )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_checkins_schedule ON checkins (schedule_id)")
+
+    # Append-only journal of seat changes, and per-schedule seat map snapshots
+    c.execute('''CREATE TABLE IF NOT EXISTS booking_events (
+            seq INTEGER PRIMARY KEY,
+            schedule_id INTEGER,
+            booking_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            seats TEXT NOT NULL,
+            detail TEXT,
+            created_at TEXT NOT NULL
+        )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_booking_events_schedule ON booking_events (schedule_id, seq)")
+    c.execute('''CREATE TABLE IF NOT EXISTS schedule_snapshots (
+            schedule_id INTEGER PRIMARY KEY,
+            last_seq INTEGER NOT NULL,
+            booked_seats TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )''')
+    # Schedules booked before the journal existed start from their current seat map
+    c.execute('''INSERT OR IGNORE INTO schedule_snapshots (schedule_id, last_seq, booked_seats, created_at)
+                 SELECT sa.schedule_id, 0, json_group_object(sa.seat_number, sa.booking_id), datetime('now')
+                 FROM seat_availability sa
+                 WHERE sa.is_available = 0
+                   AND NOT EXISTS (SELECT 1 FROM booking_events e WHERE e.schedule_id = sa.schedule_id)
+                 GROUP BY sa.schedule_id''')
+
+    # Case-insensitive lookups used by register / check_username / check_email
+    c.execute("CREATE INDEX IF NOT EXISTS idx_user_name_lower ON user_table (LOWER(u_name))")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_user_email_lower ON user_table (LOWER(u_email))")
+
+    # Pricing: seat classes per hall row, and promo codes
+    c.execute('''CREATE TABLE IF NOT EXISTS hall_seat_classes (
+            hall INTEGER NOT NULL,
+            row_label TEXT NOT NULL,
+            seat_class TEXT NOT NULL,
+            PRIMARY KEY (hall, row_label)
+        )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS promo_codes (
+            code TEXT PRIMARY KEY,
+            percent_off REAL DEFAULT 0,
+            amount_off REAL DEFAULT 0,
+            valid_from TEXT,
+            valid_until TEXT,
+            max_uses INTEGER,
+            uses INTEGER DEFAULT 0,
+            is_active BOOLEAN DEFAULT 1
+        )''')
+
+    # Precomputed co-booking neighbours per movie and recommendations per user
+    for statement in RECOMMENDATIONS_SCHEMA:
+        c.execute(statement)
+
+    # Stored results of idempotent POSTs (status_code is NULL while the first attempt runs)
+    c.execute('''CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idempotency_key TEXT PRIMARY KEY,
+            status_code INTEGER,
+            location TEXT,
+            content_type TEXT,
+            body BLOB,
+            created_at REAL NOT NULL
+        )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_created ON idempotency_keys (created_at)")
+
+    # PDF ticket jobs, so any worker can report on and serve a job another one accepted
+    c.execute('''CREATE TABLE IF NOT EXISTS ticket_jobs (
+            job_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            schedule_id INTEGER,
+            booking_ids TEXT NOT NULL,
+            files TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            completed INTEGER NOT NULL,
+            failed INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ticket_jobs_created ON ticket_jobs (created_at)")
+
+    # Archive tables for finished shows, and the booking_history view over both
+    for statement in ARCHIVE_SCHEMA:
+        c.execute(statement)
+
+    # Waiting room counters and settings shared by every worker process (one row)
+    c.execute('''CREATE TABLE IF NOT EXISTS waiting_room (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    issued INTEGER NOT NULL DEFAULT 0,
+                    serving REAL NOT NULL,
+                    last_refill REAL NOT NULL,
+                    rate REAL NOT NULL,
+                    burst INTEGER NOT NULL,
+                    enabled INTEGER NOT NULL,
+                    admitted INTEGER NOT NULL DEFAULT 0
+                )''')
+    c.execute('''INSERT OR IGNORE INTO waiting_room (id, serving, last_refill, rate, burst, enabled)
+                 VALUES (1, ?, ?, ?, ?, ?)''',
+              (app.config['ADMISSION_BURST'], time.time(), app.config['ADMISSION_RATE_PER_SECOND'],
+               app.config['ADMISSION_BURST'], int(app.config['WAITING_ROOM_ENABLED'])))
+
+    # Versions of the in-memory caches, shared by every worker process
+    c.execute('''CREATE TABLE IF NOT EXISTS cache_versions (
+                    name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )''')
+
+    # Schedules whose seat rows or available_seats changed since the reconciler last looked
+    c.execute("CREATE TABLE IF NOT EXISTS dirty_schedules (schedule_id INTEGER PRIMARY KEY)")
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_seat_insert_dirty AFTER INSERT ON seat_availability
+                 BEGIN INSERT OR IGNORE INTO dirty_schedules (schedule_id) VALUES (NEW.schedule_id); END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_seat_delete_dirty AFTER DELETE ON seat_availability
+                 BEGIN INSERT OR IGNORE INTO dirty_schedules (schedule_id) VALUES (OLD.schedule_id); END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_seat_update_dirty
+                 AFTER UPDATE OF is_available, schedule_id ON seat_availability
+                 BEGIN
+                     INSERT OR IGNORE INTO dirty_schedules (schedule_id) VALUES (NEW.schedule_id);
+                     INSERT OR IGNORE INTO dirty_schedules (schedule_id) VALUES (OLD.schedule_id);
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_schedule_seats_dirty
+                 AFTER UPDATE OF available_seats ON movie_schedules
+                 BEGIN INSERT OR IGNORE INTO dirty_schedules (schedule_id) VALUES (NEW.id); END''')
+
+    # Parsed movie lengths and halls, used for schedule overlap checks
+    add_column_if_missing(c, 'movies', 'duration_minutes', 'INTEGER')
+    add_column_if_missing(c, 'movie_schedules', 'hall', 'INTEGER NOT NULL DEFAULT 1')
+    # Bumped whenever a schedule's set of seats changes, so every process can tell its cached layout is stale
+    add_column_if_missing(c, 'movie_schedules', 'layout_version', 'INTEGER NOT NULL DEFAULT 0')
+    # Bumped whenever a user's bookings change, so every process can tell its cached wallet is stale
+    add_column_if_missing(c, 'user_table', 'wallet_version', 'INTEGER NOT NULL DEFAULT 0')
+    c.execute("SELECT id, duration FROM movies WHERE duration_minutes IS NULL")
+    c.executemany("UPDATE movies SET duration_minutes = ? WHERE id = ?",
+                  [(parse_duration(duration), movie_id) for movie_id, duration in c.fetchall()])
+
     conn.commit()
     conn.close()
     print("✅ Database initialized successfully!")
 
 # ---------------- SEAT INITIALIZATION ----------------
+# Every hall uses the same A1-E8 layout
+DEFAULT_SEATS = [f"{row}{i}" for row in ["A", "B", "C", "D", "E"] for i in range(1, 9)]
+
+
 def initialize_seat_availability():
     """Initialize seat availability for all movie schedules"""
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
 
-    # Define all seats (A1-E8)
-    rows = ["A", "B", "C", "D", "E"]
-    seats_per_row = 8
-    all_seats = [f"{row}{i}" for row in rows for i in range(1, seats_per_row + 1)]
+    all_seats = DEFAULT_SEATS
 
     # Get all active schedules
     c.execute("SELECT id, movie_title, show_date, showtime FROM movie_schedules WHERE is_active = 1")
@@ -119,21 +607,320 @@ def initialize_seat_availability():
     conn.close()
     print("✅ Seat availability initialized!")
 
-# Initialize everything in correct order
-print("🚀 Starting database setup...")
-init_db()
-initialize_seat_availability()
-print("🎉 All database setup completed successfully!")
+# ---------------- SHARED CACHE VERSIONS ----------------
+# In-memory caches are keyed by version numbers kept in cache_versions, so a
+# bump made by one worker process reaches the others: every request reads
+# the (few-row) table once and adopts any newer version, running that
+# cache's hook. A bump is therefore visible everywhere from the next request.
+cache_versions = {}  # name -> version this process last adopted
+cache_version_hooks = {}  # name -> callback(version)
 
-# ---------------- ALL ROUTES ----------------
 
-# ---------------- HOME PAGE ----------------
-@app.route('/')
-@app.route('/home')
-def home():
-    conn = sqlite3.connect('database.db')
+def on_cache_version(name):
+    def decorator(func):
+        cache_version_hooks[name] = func
+        return func
+    return decorator
+
+
+def adopt_cache_versions(rows):
+    for name, version in rows:
+        if cache_versions.get(name) != version:
+            cache_versions[name] = version
+            if name in cache_version_hooks:
+                cache_version_hooks[name](version)
+
+
+def bump_cache_version(name):
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('''INSERT INTO cache_versions (name, version) VALUES (?, 1)
+                 ON CONFLICT (name) DO UPDATE SET version = version + 1''', (name,))
+    c.execute("SELECT name, version FROM cache_versions WHERE name = ?", (name,))
+    rows = c.fetchall()
+    conn.commit()
+    conn.close()
+    adopt_cache_versions(rows)
+
+
+@app.before_request
+def sync_cache_versions():
+    if request.endpoint == 'static':
+        return None
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT name, version FROM cache_versions")
+    adopt_cache_versions(c.fetchall())
+    conn.close()
+    return None
+
+# ---------------- ACCOUNT MEMBERSHIP INDEX ----------------
+# In-memory sets of short hashes of every normalized username and email.
+# A miss means the name is free and is answered without touching the
+# database; a hit is only a probable match (hash collision or a since-deleted
+# user) and is confirmed against it. register bumps the shared 'users' cache
+# version, and every worker that adopts the new version pulls in the users
+# past the highest u_id it has indexed (u_id is AUTOINCREMENT, so new users
+# always land there).
+username_index = set()
+email_index = set()
+membership_state = {'last_u_id': 0}
+membership_lock = threading.Lock()
+
+
+def membership_key(value):
+    return hashlib.blake2b(value.strip().lower().encode('utf-8'), digest_size=8).digest()
+
+
+def index_users(users):
+    """Add (u_id, u_name, u_email) rows to the sets; caller holds membership_lock"""
+    for u_id, u_name, u_email in users:
+        username_index.add(membership_key(u_name))
+        email_index.add(membership_key(u_email))
+        membership_state['last_u_id'] = max(membership_state['last_u_id'], u_id)
+
+
+def load_membership_index():
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT u_id, u_name, u_email FROM user_table")
+    users = c.fetchall()
+    conn.close()
+
+    with membership_lock:
+        username_index.clear()
+        email_index.clear()
+        membership_state['last_u_id'] = 0
+        index_users(users)
+    print(f"✅ Membership index loaded ({len(users)} users)")
+
+
+@on_cache_version('users')
+def catch_up_membership_index(version=None):
+    """Index users registered (by any process) since the newest one already indexed"""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT u_id, u_name, u_email FROM user_table WHERE u_id > ?", (membership_state['last_u_id'],))
+    users = c.fetchall()
+    conn.close()
+    with membership_lock:
+        index_users(users)
+
+
+def add_to_membership_index(username, email):
+    with membership_lock:
+        username_index.add(membership_key(username))
+        email_index.add(membership_key(email))
+
+
+def username_taken(username):
+    if membership_key(username) not in username_index:
+        return False
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM user_table WHERE LOWER(u_name) = ? LIMIT 1", (username.strip().lower(),))
+    existing = c.fetchone()
+    conn.close()
+    return existing is not None
+
+
+def email_taken(email):
+    if membership_key(email) not in email_index:
+        return False
+    conn = get_db_connection()
     c = conn.cursor()
-    c.execute("SELECT id, title, rating, poster_url FROM movies WHERE is_active = 1")
+    c.execute("SELECT 1 FROM user_table WHERE LOWER(u_email) = ? LIMIT 1", (email.strip().lower(),))
+    existing = c.fetchone()
+    conn.close()
+    return existing is not None
+
+# ---------------- RATE LIMITING ----------------
+# Sliding-window limiter keyed by (bucket, client address), kept in memory.
+rate_limit_hits = {}
+rate_limit_lock = threading.Lock()
+
+
+def is_rate_limited(bucket, limit, window_seconds):
+    key = (bucket, request.remote_addr)
+    now = time.monotonic()
+    with rate_limit_lock:
+        hits = rate_limit_hits.setdefault(key, deque())
+        while hits and now - hits[0] > window_seconds:
+            hits.popleft()
+        if len(hits) >= limit:
+            return True
+        hits.append(now)
+
+        # Drop idle clients so the table does not grow without bound
+        if len(rate_limit_hits) > 10000:
+            for stale_key in [k for k, v in rate_limit_hits.items() if not v or now - v[-1] > window_seconds]:
+                del rate_limit_hits[stale_key]
+    return False
+
+# ---------------- SERVER-SIDE SESSIONS ----------------
+# The session cookie holds only a random session ID. Session data (user_id,
+# username, role, status) lives in the user_sessions table, with an in-memory
+# LRU in front of it so most requests resolve their session without SQL.
+# Cached entries are re-read from the table after SESSION_CACHE_SECONDS so a
+# revocation made by another worker process takes effect shortly after.
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None):
+        def on_update(self):
+            self.modified = True
+
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.modified = False
+
+
+class SessionStore:
+    def __init__(self, max_entries, cache_seconds, expiry_interval):
+        self.max_entries = max_entries
+        self.cache_seconds = cache_seconds
+        self.expiry_interval = expiry_interval
+        self.cache = OrderedDict()  # sid -> (data, expires_at, cached_at)
+        self.lock = threading.Lock()
+        self.last_expiry = 0
+
+    def _remember(self, sid, data, expires_at):
+        with self.lock:
+            self.cache[sid] = (data, expires_at, time.time())
+            self.cache.move_to_end(sid)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def load(self, sid):
+        now = time.time()
+        with self.lock:
+            entry = self.cache.get(sid)
+            if entry and entry[1] > now and now - entry[2] < self.cache_seconds:
+                self.cache.move_to_end(sid)
+                return dict(entry[0])
+
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("SELECT data, expires_at FROM user_sessions WHERE session_id = ?", (sid,))
+        row = c.fetchone()
+        conn.close()
+
+        if not row or row[1] <= now:
+            with self.lock:
+                self.cache.pop(sid, None)
+            return None
+
+        data = json.loads(row[0])
+        self._remember(sid, data, row[1])
+        return dict(data)
+
+    def save(self, sid, data, lifetime_seconds):
+        expires_at = time.time() + lifetime_seconds
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute('''INSERT OR REPLACE INTO user_sessions
+                     (session_id, user_id, role, status, data, expires_at)
+                     VALUES (?, ?, ?, ?, ?, ?)''',
+                  (sid, data.get('user_id'), data.get('role'), data.get('status'),
+                   json.dumps(data, separators=(',', ':')), expires_at))
+        conn.commit()
+        conn.close()
+        self._remember(sid, dict(data), expires_at)
+
+        if time.time() - self.last_expiry > self.expiry_interval:
+            self.expire()
+
+    def delete(self, sid):
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("DELETE FROM user_sessions WHERE session_id = ?", (sid,))
+        conn.commit()
+        conn.close()
+        with self.lock:
+            self.cache.pop(sid, None)
+
+    def revoke_user(self, user_id):
+        """Delete every session belonging to user_id and return how many were removed"""
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("DELETE FROM user_sessions WHERE user_id = ?", (user_id,))
+        revoked = c.rowcount
+        conn.commit()
+        conn.close()
+        with self.lock:
+            for sid in [sid for sid, entry in self.cache.items() if entry[0].get('user_id') == user_id]:
+                del self.cache[sid]
+        return revoked
+
+    def expire(self):
+        """Bulk-delete expired sessions from the table and the cache"""
+        now = time.time()
+        self.last_expiry = now
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("DELETE FROM user_sessions WHERE expires_at <= ?", (now,))
+        expired = c.rowcount
+        conn.commit()
+        conn.close()
+        with self.lock:
+            for sid in [sid for sid, entry in self.cache.items() if entry[1] <= now]:
+                del self.cache[sid]
+        return expired
+
+
+class ServerSideSessionInterface(SessionInterface):
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.load(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=None)
+
+    def save_session(self, app, session, response):
+        cookie_name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        # Like Flask's cookie sessions: a page that read the session must not be shared between users by caches
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified and session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(cookie_name, domain=domain, path=path)
+            return
+
+        if not session.modified:
+            return
+
+        # A fresh ID on every change to the session contents prevents fixation on login
+        if session.sid:
+            self.store.delete(session.sid)
+        session.sid = secrets.token_urlsafe(32)
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        self.store.save(session.sid, dict(session), lifetime)
+
+        response.set_cookie(cookie_name, session.sid,
+                            expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app),
+                            domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
+
+
+session_store = SessionStore(app.config['SESSION_CACHE_SIZE'],
+                             app.config['SESSION_CACHE_SECONDS'],
+                             app.config['SESSION_EXPIRY_INTERVAL_SECONDS'])
+app.session_interface = ServerSideSessionInterface(session_store)
+
+# ---------------- CATALOG HELPERS ----------------
+def get_active_movies():
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT id, title, genre, duration, rating, description, poster_url FROM movies WHERE is_active = 1")
     movies = c.fetchall()
     conn.close()
 
@@ -142,17 +929,2232 @@ def home():
         movie_list.append({
             'id': movie[0],
             'title': movie[1],
-            'rating': movie[2] if movie[2] else 'PG',
-            'poster_url': movie[3]
+            'genre': movie[2],
+            'duration': movie[3],
+            'rating': movie[4],
+            'description': movie[5],
+            'poster_url': movie[6]
         })
+    return movie_list
+
+
+def get_featured_count(total_movies):
+    if total_movies >= 20:
+        return 10
+    elif total_movies > 15:
+        return 7
+    elif total_movies > 10:
+        return 5
+    elif total_movies > 5:
+        return 3
+    else:
+        return total_movies
+
+
+def get_genres(movie_list):
+    genres = []
+    for movie in movie_list:
+        if movie['genre'] and movie['genre'] not in genres:
+            genres.append(movie['genre'])
+    return genres
+
+# ---------------- FRAGMENT CACHE ----------------
+# Heavy, catalog-driven template blocks (movie cards, genre lists) are rendered
+# once per (fragment, catalog version, role) and reused until an admin edits
+# the catalog. Templates pull them in with {{ fragment('name') }}.
+catalog_version = 0
+
+
+@on_cache_version('catalog')
+def adopt_catalog_version(version):
+    global catalog_version
+    catalog_version = version
+
+
+def bump_catalog_version():
+    bump_cache_version('catalog')
+
+
+class FragmentCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (html, size, render_ms)
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_ms_saved = 0.0
+
+    def get_or_render(self, key, render):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.render_ms_saved += entry[2]
+                return entry[0]
+
+        started = time.perf_counter()
+        html = Markup(render())
+        render_ms = (time.perf_counter() - started) * 1000
+        size = len(html.encode('utf-8'))
+
+        with self.lock:
+            self.misses += 1
+            if key not in self.entries and size <= self.max_bytes:
+                self.entries[key] = (html, size, render_ms)
+                self.size += size
+                while self.size > self.max_bytes:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.size -= evicted[1]
+                    self.evictions += 1
+        return html
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'render_ms_saved': round(self.render_ms_saved, 2)
+            }
+
+
+fragment_cache = FragmentCache(app.config['FRAGMENT_CACHE_MAX_BYTES'])
+fragment_builders = {}
+
+
+def fragment_builder(name):
+    def decorator(func):
+        fragment_builders[name] = func
+        return func
+    return decorator
+
+
+@app.template_global()
+def fragment(name):
+    role = session.get('role', 'Guest')
+    key = (name, catalog_version, role)
+    return fragment_cache.get_or_render(key, lambda: fragment_builders[name](role))
+
+
+@fragment_builder('movie_cards')
+def build_movie_cards(role):
+    return render_template('_movie_cards.html', movies=get_active_movies())
+
+
+@fragment_builder('featured_cards')
+def build_featured_cards(role):
+    movie_list = get_active_movies()
+    featured_movies = movie_list[:get_featured_count(len(movie_list))]
+    return render_template('_featured_cards.html', featured_movies=featured_movies)
+
+
+@fragment_builder('genre_options')
+def build_genre_options(role):
+    return render_template('_genre_options.html', genres=get_genres(get_active_movies()))
+
+# ---------------- POSTER VARIANTS ----------------
+# Movie cards use resized WebP/JPEG posters from poster_pipeline.py instead of
+# the full-size originals. Variants are generated in the background when a
+# movie is added or edited, or lazily the first time a poster is rendered
+# without them; `python poster_pipeline.py` backfills everything at once.
+poster_manifest = {}  # poster_url -> {format: [(width, filename), ...]}
+poster_pending = set()
+poster_failures = {}  # poster_url -> time of last failed attempt
+POSTER_RETRY_SECONDS = 3600
+poster_lock = threading.Lock()
+poster_executor = ThreadPoolExecutor(max_workers=app.config['POSTER_WORKERS'])
+
+
+def remember_poster_variants(poster_url, variants):
+    formats = {}
+    for size, fmt, filename, width in variants:
+        formats.setdefault(fmt, []).append((width, filename))
+    for entries in formats.values():
+        entries.sort()
+    poster_manifest[poster_url] = formats
+
+
+def load_poster_manifest():
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT poster_url, size, format, filename, width FROM poster_variants")
+    rows = c.fetchall()
+    conn.close()
+
+    variants_by_url = {}
+    for row in rows:
+        variants_by_url.setdefault(row[0], []).append(row[1:])
+    for poster_url, variants in variants_by_url.items():
+        remember_poster_variants(poster_url, variants)
+    print(f"✅ Poster manifest loaded ({len(variants_by_url)} posters)")
+
+
+def generate_poster_variants(poster_url):
+    try:
+        conn = get_db_connection()
+        c = conn.cursor()
+        # The backfill CLI may already have built this poster
+        c.execute("SELECT size, format, filename, width FROM poster_variants WHERE poster_url = ?", (poster_url,))
+        variants = c.fetchall()
+        if not variants:
+            variants = build_poster_variants(poster_url)
+            save_poster_variants(conn, poster_url, variants)
+        conn.close()
+
+        remember_poster_variants(poster_url, variants)
+        # Re-render cached movie cards so they pick up the new srcset
+        bump_catalog_version()
+    except Exception as e:
+        poster_failures[poster_url] = time.time()
+        print(f"Error building poster variants for {poster_url}: {e}")
+    finally:
+        with poster_lock:
+            poster_pending.discard(poster_url)
+
+
+def schedule_poster_variants(poster_url):
+    if not poster_url or poster_pipeline.Image is None:
+        return
+    with poster_lock:
+        if poster_url in poster_pending:
+            return
+        # Unreachable or broken posters are retried at most once an hour
+        if time.time() - poster_failures.get(poster_url, 0) < POSTER_RETRY_SECONDS:
+            return
+        poster_pending.add(poster_url)
+    poster_executor.submit(generate_poster_variants, poster_url)
+
+
+@app.template_global()
+def poster_variants(poster_url):
+    """srcset data for a poster, or None (and queue generation) if it has no variants yet"""
+    if not poster_url:
+        return None
+    formats = poster_manifest.get(poster_url)
+    if not formats:
+        schedule_poster_variants(poster_url)
+        return None
+
+    def srcset(entries):
+        return ', '.join(f"{url_for('poster_file', filename=filename)} {width}w" for width, filename in entries)
+
+    jpeg = formats.get('jpeg', [])
+    # Middle size (the card variant) is the fallback src for browsers without srcset
+    return {
+        'webp_srcset': srcset(formats.get('webp', [])),
+        'jpeg_srcset': srcset(jpeg),
+        'src': url_for('poster_file', filename=jpeg[len(jpeg) // 2][1]) if jpeg else poster_url
+    }
+
+# ---------------- STATIC ASSET BUNDLES ----------------
+# Page CSS/JS lives in static/css and static/js. At startup every file is read
+# once, given a content-hashed URL and precompressed with gzip (and brotli when
+# the module is installed), so /assets/ only has to pick an encoding.
+ASSET_DIRS = ('css', 'js')
+asset_urls = {}   # 'css/index.css' -> 'css/index.<hash>.css'
+asset_files = {}  # 'css/index.<hash>.css' -> (mimetype, {encoding: bytes}, etag)
+
+
+def build_asset_bundles():
+    for directory in ASSET_DIRS:
+        folder = os.path.join(app.static_folder, directory)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, name), 'rb') as f:
+                data = f.read()
+
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            stem, extension = os.path.splitext(name)
+            versioned = f"{directory}/{stem}.{digest}{extension}"
+
+            encodings = {'identity': data, 'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                encodings['br'] = brotli.compress(data, quality=11)
+
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            asset_urls[f"{directory}/{name}"] = versioned
+            asset_files[versioned] = (mimetype, encodings, digest)
+    print(f"✅ Asset bundles built ({len(asset_files)} files)")
+
+
+@app.template_global()
+def asset_url(path):
+    return url_for('asset_file', filename=asset_urls.get(path, path))
+
+
+def choose_encoding(available):
+    """Best encoding the client accepts, preferring brotli, then gzip"""
+    for encoding in ('br', 'gzip'):
+        if encoding in available and request.accept_encodings[encoding] > 0:
+            return encoding
+    return 'identity'
+
+# ---------------- RESPONSE COMPRESSION ----------------
+# WSGI middleware that gzip/brotli-encodes HTML, JSON and other text responses.
+# Buffered bodies under COMPRESSION_MIN_SIZE are left alone; bigger ones are
+# compressed whole and the result is kept in a small LRU keyed by a digest of
+# the body, so identical responses (catalog JSON, cached pages) reuse the
+# compressed bytes. Streamed responses (no Content-Length) are compressed
+# chunk by chunk with a sync flush so nothing is held back.
+COMPRESSIBLE_TYPES = ('text/html', 'text/plain', 'text/css', 'text/javascript',
+                      'application/json', 'application/javascript')
+
+
+class CompressionMiddleware:
+    def __init__(self, wsgi_app, min_size, gzip_level, brotli_quality, cache_size):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (body digest, encoding) -> compressed bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.streamed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def negotiate(self, accept_encoding):
+        accepted = parse_accept_header(accept_encoding)
+        if brotli is not None and accepted['br'] > 0:
+            return 'br'
+        if accepted['gzip'] > 0:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def compress_cached(self, data, encoding):
+        key = (hashlib.blake2b(data, digest_size=16).digest(), encoding)
+        with self.lock:
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+        if compressed is None:
+            compressed = self.compress(data, encoding)
+            with self.lock:
+                self.misses += 1
+                self.cache[key] = compressed
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        with self.lock:
+            self.bytes_in += len(data)
+            self.bytes_out += len(compressed)
+        return compressed
+
+    def stream(self, app_iter, encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # 31 = gzip container
+        try:
+            for chunk in app_iter:
+                if not chunk:
+                    continue
+                if encoding == 'br':
+                    data = compressor.process(chunk) + compressor.flush()
+                else:
+                    data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            yield compressor.finish() if encoding == 'br' else compressor.flush()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.wsgi_app(environ, start_response)
+
+        # Flask calls start_response before returning the body, so the headers
+        # are known here; the real start_response is called once we decide.
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['response'] = (status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, capture_start_response)
+        status, headers, exc_info = captured['response']
+        header_map = {name.lower(): value for name, value in headers}
+
+        content_type = header_map.get('content-type', '').split(';')[0].strip()
+        if (not status.startswith('200') or 'content-encoding' in header_map
+                or content_type not in COMPRESSIBLE_TYPES):
+            start_response(status, headers, exc_info)
+            return app_iter
+
+        length = header_map.get('content-length')
+        if length is not None and int(length) < self.min_size:
+            start_response(status, headers, exc_info)
+            return app_iter
+
+        # Keep whatever the response already varies on (Flask adds Cookie for session pages)
+        vary = [value.strip() for name, value in headers if name.lower() == 'vary'
+                for value in value.split(',') if value.strip()]
+        if 'accept-encoding' not in (value.lower() for value in vary):
+            vary.append('Accept-Encoding')
+        headers = [(name, value) for name, value in headers
+                   if name.lower() not in ('content-length', 'vary')]
+        headers.append(('Content-Encoding', encoding))
+        headers.append(('Vary', ', '.join(vary)))
+        # The compressed body is a different representation, so a strong ETag must become weak
+        if 'etag' in header_map and not header_map['etag'].startswith('W/'):
+            headers = [(name, 'W/' + value if name.lower() == 'etag' else value) for name, value in headers]
+
+        if length is None:
+            with self.lock:
+                self.streamed += 1
+            start_response(status, headers, exc_info)
+            return self.stream(app_iter, encoding)
+
+        try:
+            data = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        compressed = self.compress_cached(data, encoding)
+        headers.append(('Content-Length', str(len(compressed))))
+        start_response(status, headers, exc_info)
+        return [compressed]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'streamed': self.streamed,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out
+            }
+
+
+compression = CompressionMiddleware(app.wsgi_app,
+                                    app.config['COMPRESSION_MIN_SIZE'],
+                                    app.config['COMPRESSION_GZIP_LEVEL'],
+                                    app.config['COMPRESSION_BROTLI_QUALITY'],
+                                    app.config['COMPRESSION_CACHE_SIZE'])
+app.wsgi_app = compression
+
+# ---------------- HOME PAGE BOOTSTRAP ----------------
+# Everything the customer home page needs in one payload. The catalog part is
+# computed in a single pass over movies and memoized per catalog version, so
+# a page view costs one COUNT query for the user's tickets.
+catalog_bootstrap = {'version': None, 'data': None}
+
+
+def get_catalog_bootstrap():
+    if catalog_bootstrap['version'] != catalog_version:
+        movie_list = get_active_movies()
+        featured_count = get_featured_count(len(movie_list))
+        catalog_bootstrap['data'] = {
+            'total_movies': len(movie_list),
+            'featured_count': featured_count,
+            'featured_movies': movie_list[:featured_count],
+            'genres': get_genres(movie_list)
+        }
+        catalog_bootstrap['version'] = catalog_version
+    return catalog_bootstrap['data']
+
+
+def build_bootstrap(user_id):
+    ticket_count = 0
+    if user_id is not None:
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("SELECT COUNT(*) FROM booking_history WHERE u_id = ?", (user_id,))
+        ticket_count = c.fetchone()[0]
+        conn.close()
+
+    data = dict(get_catalog_bootstrap())
+    data['ticket_count'] = ticket_count
+    data['featured_movies'], data['personalized'] = personalized_featured(user_id)
+    return data
+
+# ---------------- RECOMMENDATIONS ----------------
+# recommendations.py precomputes top-K co-booked movies per movie and per
+# user in a background job; requests only do a primary-key lookup. Every
+# process runs the job, but the recommendation_builds row lets only one of
+# them rebuild at a time, and only when the last build is an interval old.
+RECOMMENDATION_POLL_SECONDS = 300
+catalog_by_id = {'version': -1, 'movies': {}}
 
+
+def get_movies_by_id():
+    if catalog_by_id['version'] != catalog_version:
+        catalog_by_id['movies'] = {movie['id']: movie for movie in get_active_movies()}
+        catalog_by_id['version'] = catalog_version
+    return catalog_by_id['movies']
+
+
+def stored_movie_ids(table, key_column, ids_column, key):
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute(f"SELECT {ids_column} FROM {table} WHERE {key_column} = ?", (key,))
+    row = c.fetchone()
+    conn.close()
+    return [int(movie_id) for movie_id in row[0].split(',') if movie_id] if row else []
+
+
+def personalized_featured(user_id):
+    """(featured movies, personalized?) - the user's recommendations topped up with the default picks"""
+    catalog = get_catalog_bootstrap()
+    featured = catalog['featured_movies']
+    if user_id is None:
+        return featured, False
+
+    movies_by_id = get_movies_by_id()
+    picks = [movies_by_id[movie_id]
+             for movie_id in stored_movie_ids('user_recommendations', 'u_id', 'movie_ids', user_id)
+             if movie_id in movies_by_id][:catalog['featured_count']]
+    if not picks:
+        return featured, False
+
+    picked = {movie['id'] for movie in picks}
+    picks += [movie for movie in featured if movie['id'] not in picked]
+    return picks[:catalog['featured_count']], True
+
+
+def recommendation_worker():
+    """Rebuild once the last build (by any process) is an interval old; a database never built goes first"""
+    interval = app.config['RECOMMENDATION_INTERVAL_HOURS'] * 3600
+    while True:
+        try:
+            result = rebuild_recommendations(DATABASE, min_age=interval)
+            if result:
+                print(f"🎯 Recommendations rebuilt from {result['bookings']} bookings in {result['build_ms']} ms")
+        except RebuildBusy:
+            pass
+        except Exception as e:
+            print(f"Error rebuilding recommendations: {e}")
+        time.sleep(min(interval, RECOMMENDATION_POLL_SECONDS))
+
+# ---------------- TICKET WALLET ----------------
+# A customer's tickets, current and archived, split into upcoming and past
+# and joined with schedule (via the title/date/time index) and movie data
+# (via an in-memory title lookup), so the tickets page needs one request.
+# Wallets are cached per user and keyed on the user's wallet_version, which
+# book_ticket, cancel_ticket and update_booking bump in the database, plus the
+# catalog version and the shared 'wallets' version an archive run bumps, so
+# a change made on any worker is seen by all of them. An entry also expires
+# when the next upcoming show ends. Checking costs one primary-key read.
+catalog_by_title = {'version': -1, 'movies': {}}
+WALLET_MOVIE_FIELDS = ('id', 'title', 'genre', 'duration', 'rating', 'poster_url')
+wallets = OrderedDict()
+wallets_lock = threading.Lock()
+wallet_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+wallets_version = 0
+
+
+@on_cache_version('wallets')
+def adopt_wallets_version(version):
+    global wallets_version
+    with wallets_lock:
+        wallets_version = version
+        wallet_stats['invalidations'] += 1
+        wallets.clear()
+
+
+def get_movies_by_title():
+    if catalog_by_title['version'] != catalog_version:
+        catalog_by_title['movies'] = {movie['title']: movie for movie in get_active_movies()}
+        catalog_by_title['version'] = catalog_version
+    return catalog_by_title['movies']
+
+
+def show_window(show_date, showtime, duration):
+    """(start, end) datetimes of a show; None for legacy 'N/A' dates and unreadable times"""
+    try:
+        start = datetime.datetime.combine(datetime.date.fromisoformat(show_date), parse_showtime(showtime).time())
+    except (TypeError, ValueError):
+        return None
+    return start, start + datetime.timedelta(minutes=parse_duration(duration) or 0)
+
+
+def build_wallet(user_id):
+    """(wallet, seconds until it goes stale on its own)"""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('''SELECT b.b_id, b.movie_name, b.show_date, b.showtime, b.seat_no, b.booking_fee, b.status,
+                        b.booking_date, b.booking_reference, ms.id, ms.hall, 0
+                 FROM tbl_booking b
+                 LEFT JOIN movie_schedules ms
+                   ON ms.movie_title = b.movie_name AND ms.show_date = b.show_date AND ms.showtime = b.showtime
+                 WHERE b.u_id = ?
+                 UNION ALL
+                 SELECT b.b_id, b.movie_name, b.show_date, b.showtime, b.seat_no, b.booking_fee, b.status,
+                        b.booking_date, b.booking_reference, ms.id, ms.hall, 1
+                 FROM archive_bookings b
+                 LEFT JOIN archive_movie_schedules ms
+                   ON ms.movie_title = b.movie_name AND ms.show_date = b.show_date AND ms.showtime = b.showtime
+                 WHERE b.u_id = ?''', (user_id, user_id))
+    rows = c.fetchall()
+
+    # Tickets for movies taken out of the catalog still get their poster
+    movies_by_title = get_movies_by_title()
+    missing = sorted({row[1] for row in rows} - movies_by_title.keys())
+    inactive = {}
+    if missing:
+        c.execute(f'''SELECT id, title, genre, duration, rating, poster_url FROM movies
+                      WHERE title IN ({','.join('?' * len(missing))})''', missing)
+        inactive = {row[1]: dict(zip(WALLET_MOVIE_FIELDS, row)) for row in c.fetchall()}
+    conn.close()
+
+    now = datetime.datetime.now()
+    stale_in = app.config['WALLET_CACHE_SECONDS']
+    upcoming, past = [], []
+    for (booking_id, movie_name, show_date, showtime, seat_no, fee, status,
+         booked_at, reference, schedule_id, hall, archived) in rows:
+        movie = movies_by_title.get(movie_name) or inactive.get(movie_name) or {}
+        window = show_window(show_date, showtime, movie.get('duration'))
+        seats = [seat.strip() for seat in seat_no.split(',') if seat.strip()]
+        ticket = {
+            'booking_id': booking_id,
+            'booking_reference': reference,
+            'movie_title': movie_name,
+            'movie_id': movie.get('id'),
+            'poster_url': movie.get('poster_url'),
+            'genre': movie.get('genre'),
+            'rating': movie.get('rating'),
+            'schedule_id': schedule_id,
+            'hall': hall,
+            'show_date': show_date,
+            'showtime': showtime,
+            'starts_at': window[0].isoformat() if window else None,
+            'seats': seats,
+            'quantity': len(seats),
+            'booking_fee': fee,
+            'status': status,
+            'booked_at': booked_at,
+            'archived': bool(archived)
+        }
+        if archived or (window and window[1] <= now):
+            past.append(ticket)
+        else:
+            upcoming.append(ticket)
+            if window:
+                stale_in = min(stale_in, (window[1] - now).total_seconds())
+
+    # Soonest show first; most recent show first among past ones, undated ones last in both
+    upcoming.sort(key=lambda ticket: (ticket['starts_at'] is None, ticket['starts_at'] or '', ticket['booking_id']))
+    past.sort(key=lambda ticket: (ticket['starts_at'] or '', ticket['booking_id']), reverse=True)
+    featured, _ = personalized_featured(user_id)
+    wallet = {
+        'upcoming': upcoming,
+        'past': past,
+        'now_showing': [{field: movie[field] for field in WALLET_MOVIE_FIELDS} for movie in featured]
+    }
+    return wallet, stale_in
+
+
+def get_ticket_wallet(user_id):
+    # Read before building: a booking that commits during the build bumps it past this
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT wallet_version FROM user_table WHERE u_id = ?", (user_id,))
+    row = c.fetchone()
+    conn.close()
+    version = (row[0] if row else 0, catalog_version, wallets_version)
+
+    now = time.monotonic()
+    with wallets_lock:
+        entry = wallets.get(user_id)
+        if entry and entry['expires'] > now and entry['version'] == version:
+            wallets.move_to_end(user_id)
+            wallet_stats['hits'] += 1
+            return entry['wallet']
+        wallet_stats['misses'] += 1
+
+    wallet, stale_in = build_wallet(user_id)
+    with wallets_lock:
+        wallets[user_id] = {'wallet': wallet, 'expires': now + stale_in, 'version': version}
+        wallets.move_to_end(user_id)
+        while len(wallets) > app.config['WALLET_CACHE_SIZE']:
+            wallets.popitem(last=False)
+    return wallet
+
+
+def invalidate_wallet(user_id=None):
+    """Forget one user's wallet, or every wallet when user_id is None, in every process"""
+    if user_id is None:
+        bump_cache_version('wallets')
+        return
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("UPDATE user_table SET wallet_version = wallet_version + 1 WHERE u_id = ?", (user_id,))
+    conn.commit()
+    conn.close()
+    with wallets_lock:
+        wallet_stats['invalidations'] += 1
+        wallets.pop(user_id, None)
+
+# ---------------- TICKET PDF RENDERING ----------------
+# PDF tickets (with a QR code of booking_reference) are rendered by
+# ticket_pdf.py in a process pool, never on the request thread. Each booking's
+# PDF is cached on disk as booking<id>-<state key>.pdf, so any change to the
+# booking produces a new file; cancel_ticket and update_booking also delete
+# the old files. Job progress is kept in the ticket_jobs table, so
+# /ticket_jobs/<id> and its download work on every worker; the queue of
+# bookings still to render lives with the worker that accepted the job.
+# TICKET_MAX_PENDING caps renders in flight across all jobs. A job holds at
+# most TICKET_JOB_CHUNK slots and hands each one to its next booking as a
+# render finishes, so a schedule with hundreds of bookings is admitted as
+# readily as a single ticket. A booking whose PDF is already being rendered
+# (same state key) joins that render instead of queuing a second one.
+class TicketQueueFull(Exception):
+    pass
+
+
+ticket_pool = None
+ticket_renders = {}  # PDF path -> jobs waiting on its render
+ticket_jobs_lock = threading.Lock()
+ticket_pending = 0
+TICKET_JOB_TTL_SECONDS = 3600
+TICKET_JOB_ABANDONED_SECONDS = 86400  # running jobs of a worker that died are dropped after this
+
+os.makedirs(app.config['TICKET_CACHE_DIR'], exist_ok=True)
+
+
+def get_ticket_pool():
+    global ticket_pool
+    with ticket_jobs_lock:
+        if ticket_pool is None:
+            ticket_pool = ProcessPoolExecutor(max_workers=app.config['TICKET_WORKERS'])
+        return ticket_pool
+
+
+def booking_row_to_dict(booking):
+    """Row from `SELECT b.*, u.u_name, u.u_email FROM tbl_booking b JOIN user_table u`"""
+    return {
+        'id': booking[0],
+        'movie': booking[2],
+        'date': booking[3],
+        'time': booking[4],
+        'seats': booking[5],
+        'fee': booking[6],
+        'status': booking[7],
+        'booking_date': booking[8],
+        'payment_status': booking[9],
+        'reference': booking[10],
+        'user_name': booking[11],
+        'user_email': booking[12]
+    }
+
+
+def ticket_pdf_path(booking):
+    return os.path.join(app.config['TICKET_CACHE_DIR'],
+                        f"booking{booking['id']}-{ticket_state_key(booking)}.pdf")
+
+
+def invalidate_ticket_pdfs(booking_id):
+    for path in glob.glob(os.path.join(app.config['TICKET_CACHE_DIR'], f"booking{booking_id}-*.pdf")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def submit_ticket_job(bookings, user_id, schedule_id=None):
+    """Queue a PDF render for every booking that has no cached PDF yet and return the job"""
+    global ticket_pending
+    missing = [booking for booking in bookings if not os.path.exists(ticket_pdf_path(booking))]
+    now = time.time()
+
+    chunk = min(len(missing), max(1, app.config['TICKET_JOB_CHUNK']))
+
+    with ticket_jobs_lock:
+        if ticket_pending + chunk > app.config['TICKET_MAX_PENDING']:
+            raise TicketQueueFull()
+        ticket_pending += chunk
+
+    job = {
+        'id': secrets.token_urlsafe(8),
+        'user_id': user_id,
+        'schedule_id': schedule_id,
+        'booking_ids': [booking['id'] for booking in bookings],
+        'files': [ticket_pdf_path(booking) for booking in bookings],
+        'total': len(bookings),
+        'completed': len(bookings) - len(missing),
+        'failed': 0,
+        'status': 'running' if missing else 'done',
+        'created_at': now,
+        'waiting': deque(missing)
+    }
+    try:
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute('''DELETE FROM ticket_jobs WHERE created_at < ? AND (status != 'running' OR created_at < ?)''',
+                  (now - TICKET_JOB_TTL_SECONDS, now - TICKET_JOB_ABANDONED_SECONDS))
+        c.execute('''INSERT INTO ticket_jobs (job_id, user_id, schedule_id, booking_ids, files, total, completed,
+                                              failed, status, created_at)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                  (job['id'], user_id, schedule_id, json.dumps(job['booking_ids']), json.dumps(job['files']),
+                   job['total'], job['completed'], 0, job['status'], now))
+        conn.commit()
+        conn.close()
+    except Exception:
+        with ticket_jobs_lock:
+            ticket_pending -= chunk
+        raise
+
+    for _ in range(chunk):
+        advance_ticket_job(job)
+    return job
+
+
+def advance_ticket_job(job):
+    """Put the slot the job holds to work on its next booking, or give the slot back"""
+    global ticket_pending
+    while True:
+        with ticket_jobs_lock:
+            booking = job['waiting'].popleft() if job['waiting'] else None
+            if booking is None:
+                ticket_pending -= 1
+                return
+            path = ticket_pdf_path(booking)
+            if path in ticket_renders:
+                ticket_renders[path].append(job)
+                return
+            if not os.path.exists(path):
+                ticket_renders[path] = [job]
+                break
+        # Rendered by an earlier job since this one was queued
+        record_ticket_job_progress(job['id'], True)
+
+    future = get_ticket_pool().submit(render_tickets_pdf, [booking])
+    future.add_done_callback(lambda f: finish_ticket_render(path, f))
+
+
+def finish_ticket_render(path, future):
+    try:
+        data = future.result()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        succeeded = True
+    except Exception as e:
+        print(f"Error rendering ticket PDF {path}: {e}")
+        succeeded = False
+
+    with ticket_jobs_lock:
+        jobs = ticket_renders.pop(path, [])
+    for job in jobs:
+        record_ticket_job_progress(job['id'], succeeded)
+        advance_ticket_job(job)
+
+
+def record_ticket_job_progress(job_id, succeeded):
+    try:
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute('''UPDATE ticket_jobs
+                     SET completed = completed + ?, failed = failed + ?,
+                         status = CASE WHEN completed + failed + 1 < total THEN status
+                                       WHEN failed + ? = 0 THEN 'done' ELSE 'failed' END
+                     WHERE job_id = ?''',
+                  (int(succeeded), int(not succeeded), int(not succeeded), job_id))
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error recording ticket job {job_id}: {e}")
+
+
+def load_ticket_job(job_id):
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('''SELECT job_id, user_id, schedule_id, booking_ids, files, total, completed, failed, status, created_at
+                 FROM ticket_jobs WHERE job_id = ?''', (job_id,))
+    row = c.fetchone()
+    conn.close()
+    if not row:
+        return None
+    job = dict(zip(('id', 'user_id', 'schedule_id', 'booking_ids', 'files', 'total', 'completed', 'failed',
+                    'status', 'created_at'), row))
+    job['booking_ids'] = json.loads(job['booking_ids'])
+    job['files'] = json.loads(job['files'])
+    return job
+
+
+def ticket_job_response(job):
+    result = {key: job[key] for key in ('id', 'status', 'total', 'completed', 'failed')}
+    result['status_url'] = url_for('ticket_job_status', job_id=job['id'])
+    if job['status'] == 'done':
+        if job['schedule_id'] is None and job['total'] == 1:
+            result['download_url'] = url_for('ticket_pdf', booking_id=job['booking_ids'][0])
+        else:
+            result['download_url'] = url_for('ticket_job_download', job_id=job['id'])
+    return result
+
+# ---------------- BOOKING REFERENCES ----------------
+# References are Snowflake-style ids - seconds since REFERENCE_EPOCH, a 5-bit
+# node id and an 8-bit per-second sequence - so two calls can never produce
+# the same value without touching the database. The id is then run through a
+# keyed Feistel permutation (cycle-walked, which is only a permutation for
+# inputs below 36**9) so references still look random, and encoded as 9
+# base-36 characters. 36**9 >> 13 seconds is about 390 years, so ids last
+# until the 2410s; generate() still refuses to go past that. References
+# issued before the switch are 8 characters and stay valid for lookups and
+# check-in - they can never equal a new one because the lengths differ.
+#
+# Each node holds <BOOKING_REF_STATE_DIR>/node-<n>.lock for the life of the
+# process and records in it the last second it handed out, so a restart or
+# a clock stepping back carries on after that second instead of reusing it.
+# A node that runs out of sequence numbers borrows the next second, which is
+# recorded the same way. book_ticket retries with a fresh reference if the
+# unique index on tbl_booking still reports a duplicate.
+REFERENCE_ALPHABET = string.digits + string.ascii_uppercase
+REFERENCE_LENGTH = 9
+LEGACY_REFERENCE_LENGTH = 8
+REFERENCE_SPACE = len(REFERENCE_ALPHABET) ** REFERENCE_LENGTH
+REFERENCE_EPOCH = 1735689600  # 2025-01-01 UTC
+REFERENCE_NODE_BITS = 5
+REFERENCE_SEQUENCE_BITS = 8
+REFERENCE_HALF_BITS = 24  # Feistel halves; 2**48 covers REFERENCE_SPACE
+
+
+class ReferenceGenerator:
+    def __init__(self, key, node_id, state_dir):
+        if node_id is not None and not 0 <= node_id < 2 ** REFERENCE_NODE_BITS:
+            raise ValueError(f"Booking reference node id must be 0-{2 ** REFERENCE_NODE_BITS - 1}")
+        self.round_keys = [hashlib.blake2b(f"{key}:{i}".encode('utf-8'), digest_size=16).digest()
+                           for i in range(4)]
+        os.makedirs(state_dir, exist_ok=True)
+        for node in (range(2 ** REFERENCE_NODE_BITS) if node_id is None else [node_id]):
+            try:
+                self.state = lock_exclusive(os.path.join(state_dir, f'node-{node}.lock'))
+                break
+            except LockBusy:
+                continue
+        else:
+            if node_id is None:
+                raise RuntimeError("Every booking reference node id is in use")
+            raise RuntimeError(f"Booking reference node {node_id} is in use by another process")
+        self.node_id = node
+        self.state.seek(0)
+        saved = self.state.read().strip()
+        # Treat the last recorded second as used up: the next id starts a later one
+        self.last_second = int(saved) if saved.isdigit() else 0
+        self.sequence = 2 ** REFERENCE_SEQUENCE_BITS - 1
+        self.lock = threading.Lock()
+
+    def advance(self, second):
+        """Move to a new second and record it; caller holds the lock"""
+        self.last_second = second
+        self.sequence = 0
+        self.state.seek(0)
+        self.state.truncate()
+        self.state.write(str(second))
+        self.state.flush()
+
+    def next_id(self):
+        with self.lock:
+            second = int(time.time()) - REFERENCE_EPOCH
+            if second > self.last_second:
+                self.advance(second)
+            elif self.sequence + 1 < 2 ** REFERENCE_SEQUENCE_BITS:
+                # Same second (or the clock went back): keep counting
+                self.sequence += 1
+            else:
+                self.advance(self.last_second + 1)
+            value = ((self.last_second << (REFERENCE_NODE_BITS + REFERENCE_SEQUENCE_BITS))
+                     | (self.node_id << REFERENCE_SEQUENCE_BITS) | self.sequence)
+            if value >= REFERENCE_SPACE:
+                raise RuntimeError("Booking reference ids are exhausted (REFERENCE_EPOCH is too old)")
+            return value
+
+    def round_function(self, value, round_key):
+        digest = hashlib.blake2b(value.to_bytes(4, 'big'), key=round_key, digest_size=4).digest()
+        return int.from_bytes(digest, 'big') & ((1 << REFERENCE_HALF_BITS) - 1)
+
+    def permute(self, value):
+        mask = (1 << REFERENCE_HALF_BITS) - 1
+        # Cycle-walk: a permutation of [0, 2**48) restricted to [0, REFERENCE_SPACE)
+        while True:
+            left, right = value >> REFERENCE_HALF_BITS, value & mask
+            for round_key in self.round_keys:
+                left, right = right, left ^ self.round_function(right, round_key)
+            value = (left << REFERENCE_HALF_BITS) | right
+            if value < REFERENCE_SPACE:
+                return value
+
+    def encode(self, value):
+        chars = []
+        for _ in range(REFERENCE_LENGTH):
+            value, digit = divmod(value, len(REFERENCE_ALPHABET))
+            chars.append(REFERENCE_ALPHABET[digit])
+        return ''.join(reversed(chars))
+
+    def generate(self):
+        return self.encode(self.permute(self.next_id()))
+
+
+reference_generator = ReferenceGenerator(app.config['BOOKING_REF_KEY'], app.config['BOOKING_REF_NODE'],
+                                         app.config['BOOKING_REF_STATE_DIR'])
+
+
+def normalize_reference(reference):
+    """Upper-case a reference and reject anything that cannot be one"""
+    reference = (reference or '').strip().upper()
+    if (len(reference) not in (REFERENCE_LENGTH, LEGACY_REFERENCE_LENGTH)
+            or any(ch not in REFERENCE_ALPHABET for ch in reference)):
+        return None
+    return reference
+
+# ---------------- SCHEDULE IMPORT ----------------
+# Bulk scheduling: rows come from a CSV/JSON upload or are expanded from a
+# recurrence rule such as "daily 13:00/16:00/19:30 for 4 weeks". Every row is
+# validated in memory against one read of the movies and existing schedules,
+# then all schedules and their seat maps go in with executemany inside the
+# same write transaction, so an import either lands completely or not at all
+# and nothing can be scheduled between the check and the insert.
+RECURRENCE_DAYS = {
+    'daily': {0, 1, 2, 3, 4, 5, 6},
+    'weekdays': {0, 1, 2, 3, 4},
+    'weekends': {5, 6},
+}
+WEEKDAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+RECURRENCE_PATTERN = re.compile(r'^(?P<days>\S+)\s+(?P<times>.+?)\s+for\s+(?P<count>\d+)\s+(?P<unit>days?|weeks?)$')
+
+
+def parse_showtime(value):
+    text = str(value or '').strip().upper().replace('.', '')
+    for fmt in ('%I:%M %p', '%I:%M%p', '%I %p', '%I%p', '%H:%M'):
+        try:
+            return datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid showtime: {value!r}")
+
+
+def normalize_showtime(value):
+    """'13:00', '1 pm' and '01:00 PM' all become '01:00 PM' (the admin form's format)"""
+    return parse_showtime(value).strftime('%I:%M %p')
+
+
+def parse_duration(value):
+    """Minutes in free-text durations like '2h 15m', '3 h 15 mi', '135 min' or '2:15'; None if unreadable"""
+    text = str(value or '').strip().lower()
+    match = re.fullmatch(r'(\d+):(\d{1,2})', text)
+    if match:
+        return int(match.group(1)) * 60 + int(match.group(2))
+    match = re.fullmatch(r'(?:(\d+)\s*h[a-z]*)?\s*(?:(\d+)\s*m[a-z]*)?', text)
+    if match and (match.group(1) or match.group(2)):
+        return int(match.group(1) or 0) * 60 + int(match.group(2) or 0)
+    if text.isdigit():
+        return int(text)
+    return None
+
+
+def schedule_interval(show_date, showtime, duration_minutes):
+    """(start, end) of a show in absolute minutes, so shows past midnight compare correctly"""
+    start_time = parse_showtime(showtime)
+    start = (datetime.date.fromisoformat(show_date).toordinal() * 1440
+             + start_time.hour * 60 + start_time.minute)
+    return start, start + (duration_minutes or app.config['SCHEDULE_DEFAULT_DURATION_MINUTES'])
+
+
+class HallScheduleIndex:
+    """Per-hall timeline of shows sorted by start minute.
+
+    A conflict check bisects to the shows starting before the new one ends
+    and scans back only as far as the longest show could reach, so it costs
+    O(log n + overlaps) instead of a scan over the hall's whole programme.
+    """
+
+    def __init__(self):
+        self.starts = {}  # hall -> sorted start minutes
+        self.shows = {}  # hall -> [(start, end, schedule_id)] in the same order
+        self.halls = {}  # schedule_id -> hall
+        self.longest = 0
+
+    def add(self, hall, start, end, schedule_id=None):
+        starts = self.starts.setdefault(hall, [])
+        position = bisect.bisect_right(starts, start)
+        starts.insert(position, start)
+        self.shows.setdefault(hall, []).insert(position, (start, end, schedule_id))
+        self.longest = max(self.longest, end - start)
+        if schedule_id is not None:
+            self.halls[schedule_id] = hall
+
+    def remove(self, schedule_id):
+        hall = self.halls.pop(schedule_id, None)
+        if hall is None:
+            return
+        for position, show in enumerate(self.shows[hall]):
+            if show[2] == schedule_id:
+                del self.shows[hall][position]
+                del self.starts[hall][position]
+                return
+
+    def conflicts(self, hall, start, end, turnaround=0):
+        """Shows in the hall that overlap [start, end) once turnaround is added between them"""
+        starts = self.starts.get(hall)
+        if not starts:
+            return []
+        low = bisect.bisect_left(starts, start - turnaround - self.longest)
+        high = bisect.bisect_left(starts, end + turnaround)
+        return [show for show in self.shows[hall][low:high] if show[1] + turnaround > start]
+
+
+def build_hall_schedule_index(c):
+    index = HallScheduleIndex()
+    c.execute("""
+        SELECT ms.id, ms.hall, ms.show_date, ms.showtime, m.duration_minutes
+        FROM movie_schedules ms
+        LEFT JOIN movies m ON m.id = ms.movie_id
+        WHERE ms.is_active = 1
+    """)
+    for schedule_id, hall, show_date, showtime, duration_minutes in c.fetchall():
+        try:
+            start, end = schedule_interval(show_date, showtime, duration_minutes)
+        except ValueError:
+            continue  # legacy rows with unreadable dates/times can't be placed
+        index.add(hall, start, end, schedule_id)
+    return index
+
+
+# The index is per process. Every change to the shows in it bumps the 'halls'
+# row of cache_versions, and overlap checks run inside a BEGIN IMMEDIATE
+# transaction that first rebuilds the index if that version has moved. Holding
+# the database write lock from the check to the insert keeps admins on
+# different workers from squeezing overlapping shows into the same slot.
+hall_schedules = HallScheduleIndex()
+hall_schedules_version = 0  # 'halls' version the index was built at
+hall_schedules_lock = threading.Lock()
+
+
+def current_hall_schedules_version(c):
+    c.execute("SELECT version FROM cache_versions WHERE name = 'halls'")
+    row = c.fetchone()
+    return row[0] if row else 0
+
+
+def load_hall_schedules():
+    global hall_schedules, hall_schedules_version
+    conn = get_db_connection()
+    c = conn.cursor()
+    version = current_hall_schedules_version(c)
+    index = build_hall_schedule_index(c)
+    conn.close()
+    with hall_schedules_lock:
+        hall_schedules, hall_schedules_version = index, version
+    print(f"✅ Hall schedule index loaded ({len(index.halls)} shows)")
+
+
+def sync_hall_schedules(c):
+    """Rebuild the index if another process changed the shows.
+
+    Caller holds hall_schedules_lock and has begun a write transaction on c.
+    """
+    global hall_schedules, hall_schedules_version
+    version = current_hall_schedules_version(c)
+    if version != hall_schedules_version:
+        hall_schedules, hall_schedules_version = build_hall_schedule_index(c), version
+
+
+def record_hall_schedules_change(c):
+    """Bump the 'halls' version inside the caller's transaction and return the new version"""
+    c.execute('''INSERT INTO cache_versions (name, version) VALUES ('halls', 1)
+                 ON CONFLICT (name) DO UPDATE SET version = version + 1''')
+    return current_hall_schedules_version(c)
+
+
+def hall_schedules_changed():
+    """Shows changed outside a hall-checked transaction (movie lengths, archiving): rebuild everywhere"""
+    bump_cache_version('halls')
+    load_hall_schedules()
+
+
+def describe_conflict(c, show):
+    """Readable description of a conflicting show from the index"""
+    if show[2] is None:
+        return "another show in this import"
+    c.execute("SELECT movie_title, show_date, showtime FROM movie_schedules WHERE id = ?", (show[2],))
+    row = c.fetchone()
+    return f"{row[0]} on {row[1]} at {row[2]}" if row else f"schedule #{show[2]}"
+
+
+def expand_recurrence(rule, start_date):
+    """Return [(show_date, showtime)] for a rule like 'mon,wed,fri 19:30 for 2 weeks'"""
+    match = RECURRENCE_PATTERN.match(rule.strip().lower())
+    if not match:
+        raise ValueError("Rule must look like 'daily 13:00/16:00/19:30 for 4 weeks'")
+
+    days = match.group('days')
+    if days in RECURRENCE_DAYS:
+        weekdays = RECURRENCE_DAYS[days]
+    else:
+        names = days.split(',')
+        unknown = [name for name in names if name not in WEEKDAY_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown day(s) in rule: {', '.join(unknown)}")
+        weekdays = {WEEKDAY_NAMES.index(name) for name in names}
+
+    showtimes = [normalize_showtime(t) for t in match.group('times').split('/')]
+    count = int(match.group('count'))
+    total_days = count * 7 if match.group('unit').startswith('week') else count
+
+    start = datetime.date.fromisoformat(start_date)
+    shows = []
+    for offset in range(total_days):
+        day = start + datetime.timedelta(days=offset)
+        if day.weekday() in weekdays:
+            shows.extend((day.isoformat(), showtime) for showtime in showtimes)
+    return shows
+
+
+def read_schedule_upload(upload):
+    """Rows from an uploaded .csv (with a header line) or .json file"""
+    text = upload.read().decode('utf-8-sig')
+    if upload.filename.lower().endswith('.json'):
+        data = json.loads(text)
+        return data.get('schedules', []) if isinstance(data, dict) else data
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def validate_schedule_rows(c, rows):
+    """Check rows against the catalog and existing schedules in memory.
+
+    Returns (schedules, errors) where schedules are ready-to-insert tuples of
+    (movie_id, movie_title, show_date, showtime, total_seats, hall).
+    """
+    c.execute("SELECT id, title, duration_minutes FROM movies")
+    movies = c.fetchall()
+    titles_by_id = {movie_id: title for movie_id, title, _ in movies}
+    durations = {movie_id: minutes for movie_id, _, minutes in movies}
+    ids_by_title = {title.strip().lower(): movie_id for movie_id, title, _ in movies}
+    turnaround = app.config['SCHEDULE_TURNAROUND_MINUTES']
+    # Private copy of the hall timeline; new rows are added as they pass so
+    # clashes inside the upload are caught too
+    index = build_hall_schedule_index(c)
+
+    # Existing shows keyed the same way as new ones, so '9 am' clashes with '09:00 AM'
+    c.execute("SELECT movie_id, show_date, showtime FROM movie_schedules")
+    taken = set()
+    for movie_id, show_date, showtime in c.fetchall():
+        try:
+            taken.add((movie_id, show_date, normalize_showtime(showtime)))
+        except ValueError:
+            taken.add((movie_id, show_date, showtime))
+
+    schedules = []
+    errors = []
+    for line, row in enumerate(rows, start=1):
+        try:
+            if row.get('movie_id') not in (None, ''):
+                movie_id = int(row['movie_id'])
+            else:
+                movie_id = ids_by_title.get(str(row.get('movie_title', '')).strip().lower())
+            if movie_id not in titles_by_id:
+                raise ValueError("Movie not found")
+
+            show_date = datetime.date.fromisoformat(str(row.get('show_date', '')).strip()).isoformat()
+            showtime = normalize_showtime(row.get('showtime'))
+            total_seats = int(row.get('total_seats') or 40)
+            if not 1 <= total_seats <= 100:
+                raise ValueError("total_seats must be between 1 and 100")
+            hall = int(row.get('hall') or 1)
+
+            key = (movie_id, show_date, showtime)
+            if key in taken:
+                raise ValueError(f"Schedule already exists for {titles_by_id[movie_id]} on {show_date} at {showtime}")
+
+            start, end = schedule_interval(show_date, showtime, durations[movie_id])
+            clashes = index.conflicts(hall, start, end, turnaround)
+            if clashes:
+                raise ValueError(f"Hall {hall} is busy with {describe_conflict(c, clashes[0])}")
+
+            taken.add(key)
+            index.add(hall, start, end)
+            schedules.append((movie_id, titles_by_id[movie_id], show_date, showtime, total_seats, hall))
+        except (ValueError, TypeError, AttributeError) as e:
+            errors.append({'row': line, 'error': str(e)})
+    return schedules, errors
+
+
+def insert_schedules(c, schedules):
+    """Insert schedules and their seat maps; returns the seat row count.
+
+    Runs inside the caller's BEGIN IMMEDIATE transaction, which also makes
+    the new ids exactly those above max_id. The caller commits.
+    """
+    c.execute("SELECT COALESCE(MAX(id), 0) FROM movie_schedules")
+    max_id = c.fetchone()[0]
+    c.executemany('''INSERT INTO movie_schedules
+                     (movie_id, movie_title, show_date, showtime, total_seats, available_seats, hall)
+                     VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                  [(movie_id, title, show_date, showtime, seats, seats, hall)
+                   for movie_id, title, show_date, showtime, seats, hall in schedules])
+
+    c.execute("SELECT id, movie_title, show_date, showtime FROM movie_schedules WHERE id > ?", (max_id,))
+    seat_rows = [(schedule_id, title, show_date, showtime, seat, 1)
+                 for schedule_id, title, show_date, showtime in c.fetchall()
+                 for seat in DEFAULT_SEATS]
+    c.executemany('''INSERT OR IGNORE INTO seat_availability
+                     (schedule_id, movie_title, show_date, showtime, seat_number, is_available)
+                     VALUES (?, ?, ?, ?, ?, ?)''', seat_rows)
+    return len(seat_rows)
+
+# ---------------- PRICING ----------------
+# Each schedule's {seat: price} table is built once from its hall's seat
+# classes, day and showtime (see pricing.py) and kept in an LRU, so quoting a
+# basket is one dict lookup per seat. pricing_version is part of the key and
+# is bumped (for every worker, through cache_versions) whenever seat classes
+# change. A table that doesn't know a seat predates a layout change made by
+# another worker and is rebuilt.
+pricing_version = 0
+price_tables = OrderedDict()
+price_tables_lock = threading.Lock()
+
+
+@on_cache_version('pricing')
+def adopt_pricing_version(version):
+    global pricing_version
+    with price_tables_lock:
+        pricing_version = version
+        price_tables.clear()
+
+
+def bump_pricing_version():
+    bump_cache_version('pricing')
+
+
+def forget_price_table(schedule_id):
+    """Drop a schedule's cached table after its seat map changes"""
+    with price_tables_lock:
+        price_tables.pop((int(schedule_id), pricing_version), None)
+
+
+def get_price_table(c, schedule_id):
+    """{seat_number: price} for a schedule, or None if the schedule doesn't exist"""
+    key = (int(schedule_id), pricing_version)
+    with price_tables_lock:
+        table = price_tables.get(key)
+        if table is not None:
+            price_tables.move_to_end(key)
+            return table
+
+    c.execute("SELECT hall, show_date, showtime FROM movie_schedules WHERE id = ?", (schedule_id,))
+    schedule = c.fetchone()
+    if not schedule:
+        return None
+    hall, show_date, showtime = schedule
+    try:
+        start_time = parse_showtime(showtime)
+        start_minute = start_time.hour * 60 + start_time.minute
+    except ValueError:
+        start_minute = 12 * 60  # unreadable legacy showtimes get afternoon pricing
+
+    c.execute("SELECT seat_number FROM seat_availability WHERE schedule_id = ?", (schedule_id,))
+    seat_numbers = [row[0] for row in c.fetchall()] or DEFAULT_SEATS
+    c.execute("SELECT row_label, seat_class FROM hall_seat_classes WHERE hall = ?", (hall,))
+    table = build_price_table(seat_numbers, dict(c.fetchall()), show_date, start_minute)
+
+    with price_tables_lock:
+        price_tables[key] = table
+        while len(price_tables) > app.config['PRICE_CACHE_SIZE']:
+            price_tables.popitem(last=False)
+    return table
+
+
+def lookup_promo(c, code):
+    """(code, percent_off, amount_off) for a usable promo code; ValueError otherwise"""
+    code = (code or '').strip().upper()
+    c.execute("""
+        SELECT code, percent_off, amount_off FROM promo_codes
+        WHERE code = ? AND is_active = 1
+          AND (valid_from IS NULL OR valid_from <= date('now'))
+          AND (valid_until IS NULL OR valid_until >= date('now'))
+          AND (max_uses IS NULL OR uses < max_uses)
+    """, (code,))
+    promo = c.fetchone()
+    if not promo:
+        raise ValueError("Invalid or expired promo code")
+    return promo
+
+
+def quote_seats(c, schedule_id, seats, promo_code=None):
+    """Price a basket of seats for one schedule; ValueError for unknown seats or promo codes"""
+    table = get_price_table(c, schedule_id)
+    if table is None:
+        raise ValueError("Schedule not found")
+    if any(seat not in table for seat in seats):
+        forget_price_table(schedule_id)
+        table = get_price_table(c, schedule_id)
+    unknown = [seat for seat in seats if seat not in table]
+    if unknown:
+        raise ValueError(f"Unknown seat(s): {', '.join(unknown)}")
+
+    prices = {seat: table[seat] for seat in seats}
+    subtotal = round(sum(prices.values()), 2)
+    discount = 0
+    if promo_code:
+        code, percent_off, amount_off = lookup_promo(c, promo_code)
+        promo_code = code
+        discount = promo_discount(subtotal, percent_off, amount_off)
+    return {
+        'seats': prices,
+        'subtotal': subtotal,
+        'discount': discount,
+        'total': round(subtotal - discount, 2),
+        'promo_code': promo_code or None
+    }
+
+
+def remaining_fee(c, schedule_id, paid, all_seats, remaining_seats):
+    """What a booking costs after a partial cancellation.
+
+    The amount paid is scaled by the remaining seats' share of the list price,
+    so any promo discount carries over proportionally.
+    """
+    table = get_price_table(c, schedule_id) if schedule_id else None
+    if table and all(seat in table for seat in all_seats):
+        full = sum(table[seat] for seat in all_seats)
+        remaining = sum(table[seat] for seat in remaining_seats)
+    else:
+        full, remaining = len(all_seats), len(remaining_seats)
+    return round((paid or 0) * remaining / full, 2) if full else 0
+
+# ---------------- WAITING ROOM ----------------
+# Admission control for the purchase flow. Everyone who arrives without an
+# admission pass draws the next serving number; the "now serving" number
+# advances at ADMISSION_RATE_PER_SECOND and may run up to ADMISSION_BURST
+# ahead of demand, so quiet periods admit instantly while an on-sale spike
+# becomes an orderly FIFO queue instead of SQLite lock errors. Queue tickets
+# and admission passes are signed cookies.
+#
+# The counters, rate, burst and on/off switch live in the single waiting_room
+# row, so every worker serves the same queue and /admission_control retunes
+# all of them. Serving is stored as of last_refill; between writes it is
+# min(serving + elapsed * rate, issued + burst), so only drawing a number,
+# being admitted and retuning write the row. Polls read it at most once per
+# WAITING_ROOM_CACHE_SECONDS per process. The row is seeded from the
+# ADMISSION_* settings the first time the database is set up.
+PURCHASE_ENDPOINTS = {'book_ticket', 'get_available_seats', 'seat_map', 'get_seat_prices', 'quote'}
+QUEUE_COOKIE = 'queue_ticket'
+ADMISSION_COOKIE = 'admission_pass'
+WAITING_ROOM_CACHE_SECONDS = 1.0
+WAITING_ROOM_FIELDS = ('issued', 'serving', 'last_refill', 'rate', 'burst', 'enabled', 'admitted')
+queue_signer = URLSafeTimedSerializer(app.secret_key, salt='waiting-room-queue')
+admission_signer = URLSafeTimedSerializer(app.secret_key, salt='waiting-room-admission')
+
+
+class WaitingRoom:
+    def __init__(self, cache_seconds):
+        self.cache_seconds = cache_seconds
+        self.row = None
+        self.read_at = 0.0
+        self.lock = threading.Lock()
+
+    def remember(self, row):
+        state = dict(zip(WAITING_ROOM_FIELDS, row))
+        with self.lock:
+            self.row = state
+            self.read_at = time.monotonic()
+        return state
+
+    def state(self, fresh=False):
+        """The waiting_room row as a dict, re-read when older than cache_seconds"""
+        with self.lock:
+            if not fresh and self.row is not None and time.monotonic() - self.read_at < self.cache_seconds:
+                return self.row
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute(f"SELECT {', '.join(WAITING_ROOM_FIELDS)} FROM waiting_room WHERE id = 1")
+        row = c.fetchone()
+        conn.close()
+        return self.remember(row)
+
+    def update(self, assignments='', params=(), burst=None):
+        """Bring serving up to now, apply assignments (evaluated against the old row) and return the new state.
+
+        A new burst moves serving by the difference, as if it had always applied.
+        """
+        now = time.time()
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute(f'''UPDATE waiting_room
+                      SET serving = MIN(serving + (? - last_refill) * rate, issued + burst) + COALESCE(? - burst, 0),
+                          last_refill = ?{assignments}
+                      WHERE id = 1''', (now, burst, now, *params))
+        c.execute(f"SELECT {', '.join(WAITING_ROOM_FIELDS)} FROM waiting_room WHERE id = 1")
+        row = c.fetchone()
+        conn.commit()
+        conn.close()
+        return self.remember(row)
+
+    def serving(self, state):
+        return min(state['serving'] + (time.time() - state['last_refill']) * state['rate'],
+                   state['issued'] + state['burst'])
+
+    def join(self):
+        return self.update(', issued = issued + 1')['issued']
+
+    def position(self, number):
+        """How many people are still ahead of a serving number (0 = admitted)"""
+        return max(0, int(number - self.serving(self.state()) + 0.999999))
+
+    def admit(self):
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("UPDATE waiting_room SET admitted = admitted + 1 WHERE id = 1")
+        conn.commit()
+        conn.close()
+
+    def configure(self, rate=None, burst=None, enabled=None):
+        self.update(', rate = COALESCE(?, rate), burst = COALESCE(?, burst), enabled = COALESCE(?, enabled)',
+                    (rate, burst, enabled), burst=burst)
+
+    def stats(self):
+        state = self.state(fresh=True)
+        serving = int(self.serving(state))
+        return {
+            'enabled': bool(state['enabled']),
+            'rate_per_second': state['rate'],
+            'burst': state['burst'],
+            'issued': state['issued'],
+            'serving': serving,
+            'waiting': max(0, state['issued'] - serving),
+            'admitted': state['admitted']
+        }
+
+
+waiting_room = WaitingRoom(WAITING_ROOM_CACHE_SECONDS)
+
+
+def has_admission_pass():
+    try:
+        admission_signer.loads(request.cookies.get(ADMISSION_COOKIE, ''),
+                               max_age=app.config['ADMISSION_PASS_SECONDS'])
+        return True
+    except BadSignature:
+        return False
+
+
+def queue_number():
+    """Serving number from the visitor's queue ticket, drawing a new one if needed"""
+    try:
+        number = queue_signer.loads(request.cookies.get(QUEUE_COOKIE, ''),
+                                    max_age=app.config['QUEUE_TICKET_SECONDS'])['n']
+        # A number past anything issued belongs to a queue that no longer exists (e.g. a restored database)
+        if number <= waiting_room.state()['issued'] or number <= waiting_room.state(fresh=True)['issued']:
+            return number
+    except (BadSignature, KeyError, TypeError):
+        pass
+    number = waiting_room.join()
+    g.queue_ticket = queue_signer.dumps({'n': number})
+    return number
+
+
+def waiting_status(number):
+    position = waiting_room.position(number)
+    if position == 0:
+        waiting_room.admit()
+        g.admission_pass = True
+    rate = waiting_room.state()['rate'] or 1
+    return {'admitted': position == 0, 'position': position, 'eta_seconds': round(position / rate)}
+
+
+@app.before_request
+def admission_control():
+    if request.endpoint not in PURCHASE_ENDPOINTS or not waiting_room.state()['enabled']:
+        return None
+    if has_admission_pass():
+        # Sliding pass: active buyers keep their place while they pick seats
+        g.admission_pass = True
+        return None
+
+    status = waiting_status(queue_number())
+    if status['admitted']:
+        return None
+
+    if request.method == 'GET' and request.endpoint == 'book_ticket':
+        return redirect(url_for('waiting_room_page', next=request.full_path))
+    response = jsonify({'error': 'Waiting room', **status})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, min(status['eta_seconds'], 30)))
+    return response
+
+
+@app.after_request
+def set_waiting_room_cookies(response):
+    if 'admission_pass' in g:
+        response.set_cookie(ADMISSION_COOKIE, admission_signer.dumps({'renewed': time.time()}),
+                            max_age=app.config['ADMISSION_PASS_SECONDS'], httponly=True, samesite='Lax')
+        if QUEUE_COOKIE in request.cookies:
+            response.delete_cookie(QUEUE_COOKIE)
+    elif 'queue_ticket' in g:
+        response.set_cookie(QUEUE_COOKIE, g.queue_ticket, max_age=app.config['QUEUE_TICKET_SECONDS'],
+                            httponly=True, samesite='Lax')
+    return response
+
+# ---------------- IDEMPOTENT REQUESTS ----------------
+# Booking and cancellation forms send an idempotency key. The first request
+# with a key claims it (in memory for this process, and with a row in
+# idempotency_keys for every process) and runs; duplicates that arrive while
+# it runs wait for it, and later repeats get the stored response replayed
+# without touching tbl_booking again. Only successes and redirects are
+# stored: client and server errors release the key, so a user who fixes a
+# rejected form and resubmits it (with the same page's key) runs it for real.
+class IdempotencyStore:
+    def __init__(self, max_entries, ttl_seconds, wait_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.cache = OrderedDict()  # key -> (status_code, location, content_type, body, created_at)
+        self.inflight = {}  # key -> threading.Event set when the first attempt finishes
+        self.lock = threading.Lock()
+        self.last_expiry = 0
+
+    def _remember(self, key, stored):
+        with self.lock:
+            self.cache[key] = stored
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def lookup(self, key):
+        now = time.time()
+        with self.lock:
+            stored = self.cache.get(key)
+            if stored and now - stored[4] < self.ttl_seconds:
+                self.cache.move_to_end(key)
+                return stored
+
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute('''SELECT status_code, location, content_type, body, created_at FROM idempotency_keys
+                     WHERE idempotency_key = ? AND status_code IS NOT NULL AND created_at > ?''',
+                  (key, now - self.ttl_seconds))
+        stored = c.fetchone()
+        conn.close()
+        if stored:
+            self._remember(key, stored)
+        return stored
+
+    def claim(self, key):
+        """Insert the placeholder row; False if another process already holds the key"""
+        now = time.time()
+        conn = get_db_connection()
+        c = conn.cursor()
+        if now - self.last_expiry > 600:
+            self.last_expiry = now
+            c.execute("DELETE FROM idempotency_keys WHERE created_at <= ?", (now - self.ttl_seconds,))
+        # A placeholder older than the wait limit belongs to a worker that died mid-request
+        c.execute("DELETE FROM idempotency_keys WHERE idempotency_key = ? AND status_code IS NULL AND created_at < ?",
+                  (key, now - self.wait_seconds))
+        c.execute("INSERT OR IGNORE INTO idempotency_keys (idempotency_key, created_at) VALUES (?, ?)", (key, now))
+        claimed = c.rowcount == 1
+        conn.commit()
+        conn.close()
+        return claimed
+
+    def pending(self, key):
+        """True while some process holds the key without a stored response"""
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("SELECT 1 FROM idempotency_keys WHERE idempotency_key = ? AND status_code IS NULL", (key,))
+        held = c.fetchone() is not None
+        conn.close()
+        return held
+
+    def finish(self, key, response):
+        """Store a completed response, or release the key when there is nothing worth replaying"""
+        conn = get_db_connection()
+        c = conn.cursor()
+        if response is None:
+            c.execute("DELETE FROM idempotency_keys WHERE idempotency_key = ? AND status_code IS NULL", (key,))
+        else:
+            stored = (response.status_code, response.headers.get('Location'), response.mimetype,
+                      response.get_data(), time.time())
+            c.execute('''UPDATE idempotency_keys
+                         SET status_code = ?, location = ?, content_type = ?, body = ?, created_at = ?
+                         WHERE idempotency_key = ?''', (*stored, key))
+            self._remember(key, stored)
+        conn.commit()
+        conn.close()
+
+    def wait_for(self, key, deadline):
+        """The stored response once another process finishes, or None if it released the key"""
+        while time.time() < deadline:
+            stored = self.lookup(key)
+            if stored:
+                return stored
+            if not self.pending(key):
+                return None
+            time.sleep(0.1)
+        return None
+
+    def execute(self, key, run):
+        """Run the view once per key; returns (response, stored_result)"""
+        deadline = time.time() + self.wait_seconds
+        while True:
+            stored = self.lookup(key)
+            if stored:
+                return None, stored
+
+            with self.lock:
+                event = self.inflight.get(key)
+                leader = event is None
+                if leader:
+                    event = self.inflight[key] = threading.Event()
+            if not leader:
+                event.wait(max(0, deadline - time.time()))
+                stored = self.lookup(key)
+                if stored or time.time() >= deadline:
+                    return None, stored
+                continue  # the first attempt failed and released the key; run it ourselves
+
+            response = None
+            claimed = False
+            try:
+                claimed = self.claim(key)
+                if claimed:
+                    response = run()
+                    return response, None
+                # Another worker process is running it
+                stored = self.wait_for(key, deadline)
+                if stored or time.time() >= deadline:
+                    return None, stored
+            finally:
+                if claimed:
+                    self.finish(key, response if response is not None and response.status_code < 400 else None)
+                with self.lock:
+                    self.inflight.pop(key, None)
+                event.set()
+
+
+idempotency_store = IdempotencyStore(app.config['IDEMPOTENCY_CACHE_SIZE'],
+                                     app.config['IDEMPOTENCY_TTL_SECONDS'],
+                                     app.config['IDEMPOTENCY_WAIT_SECONDS'])
+
+
+def idempotent(view):
+    """Deduplicate POSTs carrying an Idempotency-Key header or idempotency_key form field"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key') or request.form.get('idempotency_key')
+        if request.method != 'POST' or not key:
+            return view(*args, **kwargs)
+
+        # Keys are scoped to the user and the exact URL so they can't collide across forms
+        scoped_key = hashlib.sha256(f"{session.get('user_id')}:{request.path}:{key}".encode('utf-8')).hexdigest()
+        response, stored = idempotency_store.execute(scoped_key,
+                                                     lambda: app.make_response(view(*args, **kwargs)))
+        if response is not None:
+            return response
+        if stored is None:
+            return "This request is still being processed, please wait a moment and refresh", 409
+
+        status_code, location, content_type, body, _ = stored
+        replay = Response(body, status=status_code, mimetype=content_type)
+        if location:
+            replay.headers['Location'] = location
+        replay.headers['Idempotent-Replayed'] = 'true'
+        return replay
+    return wrapper
+
+# ---------------- DOOR CHECK-IN ----------------
+# The checkins table is the source of truth: a scan is admitted only if its
+# INSERT OR IGNORE on the booking_reference primary key adds a row, so two
+# workers (or two handhelds) can never both admit the same ticket. Each
+# process also keeps a per-schedule dict of references it has seen admitted,
+# so a repeated scan is rejected with a dict lookup before touching the
+# table. Entries are added only after the insert commits, so the dict never
+# claims a ticket is unused. /checkin_sync writes a whole upload in one
+# transaction.
+admitted_by_schedule = {}  # schedule_id -> {booking_reference: checked_in_at}
+checkin_lock = threading.Lock()
+
+
+def remember_admitted(results):
+    """Record committed admissions (and duplicates found in the table) in the in-memory dicts"""
+    with checkin_lock:
+        for result in results:
+            if result['result'] in ('admitted', 'duplicate'):
+                admitted_by_schedule.setdefault(result['schedule_id'], {})[result['reference']] = \
+                    result['checked_in_at']
+
+
+def check_in(c, reference, schedule_id=None, scanned_at=None, device=None):
+    """Admit one booking reference and return the scan result; the caller commits, then calls remember_admitted"""
+    reference = normalize_reference(reference)
+    if not reference:
+        return {'reference': reference, 'result': 'invalid'}
+
+    c.execute("""
+        SELECT b.b_id, b.movie_name, b.show_date, b.showtime, b.seat_no, ms.id
+        FROM tbl_booking b
+        LEFT JOIN movie_schedules ms
+          ON ms.movie_title = b.movie_name AND ms.show_date = b.show_date AND ms.showtime = b.showtime
+        WHERE b.booking_reference = ?
+    """, (reference,))
+    booking = c.fetchone()
+
+    if not booking:
+        return {'reference': reference, 'result': 'invalid'}
+
+    booking_id, movie_name, show_date, showtime, seats, booking_schedule_id = booking
+    result = {
+        'reference': reference,
+        'booking_id': booking_id,
+        'schedule_id': booking_schedule_id,
+        'movie': movie_name,
+        'show_date': show_date,
+        'showtime': showtime,
+        'seats': seats
+    }
+    if schedule_id is not None and booking_schedule_id != schedule_id:
+        result['result'] = 'wrong_show'
+        return result
+
+    with checkin_lock:
+        seen_at = admitted_by_schedule.get(booking_schedule_id, {}).get(reference)
+    if seen_at is None:
+        checked_in_at = scanned_at or time.strftime('%Y-%m-%d %H:%M:%S')
+        c.execute('''INSERT OR IGNORE INTO checkins
+                     (booking_reference, booking_id, schedule_id, checked_in_at, device)
+                     VALUES (?, ?, ?, ?, ?)''',
+                  (reference, booking_id, booking_schedule_id, checked_in_at, device))
+        if c.rowcount == 1:
+            result['result'] = 'admitted'
+            result['checked_in_at'] = checked_in_at
+            return result
+        c.execute("SELECT checked_in_at FROM checkins WHERE booking_reference = ?", (reference,))
+        seen_at = c.fetchone()[0]
+
+    result['result'] = 'duplicate'
+    result['checked_in_at'] = seen_at
+    return result
+
+
+# ---------------- BOOKING JOURNAL ----------------
+# Every book, cancel, partial cancel and status change appends one row to
+# booking_events on the same cursor as the change itself, so an event commits
+# (or rolls back) with it and the journal's order is the order the database
+# applied them in. A schedule's seat map is its latest schedule_snapshots row
+# plus the events after it; a background thread writes a new snapshot once a
+# schedule has collected JOURNAL_SNAPSHOT_EVERY events, so a replay never
+# reads more than that.
+JOURNAL_SEAT_EVENTS = ('book', 'cancel', 'partial_cancel')
+journal_watermark = 0  # highest seq the snapshotter has looked at
+
+
+def record_event(c, kind, schedule_id, booking_id, seats=(), **detail):
+    """Append one event to the journal inside the caller's transaction"""
+    c.execute('''INSERT INTO booking_events (schedule_id, booking_id, kind, seats, detail, created_at)
+                 VALUES (?, ?, ?, ?, ?, ?)''',
+              (schedule_id, booking_id, kind, ','.join(seats),
+               json.dumps(detail, sort_keys=True) if detail else None, time.strftime('%Y-%m-%d %H:%M:%S')))
+
+
+def apply_event(booked, kind, booking_id, seats):
+    """Apply one event to a {seat_number: booking_id} map of booked seats"""
+    if kind == 'book':
+        for seat in seats:
+            booked[seat] = booking_id
+    elif kind in JOURNAL_SEAT_EVENTS:
+        for seat in seats:
+            if booked.get(seat) == booking_id:
+                del booked[seat]
+
+
+def replay_seat_map(c, schedule_id):
+    """({seat_number: booking_id} of booked seats, last seq applied) for one schedule"""
+    c.execute("SELECT last_seq, booked_seats FROM schedule_snapshots WHERE schedule_id = ?", (schedule_id,))
+    snapshot = c.fetchone()
+    last_seq, booked = (snapshot[0], json.loads(snapshot[1])) if snapshot else (0, {})
+    c.execute('''SELECT seq, kind, booking_id, seats FROM booking_events
+                 WHERE schedule_id = ? AND seq > ? ORDER BY seq''', (schedule_id, last_seq))
+    for seq, kind, booking_id, seats in c.fetchall():
+        apply_event(booked, kind, booking_id, seats.split(',') if seats else [])
+        last_seq = seq
+    return booked, last_seq
+
+
+def snapshot_schedule(c, schedule_id):
+    booked, last_seq = replay_seat_map(c, schedule_id)
+    # Never move a snapshot backwards if another worker got there first
+    c.execute('''INSERT INTO schedule_snapshots (schedule_id, last_seq, booked_seats, created_at)
+                 VALUES (?, ?, ?, datetime('now'))
+                 ON CONFLICT (schedule_id) DO UPDATE
+                 SET last_seq = excluded.last_seq, booked_seats = excluded.booked_seats,
+                     created_at = excluded.created_at
+                 WHERE excluded.last_seq > schedule_snapshots.last_seq''',
+              (schedule_id, last_seq, json.dumps(booked, sort_keys=True)))
+    return last_seq
+
+
+def take_snapshots():
+    """Snapshot every schedule with JOURNAL_SNAPSHOT_EVERY events since its last snapshot"""
+    global journal_watermark
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('''SELECT schedule_id, MAX(seq) FROM booking_events
+                 WHERE seq > ? AND schedule_id IS NOT NULL GROUP BY schedule_id''', (journal_watermark,))
+    touched = c.fetchall()
+
+    snapshots = 0
+    for schedule_id, _ in touched:
+        c.execute('''SELECT COUNT(*) FROM booking_events
+                     WHERE schedule_id = ?
+                       AND seq > COALESCE((SELECT last_seq FROM schedule_snapshots WHERE schedule_id = ?), 0)''',
+                  (schedule_id, schedule_id))
+        if c.fetchone()[0] >= app.config['JOURNAL_SNAPSHOT_EVERY']:
+            snapshot_schedule(c, schedule_id)
+            conn.commit()
+            snapshots += 1
+    conn.close()
+    if touched:
+        journal_watermark = max(journal_watermark, max(seq for _, seq in touched))
+    return snapshots
+
+
+def journal_snapshotter():
+    while True:
+        time.sleep(app.config['JOURNAL_SNAPSHOT_SECONDS'])
+        try:
+            take_snapshots()
+        except sqlite3.Error as e:
+            print(f"Error taking seat map snapshots: {e}")
+
+
+threading.Thread(target=journal_snapshotter, name='journal-snapshotter', daemon=True).start()
+
+# ---------------- SEAT MAP ENCODING ----------------
+# /seat_map sends a schedule's layout once, as row labels and seat numbers,
+# and identifies it by a hash the client echoes back. Availability is then a
+# base64 bitmap over the layout order. The schedule's last journal seq is
+# the map version: given since=<version>, only the seats named in later
+# events are sent, as layout indices. Layouts are cached per process, keyed
+# by movie_schedules.layout_version, which save_seat_configuration bumps; a
+# seat the cached layout doesn't know about also forces a rebuild.
+seat_layouts = OrderedDict()
+seat_layouts_lock = threading.Lock()
+
+
+def seat_sort_key(seat):
+    row = seat_row(seat)
+    number = seat[len(row):]
+    return row, int(number) if number else 0, seat
+
+
+def describe_layout(seats):
+    """[[row, seat count]] when a row is numbered 1..n, else [[row, [numbers]]]"""
+    rows = []
+    for seat in seats:
+        row = seat_row(seat)
+        if not rows or rows[-1][0] != row:
+            rows.append([row, []])
+        rows[-1][1].append(seat[len(row):])
+    for entry in rows:
+        if entry[1] == [str(number) for number in range(1, len(entry[1]) + 1)]:
+            entry[1] = len(entry[1])
+    return rows
+
+
+def get_seat_layout(c, schedule_id, layout_version, refresh=False):
+    """{'id', 'seats', 'index', 'rows'} for a schedule, or None if it has no seat map"""
+    with seat_layouts_lock:
+        layout = seat_layouts.get(schedule_id)
+        if layout is not None and layout['version'] == layout_version and not refresh:
+            seat_layouts.move_to_end(schedule_id)
+            return layout
+
+    c.execute("SELECT seat_number FROM seat_availability WHERE schedule_id = ?", (schedule_id,))
+    seats = sorted((row[0] for row in c.fetchall()), key=seat_sort_key)
+    if not seats:
+        return None
+    layout = {
+        'id': hashlib.sha1(','.join(seats).encode()).hexdigest()[:12],
+        'version': layout_version,
+        'seats': seats,
+        'index': {seat: i for i, seat in enumerate(seats)},
+        'rows': describe_layout(seats)
+    }
+
+    with seat_layouts_lock:
+        seat_layouts[schedule_id] = layout
+        while len(seat_layouts) > app.config['SEAT_LAYOUT_CACHE_SIZE']:
+            seat_layouts.popitem(last=False)
+    return layout
+
+
+def encode_seat_bitmap(size, indices):
+    """Base64 of a bitmap with the given bits set, most significant bit first"""
+    bitmap = bytearray((size + 7) // 8)
+    for i in indices:
+        bitmap[i >> 3] |= 0x80 >> (i & 7)
+    return base64.b64encode(bytes(bitmap)).decode('ascii')
+
+# ---------------- SEAT COUNT RECONCILER ----------------
+# available_seats is kept by +/- arithmetic in the booking routes and can be
+# overwritten by update_seat_configuration, so it drifts from the number of
+# is_available = 1 rows. Triggers add a schedule to dirty_schedules whenever
+# either side changes; the reconciler recomputes only those, a batch per
+# transaction, and clears their marks in the same transaction (including the
+# ones its own corrections just set). Corrections are kept in a ring buffer
+# for the admin dashboard. Schedules without seat rows can't be checked and
+# are only counted.
+seat_drift_log = deque(maxlen=app.config['SEAT_DRIFT_BUFFER_SIZE'])
+seat_drift_stats = {'runs': 0, 'checked': 0, 'drifted': 0, 'seats_off': 0, 'unmapped': 0,
+                    'last_run': None, 'last_audit': None}
+seat_drift_lock = threading.Lock()
+
+
+def reconcile_schedules(c, schedule_ids, mode, repair=True):
+    """Compare available_seats with the seat rows of some schedules and (optionally) fix them"""
+    placeholders = ','.join('?' * len(schedule_ids))
+    c.execute(f'''SELECT ms.id, ms.available_seats, COUNT(sa.id), COALESCE(SUM(sa.is_available = 1), 0)
+                  FROM movie_schedules ms
+                  LEFT JOIN seat_availability sa ON sa.schedule_id = ms.id
+                  WHERE ms.id IN ({placeholders})
+                  GROUP BY ms.id''', schedule_ids)
+    checked, unmapped, drift = 0, 0, []
+    found_at = time.strftime('%Y-%m-%d %H:%M:%S')
+    for schedule_id, recorded, seat_rows, actual in c.fetchall():
+        if not seat_rows:
+            unmapped += 1
+            continue
+        checked += 1
+        if recorded != actual:
+            drift.append({'schedule_id': schedule_id, 'recorded': recorded, 'actual': actual,
+                          'found_at': found_at, 'mode': mode, 'repaired': repair})
+    if repair and drift:
+        c.executemany("UPDATE movie_schedules SET available_seats = ? WHERE id = ?",
+                      [(entry['actual'], entry['schedule_id']) for entry in drift])
+
+    with seat_drift_lock:
+        seat_drift_log.extend(drift)
+        seat_drift_stats['checked'] += checked
+        seat_drift_stats['drifted'] += len(drift)
+        seat_drift_stats['seats_off'] += sum(abs((entry['recorded'] or 0) - entry['actual']) for entry in drift)
+        seat_drift_stats['unmapped'] += unmapped
+    return {'checked': checked, 'unmapped': unmapped, 'drift': drift}
+
+
+def reconcile_dirty(batch_size=None):
+    """Recompute every dirty schedule, one batch per transaction"""
+    batch_size = batch_size or app.config['SEAT_RECONCILE_BATCH_SIZE']
+    totals = {'checked': 0, 'unmapped': 0, 'drifted': 0, 'batches': 0}
+    while True:
+        conn = get_db_connection()
+        c = conn.cursor()
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            c.execute("SELECT schedule_id FROM dirty_schedules ORDER BY schedule_id LIMIT ?", (batch_size,))
+            schedule_ids = [row[0] for row in c.fetchall()]
+            if not schedule_ids:
+                conn.rollback()
+                break
+            result = reconcile_schedules(c, schedule_ids, 'dirty')
+            c.execute(f"DELETE FROM dirty_schedules WHERE schedule_id IN ({','.join('?' * len(schedule_ids))})",
+                      schedule_ids)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        totals['checked'] += result['checked']
+        totals['unmapped'] += result['unmapped']
+        totals['drifted'] += len(result['drift'])
+        totals['batches'] += 1
+        # Let booking requests in between batches
+        time.sleep(0.01)
+
+    with seat_drift_lock:
+        seat_drift_stats['runs'] += 1
+        seat_drift_stats['last_run'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    return totals
+
+
+def audit_seat_counts(repair=True, batch_size=None):
+    """Full scan of every schedule, for audits; dirty marks are left alone"""
+    batch_size = batch_size or app.config['SEAT_RECONCILE_BATCH_SIZE']
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT id FROM movie_schedules ORDER BY id")
+    schedule_ids = [row[0] for row in c.fetchall()]
+
+    started = time.perf_counter()
+    summary = {'schedules': len(schedule_ids), 'checked': 0, 'unmapped': 0, 'drift': []}
+    try:
+        for start in range(0, len(schedule_ids), batch_size):
+            if repair:
+                c.execute("BEGIN IMMEDIATE")
+            result = reconcile_schedules(c, schedule_ids[start:start + batch_size], 'audit', repair)
+            if repair:
+                conn.commit()
+            summary['checked'] += result['checked']
+            summary['unmapped'] += result['unmapped']
+            summary['drift'].extend(result['drift'])
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    summary['seats_off'] = sum(abs((entry['recorded'] or 0) - entry['actual']) for entry in summary['drift'])
+    summary['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    with seat_drift_lock:
+        seat_drift_stats['last_audit'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    return summary
+
+
+def seat_reconciler():
+    last_audit = 0
+    while True:
+        time.sleep(app.config['SEAT_RECONCILE_SECONDS'])
+        try:
+            if (app.config['SEAT_AUDIT_INTERVAL_HOURS'] > 0 and
+                    time.time() - last_audit >= app.config['SEAT_AUDIT_INTERVAL_HOURS'] * 3600):
+                audit = audit_seat_counts()
+                last_audit = time.time()
+                if audit['drift']:
+                    print(f"🪑 Seat audit corrected {len(audit['drift'])} schedules ({audit['seats_off']} seats off)")
+            reconcile_dirty()
+        except sqlite3.Error as e:
+            print(f"Error reconciling seat counts: {e}")
+
+
+if app.config['SEAT_RECONCILE_SECONDS'] > 0:
+    threading.Thread(target=seat_reconciler, name='seat-reconciler', daemon=True).start()
+
+# ---------------- ARCHIVAL ----------------
+def run_archive():
+    """Archive finished shows, then drop in-memory state that pointed at them"""
+    result = archive_finished_shows(DATABASE, app.config['ARCHIVE_KEEP_DAYS'], app.config['ARCHIVE_BATCH_SIZE'])
+    archived = result.pop('schedule_ids')
+    if archived:
+        hall_schedules_changed()
+        invalidate_wallet()
+        with checkin_lock:
+            for schedule_id in archived:
+                admitted_by_schedule.pop(schedule_id, None)
+    return result
+
+
+def archive_worker():
+    while True:
+        time.sleep(app.config['ARCHIVE_INTERVAL_HOURS'] * 3600)
+        try:
+            result = run_archive()
+            print(f"📦 Archived {result['schedules']} finished schedules in {result['batches']} batches")
+        except Exception as e:
+            print(f"Error archiving finished shows: {e}")
+
+
+if app.config['ARCHIVE_INTERVAL_HOURS'] > 0:
+    threading.Thread(target=archive_worker, name='archive-worker', daemon=True).start()
+
+# ---------------- BACKUPS ----------------
+# backup.py's WalShipper takes online base backups and ships committed WAL
+# frames into BACKUP_DIR from this one thread; restores go through
+# `python backup.py restore`. A new base is taken at startup when shipping is
+# on (the chain has to start from a base), every BACKUP_INTERVAL_HOURS, and
+# whenever an admin asks for one. Only one process ships: the others (extra
+# workers, the reloader's parent) find BACKUP_DIR locked, stay on standby and
+# retry each round, so one of them takes over if the shipper exits.
+backup_requested = threading.Event()
+backup_lock = threading.Lock()
+backup_state = {'shipper': None, 'last_base': None, 'last_error': None, 'standby': False}
+
+
+def run_backup_cycle(base_due):
+    with backup_lock:
+        shipper = backup_state['shipper']
+        if shipper is None:
+            try:
+                shipper = backup_state['shipper'] = WalShipper(DATABASE, app.config['BACKUP_DIR'])
+            except ShipperBusy:
+                backup_state['standby'] = True
+                return
+            backup_state['standby'] = False
+        shipping = app.config['WAL_SHIP_SECONDS'] > 0
+        if base_due or (shipping and shipper.needs_base):
+            result = shipper.take_base(app.config['BACKUP_KEEP'], app.config['BACKUP_PAGES_PER_STEP'],
+                                       app.config['BACKUP_STEP_PAUSE'])
+            backup_state['last_base'] = result
+            print(f"💾 Base backup {result['path']}: {result['bytes'] / 1048576:.1f} MB in {result['seconds']} s")
+        if shipping:
+            shipper.ship(app.config['WAL_CHECKPOINT_BYTES'])
+
+
+def backup_worker():
+    bases = list_bases(app.config['BACKUP_DIR'])
+    last_base = bases[-1]['created_at'] if bases else 0
+    while True:
+        requested = backup_requested.wait(app.config['WAL_SHIP_SECONDS'] or 60)
+        backup_requested.clear()
+        base_due = requested or (app.config['BACKUP_INTERVAL_HOURS'] > 0 and
+                                 time.time() - last_base >= app.config['BACKUP_INTERVAL_HOURS'] * 3600)
+        try:
+            run_backup_cycle(base_due)
+            if backup_state['last_base']:
+                last_base = backup_state['last_base']['created_at']
+            backup_state['last_error'] = None
+        except Exception as e:
+            print(f"Error backing up database: {e}")
+            backup_state['last_error'] = str(e)
+
+
+def ship_wal_on_exit():
+    shipper = backup_state['shipper']
+    if shipper is not None and backup_lock.acquire(timeout=5):
+        try:
+            shipper.ship()
+        finally:
+            backup_lock.release()
+
+
+if app.config['BACKUP_INTERVAL_HOURS'] > 0 or app.config['WAL_SHIP_SECONDS'] > 0:
+    threading.Thread(target=backup_worker, name='backup-worker', daemon=True).start()
+    atexit.register(ship_wal_on_exit)
+
+# Initialize everything in correct order
+print("🚀 Starting database setup...")
+init_db()
+initialize_seat_availability()
+load_membership_index()
+load_poster_manifest()
+load_hall_schedules()
+build_asset_bundles()
+print("🎉 All database setup completed successfully!")
+
+# Started after init_db so its first run finds the recommendation tables
+if app.config['RECOMMENDATION_INTERVAL_HOURS'] > 0:
+    threading.Thread(target=recommendation_worker, name='recommendation-worker', daemon=True).start()
+
+# ---------------- ALL ROUTES ----------------
+
+# ---------------- HOME PAGE ----------------
+@app.route('/')
+@app.route('/home')
+def home():
+    # Movie cards and genre lists come from the fragment cache
     if 'user_id' in session:
         if session.get('role') == 'Customer':
-            return render_template('index.html', movies=movie_list)
+            return render_template('index.html', bootstrap=build_bootstrap(session['user_id']))
         else:
             return redirect(url_for('admin_dashboard'))
     else:
-        return render_template('logout.html', movies=movie_list)
+        return render_template('logout.html')
 
 
 # ---------------- REGISTER ----------------
@@ -175,7 +3177,7 @@ def register():
         if len(password) < 8:
             return render_template('register.html', error="Password must be at least 8 characters long!")
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         c.execute("SELECT u_id FROM user_table WHERE LOWER(u_name) = ?", (username.lower(),))
@@ -194,7 +3196,12 @@ def register():
             return render_template('register.html',
                                    error="Email already registered! Please use a different email or try logging in.")
 
-        hashed_password = generate_password_hash(password)
+        try:
+            hashed_password = hash_password(password)
+        except HashPoolBusy:
+            conn.close()
+            return render_template('register.html',
+                                   error="The server is busy right now. Please try again in a moment."), 503, {'Retry-After': '2'}
 
         try:
             c.execute("""
@@ -205,6 +3212,8 @@ def register():
 
             user_id = c.lastrowid
             conn.close()
+            add_to_membership_index(username, email)
+            bump_cache_version('users')
 
             success_message = f"""
             🎉 Registration Successful!
@@ -229,32 +3238,28 @@ def register():
 
 @app.route('/check_username')
 def check_username():
-    username = request.args.get('username', '').strip().lower()
-    if not username:
-        return jsonify({'available': True})
+    if is_rate_limited('availability_check', app.config['AVAILABILITY_CHECK_LIMIT'],
+                       app.config['AVAILABILITY_CHECK_WINDOW_SECONDS']):
+        return jsonify({'error': 'Too many requests'}), 429, {'Retry-After': '5'}
 
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    c.execute("SELECT u_id FROM user_table WHERE LOWER(u_name) = ?", (username,))
-    existing = c.fetchone()
-    conn.close()
+    username = request.args.get('username', '').strip().lower()
+    if not username:
+        return jsonify({'available': True})
 
-    return jsonify({'available': not existing})
+    return jsonify({'available': not username_taken(username)})
 
 
 @app.route('/check_email')
 def check_email():
+    if is_rate_limited('availability_check', app.config['AVAILABILITY_CHECK_LIMIT'],
+                       app.config['AVAILABILITY_CHECK_WINDOW_SECONDS']):
+        return jsonify({'error': 'Too many requests'}), 429, {'Retry-After': '5'}
+
     email = request.args.get('email', '').strip().lower()
     if not email:
         return jsonify({'available': True})
 
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    c.execute("SELECT u_id FROM user_table WHERE LOWER(u_email) = ?", (email,))
-    existing = c.fetchone()
-    conn.close()
-
-    return jsonify({'available': not existing})
+    return jsonify({'available': not email_taken(email)})
 
 
 # ---------------- LOGIN ----------------
@@ -264,7 +3269,7 @@ def login():
         username_email = request.form['username_email'].strip()
         password = request.form['password']
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         if '@' in username_email:
@@ -273,9 +3278,21 @@ def login():
             c.execute("SELECT * FROM user_table WHERE u_name = ?", (username_email,))
 
         user = c.fetchone()
+
+        try:
+            password_ok = bool(user) and verify_password(user[3], password)
+
+            # Transparently upgrade hashes made with old parameters
+            if password_ok and password_needs_rehash(user[3]):
+                c.execute("UPDATE user_table SET u_pass = ? WHERE u_id = ?", (hash_password(password), user[0]))
+                conn.commit()
+        except HashPoolBusy:
+            conn.close()
+            return render_template('login.html',
+                                   error="The server is busy right now. Please try again in a moment."), 503, {'Retry-After': '2'}
         conn.close()
 
-        if user and check_password_hash(user[3], password):
+        if password_ok:
             user_role = user[4] if user[4] else 'Customer'
 
             user_status = user[5] if len(user) > 5 else 'Active'
@@ -298,7 +3315,7 @@ def login():
 @app.route('/admin_dashboard')
 def admin_dashboard():
     if 'role' in session and session['role'] == 'Admin':
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         # Get all bookings
@@ -314,6 +3331,17 @@ def admin_dashboard():
         c.execute("SELECT id, title, genre, duration, rating, description, poster_url FROM movies")
         movies = c.fetchall()
 
+        # Get users with active sessions
+        c.execute("""
+            SELECT s.user_id, u.u_name, s.role, COUNT(*)
+            FROM user_sessions s
+            JOIN user_table u ON s.user_id = u.u_id
+            WHERE s.expires_at > ?
+            GROUP BY s.user_id
+            ORDER BY u.u_name
+        """, (time.time(),))
+        active_sessions = c.fetchall()
+
         conn.close()
 
         # Convert tuples to dictionaries for easier template access
@@ -341,20 +3369,107 @@ def admin_dashboard():
                 'poster_url': movie[6] if movie[6] else ''
             })
 
-        return render_template('adminindex.html', bookings=booking_list, movies=movie_list)
+        session_list = []
+        for active in active_sessions:
+            session_list.append({
+                'user_id': active[0],
+                'user_name': active[1],
+                'role': active[2],
+                'count': active[3]
+            })
+
+        return render_template('adminindex.html', bookings=booking_list, movies=movie_list,
+                               active_sessions=session_list,
+                               slow_queries=list(reversed(slow_query_buffer)),
+                               slow_query_threshold=app.config['SLOW_QUERY_THRESHOLD_MS'],
+                               seat_drift=list(reversed(seat_drift_log)),
+                               seat_drift_stats=dict(seat_drift_stats))
     else:
         return redirect(url_for('login'))
 
+# ---------------- REVOKE USER SESSIONS ----------------
+@app.route('/revoke_sessions/<int:user_id>', methods=['POST'])
+def revoke_sessions(user_id):
+    if 'role' in session and session['role'] == 'Admin':
+        revoked = session_store.revoke_user(user_id)
+        print(f"🔒 Revoked {revoked} session(s) for user {user_id}")
+        return redirect(url_for('admin_dashboard'))
+    else:
+        return redirect(url_for('login'))
+
+# ---------------- CACHE STATS API ----------------
+@app.route('/cache_stats')
+def cache_stats():
+    if 'role' in session and session['role'] == 'Admin':
+        return jsonify({
+            'catalog_version': catalog_version,
+            'fragments': fragment_cache.stats(),
+            'compression': compression.stats(),
+            'wallets': dict(wallet_stats, entries=len(wallets))
+        })
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- SEAT COUNT DRIFT ----------------
+@app.route('/seat_drift', methods=['GET', 'POST'])
+def seat_drift():
+    """Drift metrics; POST runs a full audit now (repair=0 only reports)"""
+    if 'role' in session and session['role'] == 'Admin':
+        if request.method == 'POST':
+            try:
+                return jsonify(audit_seat_counts(repair=request.form.get('repair', '1') == '1'))
+            except sqlite3.Error as e:
+                print(f"Error auditing seat counts: {e}")
+                return jsonify({'error': f"Error auditing seat counts: {str(e)}"}), 500
+
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("SELECT COUNT(*) FROM dirty_schedules")
+        pending = c.fetchone()[0]
+        conn.close()
+        with seat_drift_lock:
+            return jsonify({
+                'stats': dict(seat_drift_stats),
+                'dirty_schedules': pending,
+                'recent': list(reversed(seat_drift_log))
+            })
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- SLOW QUERIES API ----------------
+@app.route('/slow_queries')
+def slow_queries():
+    if 'role' in session and session['role'] == 'Admin':
+        return jsonify({
+            'threshold_ms': app.config['SLOW_QUERY_THRESHOLD_MS'],
+            'queries': list(reversed(slow_query_buffer))
+        })
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
 # ---------------- UPDATE BOOKING STATUS ----------------
 @app.route('/update_booking/<int:booking_id>', methods=['POST'])
 def update_booking(booking_id):
     if 'role' in session and session['role'] == 'Admin':
         new_status = request.form['status']
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
         c.execute("UPDATE tbl_booking SET status = ? WHERE b_id = ?", (new_status, booking_id))
+        updated = c.rowcount
+        if updated:
+            c.execute('''SELECT ms.id FROM tbl_booking b
+                         JOIN movie_schedules ms
+                           ON ms.movie_title = b.movie_name AND ms.show_date = b.show_date AND ms.showtime = b.showtime
+                         WHERE b.b_id = ?''', (booking_id,))
+            schedule = c.fetchone()
+            record_event(c, 'status', schedule[0] if schedule else None, booking_id, status=new_status)
+            c.execute("SELECT u_id FROM tbl_booking WHERE b_id = ?", (booking_id,))
+            owner = c.fetchone()[0]
         conn.commit()
         conn.close()
+        invalidate_ticket_pdfs(booking_id)
+        if updated:
+            invalidate_wallet(owner)
         return redirect(url_for('admin_dashboard'))
     else:
         return redirect(url_for('login'))
@@ -370,7 +3485,7 @@ def add_movie():
         description = request.form['description']
         poster_url = request.form.get('poster_url', '')
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         # Check if movie already exists
@@ -384,11 +3499,13 @@ def add_movie():
         else:
             # Add new movie
             c.execute('''INSERT INTO movies 
-                        (title, genre, duration, rating, description, poster_url) 
-                        VALUES (?, ?, ?, ?, ?, ?)''',
-                      (title, genre, duration, rating, description, poster_url))
+                        (title, genre, duration, rating, description, poster_url, duration_minutes) 
+                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                      (title, genre, duration, rating, description, poster_url, parse_duration(duration)))
             conn.commit()
             conn.close()
+            bump_catalog_version()
+            schedule_poster_variants(poster_url)
             return redirect(url_for('admin_dashboard'))
     else:
         return redirect(url_for('login'))
@@ -405,7 +3522,7 @@ def edit_movie():
         description = request.form['description']
         poster_url = request.form.get('poster_url', '')
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         # Check if movie already exists (excluding current movie)
@@ -420,11 +3537,15 @@ def edit_movie():
             # Update the movie
             c.execute('''UPDATE movies SET 
                         title = ?, genre = ?, duration = ?, rating = ?, 
-                        description = ?, poster_url = ?
+                        description = ?, poster_url = ?, duration_minutes = ?
                         WHERE id = ?''',
-                      (title, genre, duration, rating, description, poster_url, movie_id))
+                      (title, genre, duration, rating, description, poster_url, parse_duration(duration), movie_id))
             conn.commit()
             conn.close()
+            bump_catalog_version()
+            schedule_poster_variants(poster_url)
+            # A new running time moves the end of every show of this movie
+            hall_schedules_changed()
             return redirect(url_for('admin_dashboard'))
     else:
         return redirect(url_for('login'))
@@ -433,11 +3554,12 @@ def edit_movie():
 @app.route('/delete_movie/<int:movie_id>', methods=['POST'])
 def delete_movie(movie_id):
     if 'role' in session and session['role'] == 'Admin':
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
         c.execute("DELETE FROM movies WHERE id = ?", (movie_id,))
         conn.commit()
         conn.close()
+        bump_catalog_version()
         return redirect(url_for('admin_dashboard'))
     else:
         return redirect(url_for('login'))
@@ -445,52 +3567,78 @@ def delete_movie(movie_id):
 # ---------------- ADD SCHEDULE ----------------
 @app.route('/add_schedule', methods=['POST'])
 def add_schedule():
+    global hall_schedules_version
     if 'role' in session and session['role'] == 'Admin':
         movie_id = request.form['movie_id']
         show_date = request.form['show_date']
         showtime = request.form['showtime']
         total_seats = request.form.get('total_seats', 40)
+        try:
+            hall = int(request.form.get('hall') or 1)
+        except ValueError:
+            return "Hall must be a number", 400
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         try:
             # Get movie title
-            c.execute("SELECT title FROM movies WHERE id = ?", (movie_id,))
+            c.execute("SELECT title, duration_minutes FROM movies WHERE id = ?", (movie_id,))
             movie = c.fetchone()
             if not movie:
                 return "Movie not found", 404
             movie_title = movie[0]
 
-            # Check if schedule already exists
-            c.execute("SELECT id FROM movie_schedules WHERE movie_id = ? AND show_date = ? AND showtime = ?",
-                      (movie_id, show_date, showtime))
-            existing_schedule = c.fetchone()
+            # Store the same canonical date and time as import_schedules, so the
+            # UNIQUE constraint and title/date/time joins see one spelling
+            try:
+                show_date = datetime.date.fromisoformat(show_date.strip()).isoformat()
+                showtime = normalize_showtime(showtime)
+                start, end = schedule_interval(show_date, showtime, movie[1])
+            except ValueError as e:
+                return str(e), 400
+
+            # Check if schedule already exists, however its time was spelled
+            c.execute("SELECT showtime FROM movie_schedules WHERE movie_id = ? AND show_date = ?",
+                      (movie_id, show_date))
+            for (existing_showtime,) in c.fetchall():
+                try:
+                    existing_showtime = normalize_showtime(existing_showtime)
+                except ValueError:
+                    pass
+                if existing_showtime == showtime:
+                    return "Schedule already exists", 400
+
+            # Hold the index lock and the database write lock until the new show
+            # is in both, so no admin on any worker can take the same slot
+            with hall_schedules_lock:
+                c.execute("BEGIN IMMEDIATE")
+                sync_hall_schedules(c)
+                clashes = hall_schedules.conflicts(hall, start, end, app.config['SCHEDULE_TURNAROUND_MINUTES'])
+                if clashes:
+                    conn.rollback()
+                    return f"Hall {hall} is busy with {describe_conflict(c, clashes[0])}", 400
 
-            if existing_schedule:
-                return "Schedule already exists", 400
-            else:
                 # Add new schedule
                 c.execute('''INSERT INTO movie_schedules 
-                            (movie_id, movie_title, show_date, showtime, total_seats, available_seats) 
-                            VALUES (?, ?, ?, ?, ?, ?)''',
-                          (movie_id, movie_title, show_date, showtime, total_seats, total_seats))
+                            (movie_id, movie_title, show_date, showtime, total_seats, available_seats, hall) 
+                            VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                          (movie_id, movie_title, show_date, showtime, total_seats, total_seats, hall))
 
                 # Get the new schedule ID
                 schedule_id = c.lastrowid
 
                 # Initialize seat availability for this schedule
-                rows = ["A", "B", "C", "D", "E"]
-                seats_per_row = 8
-                all_seats = [f"{row}{i}" for row in rows for i in range(1, seats_per_row + 1)]
-
-                for seat in all_seats:
+                for seat in DEFAULT_SEATS:
                     c.execute('''INSERT OR IGNORE INTO seat_availability 
                                 (schedule_id, movie_title, show_date, showtime, seat_number, is_available) 
                                 VALUES (?, ?, ?, ?, ?, ?)''',
                               (schedule_id, movie_title, show_date, showtime, seat, 1))
 
+                version = record_hall_schedules_change(c)
                 conn.commit()
+                hall_schedules.add(hall, start, end, schedule_id)
+                hall_schedules_version = version
                 return "Schedule added successfully", 200
         except Exception as e:
             conn.rollback()
@@ -501,13 +3649,129 @@ def add_schedule():
     else:
         return "Unauthorized", 401
 
+# ---------------- IMPORT SCHEDULES ----------------
+@app.route('/import_schedules', methods=['POST'])
+def import_schedules():
+    """Bulk-add schedules from an uploaded CSV/JSON file, a JSON list or a recurrence rule.
+
+    JSON bodies look like {"schedules": [{movie_id, show_date, showtime, total_seats}, ...]}
+    (or just the list) or {"movie_id": 3, "rule": "daily 13:00/16:00/19:30 for 4 weeks",
+    "start_date": "2026-11-01"}. Pass "dry_run": true (or ?dry_run=1) to validate without saving.
+    """
+    global hall_schedules, hall_schedules_version
+    if 'role' in session and session['role'] == 'Admin':
+        data = request.get_json(silent=True) or request.form
+        if isinstance(data, list):
+            data = {'schedules': data}
+        elif not isinstance(data, dict) and data is not request.form:
+            return jsonify({'error': 'Expected a JSON object or a list of schedules'}), 400
+        dry_run = str(data.get('dry_run', request.args.get('dry_run', ''))).lower() in ('1', 'true', 'yes')
+
+        try:
+            if 'file' in request.files:
+                rows = read_schedule_upload(request.files['file'])
+            elif data.get('rule'):
+                start_date = data.get('start_date') or datetime.date.today().isoformat()
+                rows = [{'movie_id': data.get('movie_id'), 'movie_title': data.get('movie_title'),
+                         'show_date': show_date, 'showtime': showtime, 'total_seats': data.get('total_seats'),
+                         'hall': data.get('hall')}
+                        for show_date, showtime in expand_recurrence(data['rule'], start_date)]
+            else:
+                rows = data.get('schedules') or []
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return jsonify({'error': str(e)}), 400
+
+        if not rows:
+            return jsonify({'error': 'No schedules to import'}), 400
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return jsonify({'error': 'Schedules must be a list of objects'}), 400
+        if len(rows) > app.config['SCHEDULE_IMPORT_MAX_ROWS']:
+            return jsonify({'error': f"At most {app.config['SCHEDULE_IMPORT_MAX_ROWS']} schedules per import"}), 400
+
+        started = time.perf_counter()
+        conn = get_db_connection()
+        c = conn.cursor()
+        try:
+            # Like add_schedule, hold the index lock and the database write lock
+            # from the overlap check until the new shows are in both
+            with hall_schedules_lock:
+                c.execute("BEGIN IMMEDIATE")
+                schedules, errors = validate_schedule_rows(c, rows)
+                if errors:
+                    conn.rollback()
+                    return jsonify({'error': 'Import rejected', 'errors': errors[:100],
+                                    'error_count': len(errors)}), 400
+                if dry_run:
+                    conn.rollback()
+                    return jsonify({'dry_run': True, 'schedules': len(schedules)})
+
+                seat_count = insert_schedules(c, schedules)
+                version = record_hall_schedules_change(c)
+                index = build_hall_schedule_index(c)
+                conn.commit()
+                hall_schedules, hall_schedules_version = index, version
+        except Exception as e:
+            conn.rollback()
+            print(f"Error importing schedules: {e}")
+            return jsonify({'error': f"Error importing schedules: {str(e)}"}), 500
+        finally:
+            conn.close()
+
+        elapsed = time.perf_counter() - started
+        return jsonify({
+            'schedules': len(schedules),
+            'seats': seat_count,
+            'elapsed_ms': round(elapsed * 1000, 1),
+            'rows_per_second': round((len(schedules) + seat_count) / elapsed) if elapsed else None
+        })
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- ARCHIVE FINISHED SHOWS ----------------
+@app.route('/run_archive', methods=['POST'])
+def run_archive_now():
+    if 'role' in session and session['role'] == 'Admin':
+        try:
+            return jsonify(run_archive())
+        except Exception as e:
+            print(f"Error archiving finished shows: {e}")
+            return jsonify({'error': f"Error archiving finished shows: {str(e)}"}), 500
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- BACKUPS ----------------
+@app.route('/backups', methods=['GET', 'POST'])
+def backups():
+    """Backup status; POST schedules a base backup on the backup thread"""
+    if 'role' in session and session['role'] == 'Admin':
+        if request.method == 'POST':
+            if backup_state['standby']:
+                return jsonify({'error': 'Backups are run by another worker process'}), 409
+            backup_requested.set()
+            return jsonify({'message': 'Base backup scheduled'}), 202
+
+        shipper = backup_state['shipper']
+        return jsonify({
+            'bases': [{key: base[key] for key in ('path', 'created_at', 'generation', 'frames', 'bytes')}
+                      for base in list_bases(app.config['BACKUP_DIR'])],
+            'wal_generation': shipper.generation['index'] if shipper and shipper.generation else None,
+            'wal_frames_shipped': shipper.generation['frames'] if shipper and shipper.generation else 0,
+            'shipping': dict(shipper.stats) if shipper else None,
+            'last_base': backup_state['last_base'],
+            'last_error': backup_state['last_error'],
+            'standby': backup_state['standby']
+        })
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
 # ---------------- DELETE SCHEDULE ----------------
 @app.route('/delete_schedule', methods=['POST'])
 def delete_schedule():
+    global hall_schedules_version
     if 'role' in session and session['role'] == 'Admin':
         schedule_id = request.form['schedule_id']
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         try:
@@ -515,7 +3779,13 @@ def delete_schedule():
             c.execute("DELETE FROM seat_availability WHERE schedule_id = ?", (schedule_id,))
             # Then delete the schedule
             c.execute("DELETE FROM movie_schedules WHERE id = ?", (schedule_id,))
+            version = record_hall_schedules_change(c)
             conn.commit()
+            with hall_schedules_lock:
+                # Only an index that was current can be patched; otherwise the next check rebuilds it
+                if hall_schedules_version == version - 1:
+                    hall_schedules.remove(int(schedule_id))
+                    hall_schedules_version = version
             return "Schedule deleted successfully", 200
         except Exception as e:
             conn.rollback()
@@ -531,7 +3801,7 @@ def delete_schedule():
 def get_schedules_for_booking():
     movie_title = request.args.get('movie_title')
 
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
 
     c.execute("""
@@ -560,11 +3830,11 @@ def get_schedules_for_booking():
 def get_movie_schedules():
     movie_id = request.args.get('movie_id')
 
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
 
     c.execute("""
-        SELECT id, show_date, showtime, total_seats, available_seats
+        SELECT id, show_date, showtime, total_seats, available_seats, hall
         FROM movie_schedules 
         WHERE movie_id = ? AND is_active = 1 
         ORDER BY show_date, showtime
@@ -580,7 +3850,8 @@ def get_movie_schedules():
             'show_date': schedule[1],
             'showtime': schedule[2],
             'total_seats': schedule[3],
-            'available_seats': schedule[4]
+            'available_seats': schedule[4],
+            'hall': schedule[5]
         })
 
     return jsonify(schedule_list)
@@ -590,7 +3861,7 @@ def get_movie_schedules():
 def get_movie_schedules_by_title():
     movie_title = request.args.get('title')
 
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
 
     c.execute("""
@@ -618,7 +3889,7 @@ def get_movie_schedules_by_title():
 def get_seat_configuration():
     schedule_id = request.args.get('schedule_id')
 
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
 
     # Get schedule details
@@ -659,7 +3930,7 @@ def update_seat_configuration():
         total_seats = int(request.form['total_seats'])
         available_seats = int(request.form['available_seats'])
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         try:
@@ -680,35 +3951,75 @@ def update_seat_configuration():
     else:
         return "Unauthorized", 401
 
+def parse_seat_layout(seat_layout):
+    """Seat numbers from a comma separated layout, in order; rejects blanks and duplicates"""
+    seats = [seat.strip() for seat in seat_layout.split(',')] if seat_layout.strip() else []
+    if any(not seat for seat in seats):
+        raise ValueError("Seat layout contains an empty seat number")
+    duplicates = sorted(seat for seat, count in Counter(seats).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Seat layout lists {', '.join(duplicates)} more than once")
+    return seats
+
+
 @app.route('/save_seat_configuration', methods=['POST'])
 def save_seat_configuration():
+    """Apply a new seat layout as a diff against the current seat map.
+
+    Only added seats are inserted and only removed seats are deleted, so
+    bookings on the rest are untouched. Removing a booked seat is refused.
+    total_seats and available_seats are recomputed from the resulting map.
+    """
     if 'role' in session and session['role'] == 'Admin':
         schedule_id = request.form['schedule_id']
-        total_seats = int(request.form['total_seats'])
-        available_seats = int(request.form['available_seats'])
-        seat_layout = request.form['seat_layout']
+        try:
+            seats = parse_seat_layout(request.form.get('seat_layout', ''))
+        except ValueError as e:
+            return str(e), 400
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         try:
-            c.execute('''UPDATE movie_schedules 
-                         SET total_seats = ?, available_seats = ? 
+            # Hold the write lock so no booking lands on a seat between the diff and the delete
+            c.execute("BEGIN IMMEDIATE")
+            c.execute("SELECT movie_title, show_date, showtime FROM movie_schedules WHERE id = ?", (schedule_id,))
+            schedule = c.fetchone()
+            if not schedule:
+                conn.rollback()
+                return "Schedule not found", 404
+            movie_title, show_date, showtime = schedule
+
+            c.execute("SELECT seat_number, is_available FROM seat_availability WHERE schedule_id = ?",
+                      (schedule_id,))
+            current = dict(c.fetchall())
+            wanted = set(seats)
+            added = [seat for seat in seats if seat not in current]
+            removed = sorted(set(current) - wanted)
+
+            booked = [seat for seat in removed if not current[seat]]
+            if booked:
+                conn.rollback()
+                return f"Cannot remove booked seats: {', '.join(booked)}", 409
+
+            c.executemany("DELETE FROM seat_availability WHERE schedule_id = ? AND seat_number = ?",
+                          [(schedule_id, seat) for seat in removed])
+            c.executemany('''INSERT INTO seat_availability
+                             (schedule_id, movie_title, show_date, showtime, seat_number, is_available)
+                             VALUES (?, ?, ?, ?, ?, 1)''',
+                          [(schedule_id, movie_title, show_date, showtime, seat) for seat in added])
+
+            available_seats = sum(1 for seat in wanted if current.get(seat, 1))
+            c.execute('''UPDATE movie_schedules
+                         SET total_seats = ?, available_seats = ?, layout_version = layout_version + ?
                          WHERE id = ?''',
-                      (total_seats, available_seats, schedule_id))
-
-            c.execute("DELETE FROM seat_availability WHERE schedule_id = ?", (schedule_id,))
-
-            if seat_layout:
-                seats = [seat.strip() for seat in seat_layout.split(',')]
-                for seat in seats:
-                    c.execute('''INSERT INTO seat_availability 
-                                (schedule_id, movie_title, show_date, showtime, seat_number, is_available) 
-                                VALUES (?, ?, ?, ?, ?, ?)''',
-                              (schedule_id, "Movie", "2024-01-01", "00:00", seat, 1))
+                      (len(wanted), available_seats, 1 if added or removed else 0, schedule_id))
 
             conn.commit()
-            return "Seat configuration saved successfully", 200
+            if added or removed:
+                forget_price_table(schedule_id)
+            return (f"Seat configuration saved successfully "
+                    f"({len(added)} added, {len(removed)} removed, {len(wanted)} seats)"), 200
         except Exception as e:
             conn.rollback()
             print(f"Error saving seat configuration: {e}")
@@ -721,44 +4032,28 @@ def save_seat_configuration():
 # ---------------- GET FEATURED MOVIES ----------------
 @app.route('/get_featured_movies')
 def get_featured_movies():
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    c.execute("SELECT id, title, genre, duration, rating, description, poster_url FROM movies WHERE is_active = 1")
-    movies = c.fetchall()
-    conn.close()
-
-    movie_list = []
-    for movie in movies:
-        movie_list.append({
-            'id': movie[0],
-            'title': movie[1],
-            'genre': movie[2],
-            'duration': movie[3],
-            'rating': movie[4],
-            'description': movie[5],
-            'poster_url': movie[6]
-        })
-
-    total_movies = len(movie_list)
-    if total_movies >= 20:
-        featured_count = 10
-    elif total_movies > 15:
-        featured_count = 7
-    elif total_movies > 10:
-        featured_count = 5
-    elif total_movies > 5:
-        featured_count = 3
-    else:
-        featured_count = total_movies
-
-    featured_movies = movie_list[:featured_count] if featured_count > 0 else []
+    # Customers get their precomputed co-booking picks; everyone else the default list
+    catalog = get_catalog_bootstrap()
+    user_id = session['user_id'] if session.get('role') == 'Customer' else None
+    featured_movies, personalized = personalized_featured(user_id)
 
     return jsonify({
         'featured_movies': featured_movies,
-        'total_movies': total_movies,
-        'featured_count': featured_count
+        'total_movies': catalog['total_movies'],
+        'featured_count': catalog['featured_count'],
+        'personalized': personalized
     })
 
+# ---------------- SIMILAR MOVIES ----------------
+@app.route('/get_similar_movies/<int:movie_id>')
+def get_similar_movies(movie_id):
+    """Movies most often booked by people who booked this one"""
+    movies_by_id = get_movies_by_id()
+    similar = [movies_by_id[neighbor_id]
+               for neighbor_id in stored_movie_ids('movie_neighbors', 'movie_id', 'neighbor_ids', movie_id)
+               if neighbor_id in movies_by_id]
+    return jsonify({'movie_id': movie_id, 'similar_movies': similar})
+
 # ---------------- SEARCH MOVIES ----------------
 @app.route('/search_movies')
 def search_movies():
@@ -766,7 +4061,7 @@ def search_movies():
     genre = request.args.get('genre', '')
     rating = request.args.get('rating', '')
 
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
 
     sql = "SELECT id, title, genre, duration, rating, description, poster_url FROM movies WHERE is_active = 1"
@@ -807,7 +4102,7 @@ def search_movies():
 # ---------------- GET ALL GENRES ----------------
 @app.route('/get_all_genres')
 def get_all_genres():
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute("SELECT DISTINCT genre FROM movies WHERE is_active = 1 AND genre IS NOT NULL AND genre != ''")
     genres = c.fetchall()
@@ -820,22 +4115,7 @@ def get_all_genres():
 @app.route('/customer')
 def customer_dashboard():
     if 'role' in session and session['role'] == 'Customer':
-        conn = sqlite3.connect('database.db')
-        c = conn.cursor()
-        c.execute("SELECT id, title, rating, poster_url FROM movies WHERE is_active = 1")
-        movies = c.fetchall()
-        conn.close()
-
-        movie_list = []
-        for movie in movies:
-            movie_list.append({
-                'id': movie[0],
-                'title': movie[1],
-                'rating': movie[2],
-                'poster_url': movie[3]
-            })
-
-        return render_template('index.html', movies=movie_list)
+        return render_template('index.html', bootstrap=build_bootstrap(session['user_id']))
     else:
         return redirect(url_for('login'))
 
@@ -843,32 +4123,14 @@ def customer_dashboard():
 @app.route('/movies')
 def movies():
     if 'role' in session:
-        conn = sqlite3.connect('database.db')
-        c = conn.cursor()
-        c.execute("SELECT id, title, genre, duration, rating, description, poster_url FROM movies WHERE is_active = 1")
-        movies_data = c.fetchall()
-        conn.close()
-
-        movie_list = []
-        for movie in movies_data:
-            movie_list.append({
-                'id': movie[0],
-                'title': movie[1],
-                'genre': movie[2],
-                'duration': movie[3],
-                'rating': movie[4],
-                'description': movie[5],
-                'poster_url': movie[6]
-            })
-
-        return render_template('movies.html', movies=movie_list)
+        return render_template('movies.html')
     else:
         return redirect(url_for('login'))
 
 # ---------------- GET MOVIES API ----------------
 @app.route('/get_movies')
 def get_movies():
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute("SELECT id, title, genre, duration, rating, description, poster_url FROM movies WHERE is_active = 1")
     movies = c.fetchall()
@@ -890,18 +4152,19 @@ def get_movies():
 
 # ---------------- BOOK TICKET ----------------
 @app.route('/book_ticket', methods=['GET', 'POST'])
+@idempotent
 def book_ticket():
     if 'role' in session and session['role'] == 'Customer':
         if request.method == 'POST':
             movie = request.form['movie']
             showtime = request.form['showtime']
             seats = request.form['seats']
-            fee = request.form.get('fee', 0)
+            promo_code = request.form.get('promo_code', '').strip()
             show_date = request.form.get('show_date', 'N/A')
 
-            booking_ref = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+            booking_ref = reference_generator.generate()
 
-            conn = sqlite3.connect('database.db')
+            conn = get_db_connection()
             c = conn.cursor()
 
             try:
@@ -912,13 +4175,40 @@ def book_ticket():
                     return "Schedule not found", 404
                 schedule_id = schedule_data[0]
 
-                c.execute(
-                    "INSERT INTO tbl_booking (u_id, movie_name, show_date, showtime, seat_no, booking_fee, payment_status, booking_reference) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                    (session['user_id'], movie, show_date, showtime, seats, fee, 'Paid', booking_ref))
+                # A seat listed twice is one seat: priced, counted and stored once
+                seat_list = list(dict.fromkeys(seat.strip() for seat in seats.split(',') if seat.strip()))
+                seats = ', '.join(seat_list)
+                # The amount charged always comes from the price table, never the form
+                try:
+                    quote = quote_seats(c, schedule_id, seat_list, promo_code)
+                except ValueError as e:
+                    conn.close()
+                    return str(e), 400
+                fee = quote['total']
+
+                if quote['promo_code']:
+                    c.execute('''UPDATE promo_codes SET uses = uses + 1
+                                WHERE code = ? AND (max_uses IS NULL OR uses < max_uses)''',
+                              (quote['promo_code'],))
+                    if c.rowcount == 0:
+                        conn.rollback()
+                        conn.close()
+                        return "Promo code is no longer available", 400
+
+                for attempt in range(3):
+                    try:
+                        c.execute(
+                            "INSERT INTO tbl_booking (u_id, movie_name, show_date, showtime, seat_no, booking_fee, payment_status, booking_reference) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (session['user_id'], movie, show_date, showtime, seats, fee, 'Paid', booking_ref))
+                        break
+                    except sqlite3.IntegrityError:
+                        # Only the unique reference index can reject this row
+                        if attempt == 2:
+                            raise
+                        booking_ref = reference_generator.generate()
 
                 booking_id = c.lastrowid
 
-                seat_list = [seat.strip() for seat in seats.split(',')]
                 num_seats_booked = len(seat_list)
 
                 c.execute('''UPDATE movie_schedules 
@@ -932,8 +4222,11 @@ def book_ticket():
                                 WHERE schedule_id = ? AND seat_number = ?''',
                               (booking_id, schedule_id, seat))
 
+                record_event(c, 'book', schedule_id, booking_id, seat_list,
+                             u_id=session['user_id'], fee=fee, reference=booking_ref)
                 conn.commit()
                 conn.close()
+                invalidate_wallet(session['user_id'])
 
                 return redirect(url_for('print_ticket', booking_id=booking_id))
             except Exception as e:
@@ -943,7 +4236,7 @@ def book_ticket():
 
         movie_title = request.args.get('movie', '')
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         movie_details = None
@@ -994,24 +4287,29 @@ def book_ticket():
 
 # ---------------- CANCEL TICKET WITH SEAT SELECTION ----------------
 @app.route('/cancel_ticket/<int:ticket_id>', methods=['POST'])
+@idempotent
 def cancel_ticket(ticket_id):
     if 'role' in session and session['role'] == 'Customer':
         seats_to_cancel = request.form.get('seats_to_cancel', '')
 
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
 
         try:
             # Get booking details including all seats
             c.execute("""
-                SELECT movie_name, show_date, showtime, seat_no 
+                SELECT movie_name, show_date, showtime, seat_no, booking_fee 
                 FROM tbl_booking 
                 WHERE b_id = ? AND u_id = ?
             """, (ticket_id, session['user_id']))
 
             ticket = c.fetchone()
             if ticket:
-                movie_name, show_date, showtime, all_seats = ticket
+                movie_name, show_date, showtime, all_seats, paid = ticket
+                c.execute("SELECT id FROM movie_schedules WHERE movie_title = ? AND show_date = ? AND showtime = ?",
+                          (movie_name, show_date, showtime))
+                schedule = c.fetchone()
+                schedule_id = schedule[0] if schedule else None
 
                 if seats_to_cancel:
                     # Partial cancellation - cancel only selected seats
@@ -1022,11 +4320,14 @@ def cancel_ticket(ticket_id):
                     if remaining_seats_list:
                         # Update the booking with remaining seats
                         remaining_seats = ', '.join(remaining_seats_list)
+                        new_fee = remaining_fee(c, schedule_id, paid,
+                                                [seat.strip() for seat in all_seats.split(',')],
+                                                remaining_seats_list)
                         c.execute("""
                             UPDATE tbl_booking 
                             SET seat_no = ?, booking_fee = ? 
                             WHERE b_id = ? AND u_id = ?
-                        """, (remaining_seats, len(remaining_seats_list) * 125, ticket_id, session['user_id']))
+                        """, (remaining_seats, new_fee, ticket_id, session['user_id']))
                     else:
                         # All seats cancelled - delete the booking
                         c.execute("DELETE FROM tbl_booking WHERE b_id = ? AND u_id = ?",
@@ -1045,8 +4346,16 @@ def cancel_ticket(ticket_id):
                                 WHERE movie_title = ? AND show_date = ? AND showtime = ?''',
                               (len(seats_to_cancel_list), movie_name, show_date, showtime))
 
+                    if remaining_seats_list:
+                        record_event(c, 'partial_cancel', schedule_id, ticket_id, seats_to_cancel_list,
+                                     u_id=session['user_id'], fee=new_fee)
+                    else:
+                        record_event(c, 'cancel', schedule_id, ticket_id, seats_to_cancel_list,
+                                     u_id=session['user_id'])
                     conn.commit()
                     conn.close()
+                    invalidate_ticket_pdfs(ticket_id)
+                    invalidate_wallet(session['user_id'])
 
                     if remaining_seats_list:
                         return redirect(url_for('viewtickets'))
@@ -1078,8 +4387,11 @@ def cancel_ticket(ticket_id):
                     c.execute("DELETE FROM tbl_booking WHERE b_id = ? AND u_id = ?",
                               (ticket_id, session['user_id']))
 
+                    record_event(c, 'cancel', schedule_id, ticket_id, seat_list, u_id=session['user_id'])
                     conn.commit()
                     conn.close()
+                    invalidate_ticket_pdfs(ticket_id)
+                    invalidate_wallet(session['user_id'])
 
                     return redirect(url_for('cancel_success',
                                             movie=movie_name,
@@ -1096,13 +4408,21 @@ def cancel_ticket(ticket_id):
     else:
         return redirect(url_for('login'))
 
+# ---------------- TICKET WALLET API ----------------
+@app.route('/ticket_wallet')
+def ticket_wallet():
+    if 'role' in session and session['role'] == 'Customer':
+        return jsonify(get_ticket_wallet(session['user_id']))
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
 # ---------------- GET USER TICKET COUNT ----------------
 @app.route('/viewtickets_data')
 def viewtickets_data():
     if 'role' in session and session['role'] == 'Customer':
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM tbl_booking WHERE u_id = ?", (session['user_id'],))
+        c.execute("SELECT COUNT(*) FROM booking_history WHERE u_id = ?", (session['user_id'],))
         ticket_count = c.fetchone()[0]
         conn.close()
         return jsonify({'ticket_count': ticket_count})
@@ -1110,25 +4430,24 @@ def viewtickets_data():
         return jsonify({'ticket_count': 0})
 
 
+# ---------------- BOOTSTRAP API ----------------
+@app.route('/bootstrap')
+def bootstrap():
+    if 'role' in session and session['role'] == 'Customer':
+        return jsonify(build_bootstrap(session['user_id']))
+    else:
+        return jsonify(build_bootstrap(None))
+
+
 # ---------------- GET MOVIES COUNT ----------------
 @app.route('/get_movies_count')
 def get_movies_count():
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
 
     c.execute("SELECT COUNT(*) FROM movies WHERE is_active = 1")
     total_movies = c.fetchone()[0]
-
-    if total_movies >= 20:
-        featured_count = 10
-    elif total_movies > 15:
-        featured_count = 7
-    elif total_movies > 10:
-        featured_count = 5
-    elif total_movies > 5:
-        featured_count = 3
-    else:
-        featured_count = total_movies
+    featured_count = get_featured_count(total_movies)
 
     conn.close()
     return jsonify({'total_movies': total_movies, 'featured_count': featured_count})
@@ -1147,7 +4466,7 @@ def cancel_success():
 def get_available_seats():
     schedule_id = request.args.get('schedule_id')
 
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     c = conn.cursor()
 
     c.execute('''SELECT seat_number FROM seat_availability 
@@ -1159,15 +4478,221 @@ def get_available_seats():
 
     return {'available_seats': available_seats}
 
+@app.route('/seat_map')
+def seat_map():
+    """Compact seat availability for a schedule.
+
+    Pass back the layout id and version from the last response. The layout
+    is only included when the client's id is stale. With a current
+    layout and since=<version>, the response lists only the layout indices
+    booked or freed since then. Otherwise 'available' is a base64 bitmap
+    over the layout.
+    """
+    schedule_id = request.args.get('schedule_id', type=int)
+    since = request.args.get('since', type=int)
+
+    conn = get_db_connection()
+    c = conn.cursor()
+    try:
+        # One read snapshot, so the version matches the seats sent with it
+        c.execute("BEGIN")
+        c.execute("SELECT layout_version FROM movie_schedules WHERE id = ?", (schedule_id,))
+        schedule = c.fetchone()
+        layout = get_seat_layout(c, schedule_id, schedule[0]) if schedule else None
+        if layout is None:
+            return jsonify({'error': 'Schedule has no seat map'}), 404
+        c.execute("SELECT COALESCE(MAX(seq), 0) FROM booking_events WHERE schedule_id = ?", (schedule_id,))
+        version = c.fetchone()[0]
+
+        result = {'schedule_id': schedule_id, 'version': version}
+        stale = False
+        if request.args.get('layout') == layout['id'] and since is not None and since <= version:
+            c.execute("SELECT seats FROM booking_events WHERE schedule_id = ? AND seq > ?", (schedule_id, since))
+            touched = {seat for (seats,) in c.fetchall() if seats for seat in seats.split(',')}
+            stale = not touched <= layout['index'].keys()
+            # Past a point the bitmap is smaller than the list of indices
+            if not stale and len(touched) <= max(8, len(layout['seats']) // 8):
+                changes = []
+                if touched:
+                    c.execute(f'''SELECT seat_number, is_available FROM seat_availability
+                                  WHERE schedule_id = ? AND seat_number IN ({','.join('?' * len(touched))})''',
+                              (schedule_id, *touched))
+                    changes = c.fetchall()
+                result['layout_id'] = layout['id']
+                result['booked'] = sorted(layout['index'][seat] for seat, available in changes if not available)
+                result['freed'] = sorted(layout['index'][seat] for seat, available in changes if available)
+                return jsonify(result)
+
+        c.execute("SELECT seat_number FROM seat_availability WHERE schedule_id = ? AND is_available = 1",
+                  (schedule_id,))
+        available = [row[0] for row in c.fetchall()]
+        if stale or not set(available) <= layout['index'].keys():
+            # Seats changed without a layout_version bump (e.g. by hand); rebuild from this snapshot
+            layout = get_seat_layout(c, schedule_id, schedule[0], refresh=True)
+        result['layout_id'] = layout['id']
+        if request.args.get('layout') != layout['id']:
+            result['layout'] = layout['rows']
+        result['available'] = encode_seat_bitmap(len(layout['seats']),
+                                                 (layout['index'][seat] for seat in available))
+        return jsonify(result)
+    finally:
+        conn.close()
+
+# ---------------- SEAT PRICES ----------------
+@app.route('/get_seat_prices')
+def get_seat_prices():
+    schedule_id = request.args.get('schedule_id', type=int)
+    if schedule_id is None:
+        return jsonify({'error': 'Invalid schedule_id'}), 400
+    conn = get_db_connection()
+    table = get_price_table(conn.cursor(), schedule_id)
+    conn.close()
+    if table is None:
+        return jsonify({'error': 'Schedule not found'}), 404
+    return jsonify({'prices': table})
+
+
+@app.route('/quote')
+def quote():
+    """Price a basket: /quote?schedule_id=1&seats=A1,A2&promo_code=SAVE10"""
+    seats = list(dict.fromkeys(seat.strip() for seat in request.args.get('seats', '').split(',') if seat.strip()))
+    schedule_id = request.args.get('schedule_id', type=int)
+    if schedule_id is None:
+        return jsonify({'error': 'Invalid schedule_id'}), 400
+    conn = get_db_connection()
+    try:
+        return jsonify(quote_seats(conn.cursor(), schedule_id, seats, request.args.get('promo_code')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        conn.close()
+
+
+@app.route('/set_seat_classes', methods=['POST'])
+def set_seat_classes():
+    """Body: {"hall": 1, "classes": {"A": "Standard", "E": "VIP"}}; rows set to null go back to Standard"""
+    if 'role' in session and session['role'] == 'Admin':
+        data = request.get_json(silent=True) or {}
+        try:
+            hall = int(data.get('hall') or 1)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid hall'}), 400
+        classes = data.get('classes') or {}
+        unknown = sorted({name for name in classes.values() if name and name not in SEAT_CLASS_PRICES})
+        if unknown:
+            return jsonify({'error': f"Unknown seat class(es): {', '.join(unknown)}"}), 400
+
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.executemany("DELETE FROM hall_seat_classes WHERE hall = ? AND row_label = ?",
+                      [(hall, row) for row, name in classes.items() if not name])
+        c.executemany("INSERT OR REPLACE INTO hall_seat_classes (hall, row_label, seat_class) VALUES (?, ?, ?)",
+                      [(hall, row.upper(), name) for row, name in classes.items() if name])
+        conn.commit()
+        conn.close()
+        bump_pricing_version()
+        return jsonify({'success': True})
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+
+@app.route('/add_promo_code', methods=['POST'])
+def add_promo_code():
+    if 'role' in session and session['role'] == 'Admin':
+        data = request.get_json(silent=True) or request.form
+        code = (data.get('code') or '').strip().upper()
+        try:
+            percent_off = float(data.get('percent_off') or 0)
+            amount_off = float(data.get('amount_off') or 0)
+            max_uses = int(data['max_uses']) if data.get('max_uses') else None
+        except ValueError:
+            return jsonify({'error': 'Invalid discount or usage limit'}), 400
+        if not code or not (0 < percent_off <= 100 or amount_off > 0):
+            return jsonify({'error': 'A code and a discount are required'}), 400
+
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute('''INSERT OR REPLACE INTO promo_codes
+                     (code, percent_off, amount_off, valid_from, valid_until, max_uses, uses, is_active)
+                     VALUES (?, ?, ?, ?, ?, ?, COALESCE((SELECT uses FROM promo_codes WHERE code = ?), 0), 1)''',
+                  (code, percent_off, amount_off, data.get('valid_from') or None,
+                   data.get('valid_until') or None, max_uses, code))
+        conn.commit()
+        conn.close()
+        return jsonify({'success': True, 'code': code})
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- WAITING ROOM ----------------
+def safe_next_url():
+    next_url = request.args.get('next', '')
+    return next_url if next_url.startswith('/') and not next_url.startswith('//') else url_for('movies')
+
+
+@app.route('/waiting_room')
+def waiting_room_page():
+    if has_admission_pass():
+        return redirect(safe_next_url())
+    status = waiting_status(queue_number())
+    if status['admitted']:
+        return redirect(safe_next_url())
+    return render_template('waiting_room.html', status=status, next_url=safe_next_url())
+
+
+@app.route('/waiting_room/status')
+def waiting_room_status():
+    """Polled by people waiting; sets the admission pass cookie once it's their turn"""
+    if has_admission_pass():
+        return jsonify({'admitted': True, 'position': 0, 'eta_seconds': 0})
+    return jsonify(waiting_status(queue_number()))
+
+
+@app.route('/waiting_room/events')
+def waiting_room_events():
+    """Server-sent events version of /waiting_room/status; closes once admitted"""
+    number = queue_number()
+
+    def stream():
+        while True:
+            position = waiting_room.position(number)
+            rate = waiting_room.state()['rate'] or 1
+            yield f"data: {json.dumps({'admitted': position == 0, 'position': position, 'eta_seconds': round(position / rate)})}\n\n"
+            if position == 0:
+                return
+            time.sleep(2)
+
+    # The pass itself is handed out by /waiting_room/status once the stream reports admitted
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@app.route('/admission_control', methods=['GET', 'POST'])
+def admission_control_settings():
+    """View or live-tune the waiting room: POST {"rate": 20, "burst": 100, "enabled": true}"""
+    if 'role' in session and session['role'] == 'Admin':
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or request.form
+            try:
+                rate = float(data['rate']) if data.get('rate') not in (None, '') else None
+                burst = int(data['burst']) if data.get('burst') not in (None, '') else None
+            except ValueError:
+                return jsonify({'error': 'rate and burst must be numbers'}), 400
+            if (rate is not None and rate <= 0) or (burst is not None and burst < 0):
+                return jsonify({'error': 'rate must be positive and burst non-negative'}), 400
+            enabled = str(data['enabled']).lower() in ('1', 'true', 'yes') if 'enabled' in data else None
+            waiting_room.configure(rate, burst, enabled)
+        return jsonify(waiting_room.stats())
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
 # ---------------- PRINT TICKET ----------------
 @app.route('/print_ticket/<int:booking_id>')
 def print_ticket(booking_id):
     if 'user_id' in session:
-        conn = sqlite3.connect('database.db')
+        conn = get_db_connection()
         c = conn.cursor()
         c.execute("""
             SELECT b.*, u.u_name, u.u_email 
-            FROM tbl_booking b 
+            FROM booking_history b 
             JOIN user_table u ON b.u_id = u.u_id 
             WHERE b.b_id = ? AND b.u_id = ?
         """, (booking_id, session['user_id']))
@@ -1175,24 +4700,266 @@ def print_ticket(booking_id):
         conn.close()
 
         if booking:
-            booking_data = {
-                'id': booking[0],
-                'movie': booking[2],
-                'date': booking[3],
-                'time': booking[4],
-                'seats': booking[5],
-                'fee': booking[6],
-                'status': booking[7],
-                'booking_date': booking[8],
-                'payment_status': booking[9],
-                'reference': booking[10],
-                'user_name': booking[11],
-                'user_email': booking[12]
-            }
+            booking_data = booking_row_to_dict(booking)
             return render_template('print_ticket.html', booking=booking_data)
 
     return redirect(url_for('viewtickets'))
 
+# ---------------- BOOKING LOOKUP ----------------
+@app.route('/booking/<reference>')
+def booking_by_reference(reference):
+    """Look a booking up by reference through idx_booking_reference (or its archive index)"""
+    if 'user_id' in session:
+        reference = normalize_reference(reference)
+        if not reference:
+            return jsonify({'error': 'Invalid booking reference'}), 400
+
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("""
+            SELECT b.*, u.u_name, u.u_email
+            FROM booking_history b
+            JOIN user_table u ON b.u_id = u.u_id
+            WHERE b.booking_reference = ?
+        """, (reference,))
+        booking = c.fetchone()
+        conn.close()
+
+        # Customers only see their own bookings; anything else looks missing
+        if not booking or (session.get('role') != 'Admin' and booking[1] != session['user_id']):
+            return jsonify({'error': 'Booking not found'}), 404
+        return jsonify(booking_row_to_dict(booking))
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- TICKET PDF ----------------
+@app.route('/ticket_pdf/<int:booking_id>')
+def ticket_pdf(booking_id):
+    if 'user_id' in session:
+        conn = get_db_connection()
+        c = conn.cursor()
+        if session.get('role') == 'Admin':
+            c.execute("""
+                SELECT b.*, u.u_name, u.u_email
+                FROM booking_history b
+                JOIN user_table u ON b.u_id = u.u_id
+                WHERE b.b_id = ?
+            """, (booking_id,))
+        else:
+            c.execute("""
+                SELECT b.*, u.u_name, u.u_email
+                FROM booking_history b
+                JOIN user_table u ON b.u_id = u.u_id
+                WHERE b.b_id = ? AND b.u_id = ?
+            """, (booking_id, session['user_id']))
+        booking = c.fetchone()
+        conn.close()
+
+        if not booking:
+            return jsonify({'error': 'Booking not found'}), 404
+
+        booking_data = booking_row_to_dict(booking)
+        path = ticket_pdf_path(booking_data)
+        if os.path.exists(path):
+            return send_file(os.path.abspath(path), mimetype='application/pdf',
+                             download_name=f"ticket-{booking_data['reference'] or booking_id}.pdf")
+
+        try:
+            job = submit_ticket_job([booking_data], session['user_id'])
+        except TicketQueueFull:
+            return jsonify({'error': 'Ticket printing is busy, please try again shortly'}), 503, {'Retry-After': '5'}
+        return jsonify(ticket_job_response(job)), 202
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- RENDER ALL TICKETS FOR A SCHEDULE ----------------
+@app.route('/render_schedule_tickets/<int:schedule_id>', methods=['POST'])
+def render_schedule_tickets(schedule_id):
+    if 'role' in session and session['role'] == 'Admin':
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("SELECT movie_title, show_date, showtime FROM movie_schedules WHERE id = ?", (schedule_id,))
+        schedule = c.fetchone()
+        if not schedule:
+            conn.close()
+            return jsonify({'error': 'Schedule not found'}), 404
+
+        c.execute("""
+            SELECT b.*, u.u_name, u.u_email
+            FROM tbl_booking b
+            JOIN user_table u ON b.u_id = u.u_id
+            WHERE b.movie_name = ? AND b.show_date = ? AND b.showtime = ?
+            ORDER BY b.b_id
+        """, schedule)
+        bookings = [booking_row_to_dict(booking) for booking in c.fetchall()]
+        conn.close()
+
+        try:
+            job = submit_ticket_job(bookings, session['user_id'], schedule_id=schedule_id)
+        except TicketQueueFull:
+            return jsonify({'error': 'Ticket printing is busy, please try again shortly'}), 503, {'Retry-After': '5'}
+        return jsonify(ticket_job_response(job)), 202
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- TICKET JOB STATUS ----------------
+@app.route('/ticket_jobs/<job_id>')
+def ticket_job_status(job_id):
+    job = load_ticket_job(job_id)
+    if not job or 'user_id' not in session or (job['user_id'] != session['user_id'] and session.get('role') != 'Admin'):
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(ticket_job_response(job))
+
+
+@app.route('/ticket_jobs/<job_id>/download')
+def ticket_job_download(job_id):
+    job = load_ticket_job(job_id)
+    if not job or 'user_id' not in session or (job['user_id'] != session['user_id'] and session.get('role') != 'Admin'):
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'done':
+        return jsonify(ticket_job_response(job)), 409
+
+    # PDFs are already compressed, so the archive just stores them
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for path in job['files']:
+            if os.path.exists(path):
+                archive.write(path, os.path.basename(path))
+    buffer.seek(0)
+    name = f"schedule-{job['schedule_id']}-tickets.zip" if job['schedule_id'] else 'tickets.zip'
+    return send_file(buffer, mimetype='application/zip', as_attachment=True, download_name=name)
+
+# ---------------- CHECK-IN ----------------
+@app.route('/checkin', methods=['POST'])
+def checkin():
+    if 'role' in session and session['role'] in app.config['CHECKIN_ROLES']:
+        data = request.get_json(silent=True) or request.form
+        try:
+            schedule_id = int(data['schedule_id']) if data.get('schedule_id') else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid schedule_id'}), 400
+
+        conn = get_db_connection()
+        result = check_in(conn.cursor(), data.get('reference'), schedule_id=schedule_id, device=data.get('device'))
+        conn.commit()
+        conn.close()
+        remember_admitted([result])
+        status = 200 if result['result'] == 'admitted' else 409
+        if result['result'] == 'invalid':
+            status = 404
+        return jsonify(result), status
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+
+@app.route('/checkin_sync', methods=['POST'])
+def checkin_sync():
+    """Upload scans a handheld collected while offline; earliest upload wins duplicates"""
+    if 'role' in session and session['role'] in app.config['CHECKIN_ROLES']:
+        data = request.get_json(silent=True) or {}
+        device = data.get('device')
+        try:
+            scans = [(scan.get('reference'), int(scan['schedule_id']) if scan.get('schedule_id') else None,
+                      scan.get('scanned_at')) for scan in data.get('scans', [])]
+        except (AttributeError, TypeError, ValueError):
+            return jsonify({'error': 'Invalid scans'}), 400
+
+        conn = get_db_connection()
+        c = conn.cursor()
+        results = [check_in(c, reference, schedule_id=schedule_id, scanned_at=scanned_at, device=device)
+                   for reference, schedule_id, scanned_at in scans]
+        conn.commit()
+        conn.close()
+        remember_admitted(results)
+
+        summary = {}
+        for result in results:
+            summary[result['result']] = summary.get(result['result'], 0) + 1
+        return jsonify({'results': results, 'summary': summary})
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+
+@app.route('/get_checkins/<int:schedule_id>')
+def get_checkins(schedule_id):
+    """Admitted references for a schedule, so handhelds can reject duplicates offline"""
+    if 'role' in session and session['role'] in app.config['CHECKIN_ROLES']:
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("SELECT booking_reference, checked_in_at FROM checkins WHERE schedule_id = ?", (schedule_id,))
+        admitted = dict(c.fetchall())
+        conn.close()
+        return jsonify({'schedule_id': schedule_id, 'count': len(admitted), 'admitted': admitted})
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- BOOKING JOURNAL ----------------
+@app.route('/schedule_journal/<int:schedule_id>')
+def schedule_journal(schedule_id):
+    """Journal events for a schedule, its replayed seat map and how it compares to seat_availability"""
+    if 'role' in session and session['role'] == 'Admin':
+        since = request.args.get('since', 0, type=int)
+        limit = min(request.args.get('limit', 500, type=int), 5000)
+
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute('''SELECT seq, booking_id, kind, seats, detail, created_at FROM booking_events
+                     WHERE schedule_id = ? AND seq > ? ORDER BY seq LIMIT ?''', (schedule_id, since, limit))
+        events = [{
+            'seq': seq,
+            'booking_id': booking_id,
+            'kind': kind,
+            'seats': seats.split(',') if seats else [],
+            'detail': json.loads(detail) if detail else {},
+            'created_at': created_at
+        } for seq, booking_id, kind, seats, detail, created_at in c.fetchall()]
+
+        booked, last_seq = replay_seat_map(c, schedule_id)
+        c.execute("SELECT seat_number, booking_id FROM seat_availability WHERE schedule_id = ? AND is_available = 0",
+                  (schedule_id,))
+        current = dict(c.fetchall())
+        conn.close()
+
+        mismatched = sorted(seat for seat in set(booked) | set(current) if booked.get(seat) != current.get(seat))
+        return jsonify({
+            'schedule_id': schedule_id,
+            'events': events,
+            'last_seq': last_seq,
+            'booked_seats': booked,
+            'matches_seat_availability': not mismatched,
+            'mismatched_seats': mismatched
+        })
+    else:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+# ---------------- POSTER FILES ----------------
+@app.route('/posters/<path:filename>')
+def poster_file(filename):
+    # Filenames are content-hashed, so a given URL never changes
+    response = send_from_directory(POSTER_DIR, filename, max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+# ---------------- VERSIONED ASSETS ----------------
+@app.route('/assets/<path:filename>')
+def asset_file(filename):
+    asset = asset_files.get(filename)
+    if not asset:
+        abort(404)
+    mimetype, encodings, digest = asset
+
+    if request.if_none_match.contains(digest):
+        response = Response(status=304)
+    else:
+        encoding = choose_encoding(encodings)
+        response = Response(encodings[encoding], mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(digest)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 # ---------------- THANK YOU ----------------
 @app.route('/thankyou')
 def thankyou():
@@ -1202,17 +4969,8 @@ def thankyou():
 @app.route('/viewtickets')
 def viewtickets():
     if 'role' in session and session['role'] == 'Customer':
-        conn = sqlite3.connect('database.db')
-        c = conn.cursor()
-        c.execute("""
-            SELECT b_id, movie_name, show_date, showtime, seat_no, booking_fee, status 
-            FROM tbl_booking 
-            WHERE u_id = ? 
-            ORDER BY booking_date DESC
-        """, (session['user_id'],))
-        tickets = c.fetchall()
-        conn.close()
-        return render_template('viewtickets.html', tickets=tickets)
+        # Tickets are loaded by viewtickets.js from /ticket_wallet
+        return render_template('viewtickets.html')
     else:
         return redirect(url_for('login'))
 
@@ -0,0 +1,218 @@
+import argparse
+import json
+import sqlite3
+import time
+
+# Shows that have finished are moved out of movie_schedules, seat_availability,
+# tbl_booking and checkins into archive_* tables, so the hot tables and their
+# indexes only ever hold current programming. Seat maps are compacted on the
+# way: the 40 seat rows of a show become one archive_seat_maps row listing only
+# the booked seats. Work is done in small transactions so booking requests
+# never wait long for the write lock, and freed pages are returned with
+# incremental VACUUM afterwards.
+ARCHIVE_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS archive_movie_schedules (
+        id INTEGER PRIMARY KEY,
+        movie_id INTEGER NOT NULL,
+        movie_title TEXT NOT NULL,
+        show_date TEXT NOT NULL,
+        showtime TEXT NOT NULL,
+        total_seats INTEGER,
+        available_seats INTEGER,
+        is_active BOOLEAN,
+        created_at TIMESTAMP,
+        hall INTEGER,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS archive_seat_maps (
+        schedule_id INTEGER PRIMARY KEY,
+        seat_count INTEGER NOT NULL,
+        booked_seats TEXT NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS archive_bookings (
+        b_id INTEGER PRIMARY KEY,
+        u_id INTEGER NOT NULL,
+        movie_name TEXT NOT NULL,
+        show_date TEXT,
+        showtime TEXT NOT NULL,
+        seat_no TEXT NOT NULL,
+        booking_fee REAL,
+        status TEXT,
+        booking_date TIMESTAMP,
+        payment_status TEXT,
+        booking_reference TEXT,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''',
+    "CREATE INDEX IF NOT EXISTS idx_archive_bookings_user ON archive_bookings (u_id)",
+    # Ticket wallets look archived shows up by title, date and time like live ones
+    "CREATE INDEX IF NOT EXISTS idx_archive_schedules_show ON archive_movie_schedules (movie_title, show_date, showtime)",
+    "CREATE INDEX IF NOT EXISTS idx_archive_bookings_reference ON archive_bookings (booking_reference)",
+    '''CREATE TABLE IF NOT EXISTS archive_checkins (
+        booking_reference TEXT PRIMARY KEY,
+        booking_id INTEGER NOT NULL,
+        schedule_id INTEGER,
+        checked_in_at TEXT NOT NULL,
+        device TEXT
+    )''',
+    # Ticket history reads go through this view so archived tickets stay visible
+    '''CREATE VIEW IF NOT EXISTS booking_history AS
+        SELECT b_id, u_id, movie_name, show_date, showtime, seat_no, booking_fee, status,
+               booking_date, payment_status, booking_reference
+        FROM tbl_booking
+        UNION ALL
+        SELECT b_id, u_id, movie_name, show_date, showtime, seat_no, booking_fee, status,
+               booking_date, payment_status, booking_reference
+        FROM archive_bookings''',
+]
+
+SCHEDULE_COLUMNS = ('id, movie_id, movie_title, show_date, showtime, total_seats, available_seats, '
+                    'is_active, created_at, hall')
+BOOKING_COLUMNS = ('b_id, u_id, movie_name, show_date, showtime, seat_no, booking_fee, status, '
+                   'booking_date, payment_status, booking_reference')
+CHECKIN_COLUMNS = 'booking_reference, booking_id, schedule_id, checked_in_at, device'
+
+
+def ensure_archive_schema(conn):
+    c = conn.cursor()
+    for statement in ARCHIVE_SCHEMA:
+        c.execute(statement)
+    conn.commit()
+
+
+def archive_batch(conn, schedule_ids):
+    """Move one batch of finished schedules and everything hanging off them.
+
+    Rows are copied with INSERT OR IGNORE before they are deleted, so a batch
+    interrupted half-way is simply redone on the next run.
+    """
+    c = conn.cursor()
+    placeholders = ','.join('?' * len(schedule_ids))
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        c.execute(f'''INSERT OR IGNORE INTO archive_movie_schedules ({SCHEDULE_COLUMNS})
+                      SELECT {SCHEDULE_COLUMNS} FROM movie_schedules WHERE id IN ({placeholders})''',
+                  schedule_ids)
+
+        # Compact seat maps: keep only which seats were booked, and by whom
+        c.execute(f'''SELECT schedule_id, seat_number, is_available, booking_id
+                      FROM seat_availability WHERE schedule_id IN ({placeholders})''', schedule_ids)
+        seat_maps = {schedule_id: [0, {}] for schedule_id in schedule_ids}
+        seat_rows = 0
+        for schedule_id, seat_number, is_available, booking_id in c.fetchall():
+            seat_maps[schedule_id][0] += 1
+            if not is_available:
+                seat_maps[schedule_id][1][seat_number] = booking_id
+            seat_rows += 1
+        c.executemany("INSERT OR IGNORE INTO archive_seat_maps (schedule_id, seat_count, booked_seats) VALUES (?, ?, ?)",
+                      [(schedule_id, count, json.dumps(booked, sort_keys=True))
+                       for schedule_id, (count, booked) in seat_maps.items()])
+
+        # Bookings are tied to a show by title, date and showtime
+        c.execute(f'''SELECT b.b_id FROM tbl_booking b
+                      JOIN movie_schedules ms
+                        ON ms.movie_title = b.movie_name AND ms.show_date = b.show_date AND ms.showtime = b.showtime
+                      WHERE ms.id IN ({placeholders})''', schedule_ids)
+        booking_ids = [row[0] for row in c.fetchall()]
+        if booking_ids:
+            booking_placeholders = ','.join('?' * len(booking_ids))
+            c.execute(f'''INSERT OR IGNORE INTO archive_bookings ({BOOKING_COLUMNS})
+                          SELECT {BOOKING_COLUMNS} FROM tbl_booking WHERE b_id IN ({booking_placeholders})''',
+                      booking_ids)
+            c.execute(f"DELETE FROM tbl_booking WHERE b_id IN ({booking_placeholders})", booking_ids)
+
+        c.execute(f'''INSERT OR IGNORE INTO archive_checkins ({CHECKIN_COLUMNS})
+                      SELECT {CHECKIN_COLUMNS} FROM checkins WHERE schedule_id IN ({placeholders})''',
+                  schedule_ids)
+        c.execute(f"DELETE FROM checkins WHERE schedule_id IN ({placeholders})", schedule_ids)
+        c.execute(f"DELETE FROM seat_availability WHERE schedule_id IN ({placeholders})", schedule_ids)
+        c.execute(f"DELETE FROM movie_schedules WHERE id IN ({placeholders})", schedule_ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {'schedules': len(schedule_ids), 'seat_rows': seat_rows, 'bookings': len(booking_ids)}
+
+
+def incremental_vacuum(conn, pages_per_step=200, pause=0.05):
+    """Return free pages to the OS a few at a time; needs auto_vacuum=INCREMENTAL"""
+    c = conn.cursor()
+    c.execute("PRAGMA auto_vacuum")
+    if c.fetchone()[0] != 2:
+        return None
+
+    freed = 0
+    while True:
+        c.execute("PRAGMA freelist_count")
+        free_pages = c.fetchone()[0]
+        if not free_pages:
+            return freed
+        c.execute(f"PRAGMA incremental_vacuum({min(free_pages, pages_per_step)})")
+        c.fetchall()
+        conn.commit()
+        freed += min(free_pages, pages_per_step)
+        time.sleep(pause)
+
+
+def enable_incremental_vacuum(database):
+    """One-off switch to auto_vacuum=INCREMENTAL; rewrites the whole file with a full VACUUM"""
+    conn = sqlite3.connect(database)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def archive_finished_shows(database='database.db', keep_days=1, batch_size=50, pause=0.05):
+    """Archive every schedule whose show date is more than keep_days in the past.
+
+    Returns totals plus the ids that were archived so callers can drop any
+    in-memory state for them.
+    """
+    conn = sqlite3.connect(database, timeout=30)
+    ensure_archive_schema(conn)
+    c = conn.cursor()
+    c.execute("SELECT id FROM movie_schedules WHERE show_date < date('now', ?) ORDER BY show_date, id",
+              (f"-{keep_days} days",))
+    schedule_ids = [row[0] for row in c.fetchall()]
+
+    started = time.perf_counter()
+    totals = {'schedules': 0, 'seat_rows': 0, 'bookings': 0, 'batches': 0}
+    for start in range(0, len(schedule_ids), batch_size):
+        batch = archive_batch(conn, schedule_ids[start:start + batch_size])
+        for key, value in batch.items():
+            totals[key] += value
+        totals['batches'] += 1
+        # Let waiting writers in between batches
+        time.sleep(pause)
+
+    totals['freed_pages'] = incremental_vacuum(conn, pause=pause)
+    totals['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    totals['schedule_ids'] = schedule_ids
+    for table in ('movie_schedules', 'seat_availability', 'tbl_booking'):
+        c.execute(f"SELECT COUNT(*) FROM {table}")
+        totals[f'hot_{table}'] = c.fetchone()[0]
+    conn.close()
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Move finished shows into the archive tables")
+    parser.add_argument('--database', default='database.db')
+    parser.add_argument('--keep-days', type=int, default=1, help="archive shows older than this many days")
+    parser.add_argument('--batch-size', type=int, default=50, help="schedules per transaction")
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="switch the database to auto_vacuum=INCREMENTAL first (runs a full VACUUM once)")
+    args = parser.parse_args()
+
+    if args.enable_incremental_vacuum:
+        print("🧹 Enabling incremental vacuum (full VACUUM)...")
+        enable_incremental_vacuum(args.database)
+
+    result = archive_finished_shows(args.database, args.keep_days, args.batch_size)
+    print(f"📦 Archived {result['schedules']} schedules, {result['seat_rows']} seat rows and "
+          f"{result['bookings']} bookings in {result['batches']} batches ({result['elapsed_ms']} ms)")
+    if result['freed_pages'] is None:
+        print("ℹ️ auto_vacuum is not INCREMENTAL - run with --enable-incremental-vacuum to reclaim space")
+    else:
+        print(f"🧹 Freed {result['freed_pages']} pages")
+    print(f"🔥 Hot tables: {result['hot_movie_schedules']} schedules, {result['hot_seat_availability']} seats, "
+          f"{result['hot_tbl_booking']} bookings")
@@ -0,0 +1,482 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Backups are a full copy of the database (a "base") plus the WAL frames
+# committed after it. Bases are taken with SQLite's online backup API a few
+# pages per step from inside one read transaction, so in WAL mode the copy
+# is a consistent snapshot and writers are never blocked. The WalShipper
+# copies newly committed frames out of database.db-wal into numbered
+# generations under <backup dir>/wal while it holds the write lock, then
+# keeps a read transaction open at the end of what it shipped until the next
+# round. No checkpoint can backfill past an open reader, so the WAL can only
+# be reset once everything in it has been shipped. Restoring copies a base
+# and replays the shipped WAL up to a point in time.
+#
+# Only one shipper may write to a backup directory: two would each start
+# generations for the same WAL and split the chain between them. The first
+# one to take an exclusive lock on <backup dir>/shipper.lock wins; others
+# get ShipperBusy.
+#
+# <backup dir>/shipper.lock                   held by the running shipper
+# <backup dir>/bases/<timestamp>.db + .json   manifest: generation and frame the base was taken at
+# <backup dir>/wal/<generation>/header         the 32-byte WAL header of that generation
+# <backup dir>/wal/<generation>/meta.json      salt, page size, generation it continues (if any)
+# <backup dir>/wal/<generation>/<first>-<last>-<shipped at ms>.frames
+WAL_HEADER_SIZE = 32
+WAL_FRAME_HEADER_SIZE = 24
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_PAUSE = 0.005
+
+
+class LockBusy(RuntimeError):
+    """Another process holds the lock file"""
+
+
+class ShipperBusy(LockBusy):
+    """Another process is already shipping into this backup directory"""
+
+
+def lock_exclusive(path):
+    """Open path and take a non-blocking exclusive lock on it; the lock lasts until the file is closed"""
+    lock = open(path, 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock.close()
+        raise LockBusy(f"{path} is held by another process")
+    return lock
+
+
+def base_name(created_at):
+    return datetime.datetime.fromtimestamp(created_at).strftime('%Y%m%d-%H%M%S-%f')[:-3]
+
+
+def begin_snapshot(conn):
+    """Open a read transaction; in WAL mode it pins a snapshot without blocking writers"""
+    conn.execute("BEGIN")
+    conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+
+def online_backup(source, destination, pages=BACKUP_PAGES_PER_STEP, pause=BACKUP_STEP_PAUSE, progress=None):
+    """Copy an open database connection to destination a few pages at a time.
+
+    Outside WAL mode the source is left in autocommit so writers can get in
+    between steps; SQLite then restarts the copy if the source changes.
+    """
+    partial = destination + '.partial'
+    for path in (partial, partial + '-wal', partial + '-journal'):
+        if os.path.exists(path):
+            os.remove(path)
+
+    steps = 0
+
+    def step(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        if progress:
+            progress(total - remaining, total)
+        time.sleep(pause)
+
+    started = time.perf_counter()
+    target = sqlite3.connect(partial)
+    try:
+        source.backup(target, pages=pages, progress=step)
+        page_count = target.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        target.close()
+    os.replace(partial, destination)
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(destination)
+    return {
+        'path': destination,
+        'bytes': size,
+        'pages': page_count,
+        'steps': steps,
+        'seconds': round(elapsed, 3),
+        'mb_per_second': round(size / 1048576 / elapsed, 1) if elapsed else None
+    }
+
+
+def read_wal_header(wal_path):
+    """(header bytes, page size, salt) of a WAL file, or None when it is empty or missing"""
+    try:
+        with open(wal_path, 'rb') as wal:
+            header = wal.read(WAL_HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    if len(header) < WAL_HEADER_SIZE:
+        return None
+    return header, struct.unpack('>I', header[8:12])[0], header[16:24]
+
+
+def committed_frames(data, page_size, salt):
+    """Number of whole frames in data up to and including the last commit frame"""
+    frame_size = WAL_FRAME_HEADER_SIZE + page_size
+    committed = 0
+    for index in range(len(data) // frame_size):
+        frame_header = data[index * frame_size:index * frame_size + WAL_FRAME_HEADER_SIZE]
+        if frame_header[8:16] != salt:
+            break  # left over from an earlier generation
+        if struct.unpack('>I', frame_header[4:8])[0]:
+            committed = index + 1
+    return committed
+
+
+def generation_dirs(backup_dir):
+    """{index: path} of shipped WAL generations"""
+    dirs = {}
+    for path in glob.glob(os.path.join(backup_dir, 'wal', '[0-9]*')):
+        dirs[int(os.path.basename(path))] = path
+    return dirs
+
+
+def generation_chunks(path):
+    """[(first frame, last frame, shipped at ms, path)] of one generation, in frame order"""
+    chunks = []
+    for chunk in glob.glob(os.path.join(path, '*.frames')):
+        first, last, shipped_at = os.path.basename(chunk)[:-len('.frames')].split('-')
+        chunks.append((int(first), int(last), int(shipped_at), chunk))
+    return sorted(chunks)
+
+
+class WalShipper:
+    """Ships committed WAL frames of one database into <backup dir>/wal.
+
+    Raises ShipperBusy if another shipper holds the backup directory.
+    """
+
+    def __init__(self, database, backup_dir):
+        self.database = database
+        self.backup_dir = backup_dir
+        self.wal_path = database + '-wal'
+        os.makedirs(os.path.join(backup_dir, 'wal'), exist_ok=True)
+        os.makedirs(os.path.join(backup_dir, 'bases'), exist_ok=True)
+        try:
+            self.lock = lock_exclusive(os.path.join(backup_dir, 'shipper.lock'))
+        except LockBusy as e:
+            raise ShipperBusy(str(e)) from None
+        # Kept open for the shipper's lifetime, so the WAL is never deleted by the last connection closing.
+        # conn takes the write lock, pin holds the read transaction between rounds.
+        self.conn, self.pin, self.checkpointer = (
+            sqlite3.connect(database, timeout=30, isolation_level=None, check_same_thread=False)
+            for _ in range(3))
+        for conn in (self.conn, self.pin, self.checkpointer):
+            conn.execute("PRAGMA wal_autocheckpoint = 0")
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        self.generation = None  # {'index', 'salt', 'page_size', 'path', 'frames'}
+        self.needs_base = True  # a chain always starts from a base
+        self.stats = {'frames': 0, 'bytes': 0, 'chunks': 0, 'checkpoints': 0}
+
+    def next_index(self):
+        return max(generation_dirs(self.backup_dir), default=0) + 1
+
+    def start_generation(self, header, page_size, salt):
+        # The pin guarantees the previous generation was shipped in full before the WAL was reset
+        continues = self.generation['index'] if self.generation is not None else None
+        index = self.next_index()
+        path = os.path.join(self.backup_dir, 'wal', f"{index:06d}")
+        os.makedirs(path)
+        with open(os.path.join(path, 'header'), 'wb') as f:
+            f.write(header)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'index': index, 'salt': salt.hex(), 'page_size': page_size,
+                       'started_at': time.time(), 'continues': continues}, f)
+        self.generation = {'index': index, 'salt': salt, 'page_size': page_size, 'path': path, 'frames': 0}
+
+    def copy_new_frames(self):
+        """Archive frames committed since the last call. Caller holds the write lock."""
+        wal = read_wal_header(self.wal_path)
+        if wal is None:
+            return 0
+        header, page_size, salt = wal
+        if self.generation is None or self.generation['salt'] != salt:
+            self.start_generation(header, page_size, salt)
+
+        frame_size = WAL_FRAME_HEADER_SIZE + page_size
+        shipped = self.generation['frames']
+        with open(self.wal_path, 'rb') as f:
+            f.seek(WAL_HEADER_SIZE + shipped * frame_size)
+            data = f.read()
+        frames = committed_frames(data, page_size, salt)
+        if not frames:
+            return 0
+
+        shipped_at = int(time.time() * 1000)
+        name = f"{shipped + 1:08d}-{shipped + frames:08d}-{shipped_at}.frames"
+        partial = os.path.join(self.generation['path'], name + '.partial')
+        with open(partial, 'wb') as f:
+            f.write(data[:frames * frame_size])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, os.path.join(self.generation['path'], name))
+
+        self.generation['frames'] += frames
+        self.stats['frames'] += frames
+        self.stats['bytes'] += frames * frame_size
+        self.stats['chunks'] += 1
+        return frames
+
+    def ship(self, checkpoint_bytes=None):
+        """Archive newly committed frames; backfill them too once the WAL is bigger than checkpoint_bytes"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.release_pin()
+            frames = self.copy_new_frames()
+            wal_size = os.path.getsize(self.wal_path) if os.path.exists(self.wal_path) else 0
+            if checkpoint_bytes is not None and wal_size > checkpoint_bytes:
+                # Nothing can be appended while we hold the lock, so only shipped frames are backfilled
+                busy, log_frames, backfilled = self.checkpointer.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+                if not busy and log_frames == backfilled:
+                    self.stats['checkpoints'] += 1
+            begin_snapshot(self.pin)
+        finally:
+            self.conn.execute("COMMIT")
+        return frames
+
+    def release_pin(self):
+        """Drop the read transaction held since the last round. Caller holds the write lock, and
+        re-pins (begin_snapshot(self.pin)) before releasing it, so frames committed after what was
+        just shipped can never be backfilled - and lost to a WAL reset - before the next round."""
+        if self.pin.in_transaction:
+            self.pin.rollback()
+
+    def take_base(self, keep=3, pages=BACKUP_PAGES_PER_STEP, pause=BACKUP_STEP_PAUSE):
+        """Full online backup that starts (or restarts) the WAL chain"""
+        source = sqlite3.connect(self.database, timeout=30, isolation_level=None)
+        source.execute("PRAGMA wal_autocheckpoint = 0")
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Ship up to the end of the WAL and pin the snapshot there before writers resume
+            self.release_pin()
+            self.copy_new_frames()
+            created_at = time.time()
+            if self.generation is not None and read_wal_header(self.wal_path) is not None:
+                generation, frames = self.generation['index'], self.generation['frames']
+            else:
+                generation, frames = self.next_index(), 0
+            begin_snapshot(source)
+            begin_snapshot(self.pin)
+        finally:
+            self.conn.execute("COMMIT")
+
+        destination = os.path.join(self.backup_dir, 'bases', f"{base_name(created_at)}.db")
+        try:
+            result = online_backup(source, destination, pages, pause)
+        finally:
+            source.close()
+        manifest = {'created_at': created_at, 'generation': generation, 'frames': frames,
+                    'bytes': result['bytes'], 'pages': result['pages']}
+        with open(destination[:-3] + '.json', 'w') as f:
+            json.dump(manifest, f)
+        self.needs_base = False
+        prune_backups(self.backup_dir, keep)
+        return {**result, **manifest}
+
+    def close(self):
+        for conn in (self.conn, self.pin, self.checkpointer):
+            conn.close()
+        self.lock.close()
+
+
+def list_bases(backup_dir):
+    """Base manifests, oldest first"""
+    bases = []
+    for path in glob.glob(os.path.join(backup_dir, 'bases', '*.json')):
+        with open(path) as f:
+            manifest = json.load(f)
+        manifest['path'] = path[:-5] + '.db'
+        if os.path.exists(manifest['path']):
+            bases.append(manifest)
+    return sorted(bases, key=lambda base: base['created_at'])
+
+
+def prune_backups(backup_dir, keep):
+    """Keep the newest `keep` bases and the WAL generations they need"""
+    bases = list_bases(backup_dir)
+    for base in bases[:-keep] if keep else []:
+        os.remove(base['path'])
+        os.remove(base['path'][:-3] + '.json')
+    chained = [base['generation'] for base in bases[-keep:] if base.get('generation') is not None]
+    if chained:
+        for index, path in generation_dirs(backup_dir).items():
+            if index < min(chained):
+                shutil.rmtree(path)
+
+
+def apply_wal(database, header, chunks):
+    """Replay shipped frames into a restored copy; returns the number of frames SQLite accepted"""
+    with open(database + '-wal', 'wb') as wal:
+        wal.write(header)
+        for chunk in chunks:
+            with open(chunk, 'rb') as f:
+                shutil.copyfileobj(f, wal)
+    conn = sqlite3.connect(database)
+    busy, log_frames, backfilled = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return backfilled if not busy else 0
+
+
+def restore(backup_dir, target, at=None):
+    """Rebuild the database as of `at` (unix time; default: everything shipped) into target"""
+    at = at or time.time()
+    bases = [base for base in list_bases(backup_dir) if base['created_at'] <= at]
+    if not bases:
+        raise ValueError("No base backup taken before the requested time")
+    base = bases[-1]
+
+    started = time.perf_counter()
+    for path in (target, target + '-wal', target + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.copyfile(base['path'], target)
+
+    generations = generation_dirs(backup_dir)
+    index = base.get('generation')
+    frames_applied = 0
+    reached = base['created_at']
+    while index is not None and index in generations:
+        path = generations[index]
+        chunks = []
+        expected = 1
+        all_chunks = generation_chunks(path)
+        for first, last, shipped_at, chunk in all_chunks:
+            # Chunks the base already contains were shipped before it was taken, so they always qualify
+            if shipped_at / 1000 > at:
+                break
+            if first != expected:
+                raise ValueError(f"WAL generation {index} is missing frames {expected}-{first - 1}")
+            chunks.append(chunk)
+            reached = max(reached, shipped_at / 1000)
+            expected = last + 1
+        if chunks:
+            with open(os.path.join(path, 'header'), 'rb') as f:
+                header = f.read()
+            applied = apply_wal(target, header, chunks)
+            if applied != expected - 1:
+                raise ValueError(f"WAL generation {index}: only {applied} of {expected - 1} frames are valid")
+            frames_applied += applied
+        if len(chunks) < len(all_chunks):
+            break  # stopped at `at`
+
+        index += 1
+        if index not in generations:
+            break  # end of everything shipped
+        with open(os.path.join(generations[index], 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('continues') != index - 1:
+            # Frames shipped after this point (up to `at`) can't be reached from this base
+            if meta.get('started_at', 0) <= at:
+                raise ValueError(f"WAL chain from {base['path']} ends at generation {index - 1}, but "
+                                 f"generation {index} does not continue it; restore to an earlier time "
+                                 f"or from a base taken after the break")
+            break
+
+    return {
+        'base': base['path'],
+        'base_created_at': base['created_at'],
+        'frames_applied': frames_applied,
+        'restored_to': reached,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def verify(database):
+    """Integrity check plus row counts of the main tables"""
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    c = conn.cursor()
+    started = time.perf_counter()
+    c.execute("PRAGMA integrity_check")
+    problems = [row[0] for row in c.fetchall() if row[0] != 'ok']
+    counts = {}
+    for table in ('movies', 'movie_schedules', 'tbl_booking', 'seat_availability', 'user_table'):
+        try:
+            c.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = c.fetchone()[0]
+        except sqlite3.Error:
+            counts[table] = None
+    conn.close()
+    return {'ok': not problems, 'problems': problems[:20], 'counts': counts,
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+def parse_time(value):
+    return datetime.datetime.fromisoformat(value).timestamp() if value else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Online backups and point-in-time restore")
+    parser.add_argument('--dir', default='backups', help="backup directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backup_cmd = commands.add_parser('backup', help="take a standalone base backup now")
+    backup_cmd.add_argument('--database', default='database.db')
+    backup_cmd.add_argument('--pages', type=int, default=BACKUP_PAGES_PER_STEP, help="pages copied per step")
+
+    commands.add_parser('list', help="list base backups and shipped WAL generations")
+
+    restore_cmd = commands.add_parser('restore', help="restore a base plus shipped WAL into a new file")
+    restore_cmd.add_argument('--to', required=True, help="path of the restored database (overwritten)")
+    restore_cmd.add_argument('--at', help="point in time, e.g. '2025-03-01 18:30:00' (default: latest)")
+
+    verify_cmd = commands.add_parser('verify', help="integrity-check a database file")
+    verify_cmd.add_argument('path')
+
+    args = parser.parse_args()
+
+    if args.command == 'backup':
+        os.makedirs(os.path.join(args.dir, 'bases'), exist_ok=True)
+        source = sqlite3.connect(args.database, timeout=30, isolation_level=None)
+        created_at = time.time()
+        if source.execute("PRAGMA journal_mode").fetchone()[0] == 'wal':
+            begin_snapshot(source)
+        result = online_backup(source, os.path.join(args.dir, 'bases', f"{base_name(created_at)}.db"), args.pages)
+        source.close()
+        # Not tied to a WAL generation, so it restores exactly as taken
+        with open(result['path'][:-3] + '.json', 'w') as f:
+            json.dump({'created_at': created_at, 'generation': None, 'frames': 0,
+                       'bytes': result['bytes'], 'pages': result['pages']}, f)
+        print(f"💾 {result['path']}: {result['bytes'] / 1048576:.1f} MB in {result['seconds']} s "
+              f"({result['mb_per_second']} MB/s, {result['steps']} steps)")
+    elif args.command == 'list':
+        for base in list_bases(args.dir):
+            print(f"💾 {datetime.datetime.fromtimestamp(base['created_at']):%Y-%m-%d %H:%M:%S}  "
+                  f"{base['bytes'] / 1048576:.1f} MB  generation {base['generation']} frame {base['frames']}")
+        for index, path in sorted(generation_dirs(args.dir).items()):
+            chunks = generation_chunks(path)
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+            if not chunks:
+                print(f"📜 WAL generation {index}: empty")
+                continue
+            last = datetime.datetime.fromtimestamp(chunks[-1][2] / 1000)
+            print(f"📜 WAL generation {index}: {chunks[-1][1]} frames in {len(chunks)} chunks, "
+                  f"continues {meta['continues']}, last shipped {last:%Y-%m-%d %H:%M:%S}")
+    elif args.command == 'restore':
+        result = restore(args.dir, args.to, parse_time(args.at))
+        print(f"♻️ Restored {args.to} from {result['base']} + {result['frames_applied']} WAL frames "
+              f"(as of {datetime.datetime.fromtimestamp(result['restored_to']):%Y-%m-%d %H:%M:%S}) "
+              f"in {result['seconds']} s")
+        check = verify(args.to)
+        print("✅ Integrity check passed" if check['ok'] else f"❌ Integrity check failed: {check['problems']}")
+    elif args.command == 'verify':
+        check = verify(args.path)
+        print("✅ Integrity check passed" if check['ok'] else f"❌ Integrity check failed: {check['problems']}")
+        for table, count in check['counts'].items():
+            print(f"  {table}: {count}")
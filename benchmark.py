@@ -0,0 +1,339 @@
+import argparse
+import datetime
+import gzip
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from app import app, DATABASE, brotli, HallScheduleIndex, schedule_interval
+from recommendations import build_recommendations, np
+from backup import WalShipper, begin_snapshot, restore, verify
+
+
+def customer_client():
+    """Test client logged in as the first customer in the database"""
+    conn = sqlite3.connect(DATABASE)
+    c = conn.cursor()
+    c.execute("SELECT u_id, u_name FROM user_table WHERE u_role = 'Customer' ORDER BY u_id LIMIT 1")
+    user = c.fetchone()
+    conn.close()
+    if not user:
+        raise SystemExit("❌ No customer account found - register one first")
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user[0]
+        sess['username'] = user[1]
+        sess['role'] = 'Customer'
+        sess['status'] = 'Active'
+    return client
+
+
+def measure(client, paths, page_views):
+    """Return (requests per page view, CPU ms per page view, bytes per page view)"""
+    total_bytes = 0
+    started = time.process_time()
+    for _ in range(page_views):
+        for path in paths:
+            response = client.get(path)
+            total_bytes += len(response.data)
+    cpu_ms = (time.process_time() - started) * 1000
+    return len(paths), cpu_ms / page_views, total_bytes / page_views
+
+
+# ---------------- CUSTOMER HOME PAGE ----------------
+def bench_home(page_views):
+    client = customer_client()
+
+    # Before /bootstrap: the page plus the JSON calls index.html used to make on load
+    legacy_paths = ['/customer', '/viewtickets_data', '/get_movies_count',
+                    '/get_featured_movies', '/get_featured_movies', '/get_all_genres']
+    bootstrap_paths = ['/customer']
+
+    # Warm the fragment and catalog caches so both runs measure steady state
+    measure(client, legacy_paths, 5)
+
+    print(f"🏠 Customer home page ({page_views} page views)")
+    for label, paths in (('legacy fan-out', legacy_paths), ('inline bootstrap', bootstrap_paths)):
+        requests, cpu_ms, size = measure(client, paths, page_views)
+        print(f"  {label:<18} {requests} requests/view  {cpu_ms:7.2f} ms CPU/view  {size / 1024:7.1f} KB/view")
+
+
+# ---------------- RESPONSE COMPRESSION ----------------
+def bench_compression(iterations):
+    client = customer_client()
+    bodies = {
+        '/get_movies (JSON)': client.get('/get_movies').data,
+        '/get_featured_movies (JSON)': client.get('/get_featured_movies').data,
+        '/customer (HTML)': client.get('/customer').data,
+        '/movies (HTML)': client.get('/movies').data,
+    }
+
+    codecs = [(f"gzip -{level}", lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0))
+              for level in (1, 3, 6, 9)]
+    if brotli is not None:
+        codecs += [(f"br q{quality}", lambda data, quality=quality: brotli.compress(data, quality=quality))
+                   for quality in (1, 4, 5, 8, 11)]
+    else:
+        print("⚠️ brotli not installed - gzip levels only")
+
+    print(f"🗜️ Response compression ({iterations} runs per level)")
+    for label, data in bodies.items():
+        print(f"  {label}: {len(data) / 1024:.1f} KB")
+        for name, compress in codecs:
+            started = time.process_time()
+            for _ in range(iterations):
+                compressed = compress(data)
+            cpu_ms = (time.process_time() - started) * 1000 / iterations
+            print(f"    {name:<8} {len(compressed) / 1024:7.1f} KB  ratio {len(data) / len(compressed):5.2f}  "
+                  f"{cpu_ms:7.3f} ms CPU")
+
+
+# ---------------- SCHEDULE CONFLICTS ----------------
+def year_of_shows(halls, shows_per_day=6):
+    """Candidate (hall, start, end) shows for a year, about a tenth of which clash"""
+    rng = random.Random(2025)
+    start_date = datetime.date(2026, 1, 1)
+    showtimes = ['10:00', '12:45', '15:30', '18:15', '21:00', '23:40'][:shows_per_day]
+    shows = []
+    for day in range(365):
+        show_date = (start_date + datetime.timedelta(days=day)).isoformat()
+        for hall in range(1, halls + 1):
+            for showtime in showtimes:
+                if rng.random() < 0.1:
+                    showtime = f"{rng.randint(9, 23)}:{rng.choice(['00', '15', '30', '45'])}"
+                shows.append((hall, *schedule_interval(show_date, showtime, rng.randint(95, 150))))
+    return shows
+
+
+def validate_with_index(shows, turnaround):
+    index = HallScheduleIndex()
+    accepted = 0
+    for hall, start, end in shows:
+        if not index.conflicts(hall, start, end, turnaround):
+            index.add(hall, start, end)
+            accepted += 1
+    return accepted
+
+
+def validate_with_scan(shows, turnaround):
+    """Baseline: compare against every accepted show in the same hall"""
+    by_hall = {}
+    accepted = 0
+    for hall, start, end in shows:
+        existing = by_hall.setdefault(hall, [])
+        if not any(other_start < end + turnaround and other_end + turnaround > start
+                   for other_start, other_end in existing):
+            existing.append((start, end))
+            accepted += 1
+    return accepted
+
+
+def bench_schedules(iterations):
+    turnaround = app.config['SCHEDULE_TURNAROUND_MINUTES']
+    runs = max(1, iterations // 100)
+    print(f"📅 Schedule conflict checks (one year, {turnaround} min turnaround, best of {runs})")
+    for halls in (4, 16):
+        shows = year_of_shows(halls)
+        print(f"  {halls} halls, {len(shows)} candidate shows")
+        for label, validate in (('interval index', validate_with_index), ('linear scan', validate_with_scan)):
+            best = None
+            for _ in range(runs):
+                started = time.perf_counter()
+                accepted = validate(shows, turnaround)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"    {label:<15} {accepted} accepted  {best * 1000:9.1f} ms  "
+                  f"{len(shows) / best:10.0f} shows/sec")
+
+
+# ---------------- RECOMMENDATIONS ----------------
+def synthetic_bookings(bookings, users, movies):
+    """(u_id, movie_id) pairs with a long-tail movie popularity and genre-like clusters"""
+    if np is not None:
+        rng = np.random.default_rng(2025)
+        user_ids = rng.integers(1, users + 1, bookings)
+        # Each user leans towards one cluster of 50 movies, popular titles dominate
+        cluster = (user_ids * 7919) % max(1, movies // 50)
+        offset = np.minimum(rng.zipf(1.6, bookings) - 1, 49)
+        movie_ids = (cluster * 50 + offset) % movies + 1
+        return np.stack([user_ids, movie_ids], axis=1)
+
+    rng = random.Random(2025)
+    pairs = []
+    for _ in range(bookings):
+        user_id = rng.randint(1, users)
+        cluster = (user_id * 7919) % max(1, movies // 50)
+        offset = min(int(rng.paretovariate(0.6)) - 1, 49)
+        pairs.append((user_id, (cluster * 50 + offset) % movies + 1))
+    return pairs
+
+
+def bench_recommendations(iterations):
+    if np is not None:
+        bookings, users = 5_000_000, 1_000_000
+    else:
+        # The pure-Python fallback is far slower; keep the run short
+        bookings, users = 200_000, 40_000
+        print("⚠️ numpy/scipy not installed - benchmarking the pure-Python fallback on a smaller set")
+
+    movies = 2000
+    pairs = synthetic_bookings(bookings, users, movies)
+    runs = max(1, iterations // 200)
+    print(f"🎯 Recommendation rebuild ({bookings:,} bookings, {users:,} users, {movies} movies, best of {runs})")
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        neighbors, user_recs = build_recommendations(pairs)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {'numpy/scipy' if np is not None else 'python'}: {best:.2f} s  "
+          f"({len(neighbors)} movies, {len(user_recs):,} users with recommendations)")
+
+
+# ---------------- BACKUP AND RESTORE ----------------
+def build_large_database(path, megabytes):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("CREATE TABLE posters (id INTEGER PRIMARY KEY, payload BLOB)")
+    conn.execute("CREATE TABLE bookings (id INTEGER PRIMARY KEY, seat TEXT, booked_at REAL)")
+    rows = megabytes * 256  # 4 KB blobs
+    for start in range(0, rows, 10_000):
+        conn.execute('''WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+                        INSERT INTO posters (payload) SELECT randomblob(4000) FROM n''',
+                     (min(rows, start + 10_000) - start,))
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+
+class BookingWriter(threading.Thread):
+    """Commits one small booking at a time and records how long each commit took"""
+
+    def __init__(self, path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.latencies = []
+        self.stopping = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        while not self.stopping.is_set():
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO bookings (seat, booked_at) VALUES (?, ?)", (f"A{random.randint(1, 8)}", time.time()))
+            conn.execute("COMMIT")
+            self.latencies.append(time.perf_counter() - started)
+            time.sleep(0.002)
+        conn.close()
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+        latencies = sorted(self.latencies)
+        return {
+            'commits': len(latencies),
+            'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+            'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+            'max_ms': latencies[-1] * 1000 if latencies else 0
+        }
+
+
+def print_writer(label, stats):
+    print(f"    {label:<28} {stats['commits']:6d} commits  p50 {stats['p50_ms']:6.2f} ms  "
+          f"p99 {stats['p99_ms']:7.2f} ms  max {stats['max_ms']:8.1f} ms")
+
+
+def bench_backup(iterations):
+    megabytes = int(os.environ.get('BENCH_BACKUP_MB', 2048))
+    workdir = tempfile.mkdtemp(prefix='backup-bench-')
+    try:
+        path = os.path.join(workdir, 'database.db')
+        print(f"💾 Backup and restore ({megabytes} MB database, bookings committed throughout)")
+        started = time.perf_counter()
+        build_large_database(path, megabytes)
+        print(f"  built in {time.perf_counter() - started:.1f} s")
+
+        # Baseline: a consistent file copy has to keep writers out for the whole copy
+        writer = BookingWriter(path)
+        writer.start()
+        time.sleep(0.5)
+        conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        shutil.copyfile(path, os.path.join(workdir, 'copy.db'))
+        shutil.copyfile(path + '-wal', os.path.join(workdir, 'copy.db-wal'))
+        conn.execute("COMMIT")
+        copy_seconds = time.perf_counter() - started
+        conn.close()
+        os.remove(os.path.join(workdir, 'copy.db'))
+        os.remove(os.path.join(workdir, 'copy.db-wal'))
+        print(f"  locked file copy: {copy_seconds:.2f} s ({megabytes / copy_seconds:.0f} MB/s)")
+        print_writer('writers during file copy', writer.stop())
+
+        # Online backup in page steps from a pinned snapshot, with WAL shipping around it
+        backup_dir = os.path.join(workdir, 'backups')
+        shipper = WalShipper(path, backup_dir)
+        writer = BookingWriter(path)
+        writer.start()
+        time.sleep(0.5)
+        base = shipper.take_base(keep=1)
+        print(f"  online backup: {base['seconds']:.2f} s ({base['mb_per_second']} MB/s, {base['steps']} steps)")
+        print_writer('writers during online backup', writer.stop())
+
+        writer = BookingWriter(path)
+        writer.start()
+        for _ in range(5):
+            time.sleep(0.4)
+            shipper.ship(checkpoint_bytes=256 * 1024)
+        writer.stop()
+        shipper.ship()
+        stats = shipper.stats
+        print(f"  shipped {stats['frames']} WAL frames ({stats['bytes'] / 1048576:.1f} MB) in "
+              f"{stats['chunks']} chunks, {stats['checkpoints']} checkpoints")
+
+        source = sqlite3.connect(path)
+        begin_snapshot(source)
+        expected = source.execute("SELECT COUNT(*), MAX(id) FROM bookings").fetchone()
+        source.close()
+        shipper.close()
+
+        restored = os.path.join(workdir, 'restored.db')
+        result = restore(backup_dir, restored)
+        conn = sqlite3.connect(restored)
+        actual = conn.execute("SELECT COUNT(*), MAX(id) FROM bookings").fetchone()
+        conn.close()
+        print(f"  restore: {result['seconds']:.2f} s ({result['frames_applied']} frames replayed), "
+              f"bookings {'match' if actual == expected else f'MISMATCH {actual} != {expected}'}")
+        check = verify(restored)
+        print(f"  verify: {'ok' if check['ok'] else check['problems']} in {check['seconds']:.2f} s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+BENCHMARKS = {
+    'home': bench_home,
+    'compression': bench_compression,
+    'schedules': bench_schedules,
+    'recommendations': bench_recommendations,
+    'backup': bench_backup,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Movie Ticket Booking benchmarks")
+    parser.add_argument('benchmarks', nargs='*',
+                        help=f"benchmarks to run: {', '.join(sorted(BENCHMARKS))} (default: all)")
+    parser.add_argument('-n', '--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.benchmarks or sorted(BENCHMARKS):
+        BENCHMARKS[name](args.iterations)
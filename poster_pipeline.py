@@ -0,0 +1,138 @@
+import argparse
+import hashlib
+import io
+import os
+import sqlite3
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Variants are written to static/posters/<source hash>-<size>.<ext> and never
+# change once written, so they can be served with a far-future immutable
+# Cache-Control header. Bump PIPELINE_VERSION when sizes or quality change.
+PIPELINE_VERSION = 1
+POSTER_DIR = os.path.join('static', 'posters')
+POSTER_SIZES = {'thumb': 160, 'card': 320, 'detail': 640}
+POSTER_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+FETCH_TIMEOUT_SECONDS = 10
+
+POSTER_VARIANTS_SCHEMA = '''CREATE TABLE IF NOT EXISTS poster_variants (
+        poster_url TEXT NOT NULL,
+        size TEXT NOT NULL,
+        format TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        width INTEGER NOT NULL,
+        PRIMARY KEY (poster_url, size, format)
+    )'''
+
+
+def read_poster_source(poster_url):
+    """Return the original poster bytes for a remote URL or a /static/ path"""
+    if poster_url.startswith(('http://', 'https://')):
+        req = urllib.request.Request(poster_url, headers={'User-Agent': 'MovieTicketing-PosterPipeline'})
+        with urllib.request.urlopen(req, timeout=FETCH_TIMEOUT_SECONDS) as response:
+            data = response.read(MAX_SOURCE_BYTES + 1)
+    elif poster_url.startswith('/static/'):
+        with open(poster_url.lstrip('/'), 'rb') as f:
+            data = f.read(MAX_SOURCE_BYTES + 1)
+    else:
+        raise ValueError(f"Unsupported poster URL: {poster_url}")
+
+    if len(data) > MAX_SOURCE_BYTES:
+        raise ValueError(f"Poster is larger than {MAX_SOURCE_BYTES} bytes: {poster_url}")
+    return data
+
+
+def build_poster_variants(poster_url):
+    """Create any missing variants for one poster.
+
+    Returns a list of (size, format, filename, width) tuples. Runs in worker
+    processes, so it only touches files and never the database.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is required for the poster pipeline (pip install Pillow)")
+
+    source = read_poster_source(poster_url)
+    digest = hashlib.sha256(source + f"v{PIPELINE_VERSION}".encode()).hexdigest()[:16]
+    os.makedirs(POSTER_DIR, exist_ok=True)
+
+    image = None
+    variants = []
+    for size, target_width in POSTER_SIZES.items():
+        for fmt, (pil_format, extension, options) in POSTER_FORMATS.items():
+            filename = f"{digest}-{size}.{extension}"
+            path = os.path.join(POSTER_DIR, filename)
+
+            if image is None:
+                image = Image.open(io.BytesIO(source))
+                image.load()
+                image = image.convert('RGB')
+            width = min(target_width, image.width)
+
+            if not os.path.exists(path):
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                # Write to a temp file first so a half-written variant is never served
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                resized.save(tmp_path, pil_format, **options)
+                os.replace(tmp_path, path)
+
+            variants.append((size, fmt, filename, width))
+    return variants
+
+
+def save_poster_variants(conn, poster_url, variants):
+    c = conn.cursor()
+    c.execute("DELETE FROM poster_variants WHERE poster_url = ?", (poster_url,))
+    c.executemany('''INSERT INTO poster_variants (poster_url, size, format, filename, width)
+                     VALUES (?, ?, ?, ?, ?)''',
+                  [(poster_url, size, fmt, filename, width) for size, fmt, filename, width in variants])
+    conn.commit()
+
+
+def backfill_posters(database='database.db', workers=None, force=False):
+    """Generate variants for every movie poster using a process pool"""
+    conn = sqlite3.connect(database)
+    c = conn.cursor()
+    c.execute(POSTER_VARIANTS_SCHEMA)
+    c.execute("SELECT DISTINCT poster_url FROM movies WHERE poster_url IS NOT NULL AND poster_url != ''")
+    poster_urls = [row[0] for row in c.fetchall()]
+
+    if not force:
+        c.execute("SELECT DISTINCT poster_url FROM poster_variants")
+        done = {row[0] for row in c.fetchall()}
+        poster_urls = [url for url in poster_urls if url not in done]
+
+    print(f"🖼️ Building variants for {len(poster_urls)} poster(s)...")
+    built = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_poster_variants, url): url for url in poster_urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                save_poster_variants(conn, url, future.result())
+                built += 1
+                print(f"  ✅ {url}")
+            except Exception as e:
+                failed += 1
+                print(f"  ❌ {url}: {e}")
+
+    conn.close()
+    print(f"🎉 Poster backfill done: {built} built, {failed} failed")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backfill resized poster variants for all movies")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="rebuild posters that already have variants")
+    parser.add_argument('--database', default='database.db')
+    args = parser.parse_args()
+    backfill_posters(args.database, args.workers, args.force)
@@ -0,0 +1,54 @@
+import datetime
+import re
+
+# Prices are built once per schedule as a {seat: price} table (seat class x
+# day-of-week x time-of-day), so quoting a basket is a lookup per seat with
+# no rule evaluation. Halls map seat rows to classes in hall_seat_classes;
+# rows that aren't listed are Standard.
+SEAT_CLASS_PRICES = {'Standard': 125.0, 'Premium': 160.0, 'VIP': 220.0}
+DEFAULT_SEAT_CLASS = 'Standard'
+
+# weekday() -> multiplier; weekends cost a little more (evenings on any day are prime time below)
+DAY_MULTIPLIERS = {5: 1.1, 6: 1.1}
+# (from minute, until minute, multiplier) in minutes after midnight
+TIME_MULTIPLIERS = [
+    (0, 12 * 60, 0.8),          # matinee
+    (12 * 60, 17 * 60, 1.0),
+    (17 * 60, 24 * 60, 1.1),    # prime time
+]
+
+
+def seat_row(seat_number):
+    return re.sub(r'\d+$', '', seat_number)
+
+
+def show_multiplier(show_date, start_minute):
+    multiplier = 1.0
+    try:
+        multiplier *= DAY_MULTIPLIERS.get(datetime.date.fromisoformat(show_date).weekday(), 1.0)
+    except ValueError:
+        pass  # 'N/A' and other legacy dates get weekday pricing
+    for low, high, time_multiplier in TIME_MULTIPLIERS:
+        if low <= start_minute < high:
+            multiplier *= time_multiplier
+            break
+    return multiplier
+
+
+def build_price_table(seat_numbers, seat_classes, show_date, start_minute):
+    """Return {seat_number: price} for one schedule.
+
+    seat_classes maps row labels ('A', 'B', ...) to class names for the
+    schedule's hall.
+    """
+    multiplier = show_multiplier(show_date, start_minute)
+    prices_by_class = {name: round(price * multiplier, 2) for name, price in SEAT_CLASS_PRICES.items()}
+    return {seat: prices_by_class.get(seat_classes.get(seat_row(seat), DEFAULT_SEAT_CLASS),
+                                      prices_by_class[DEFAULT_SEAT_CLASS])
+            for seat in seat_numbers}
+
+
+def promo_discount(subtotal, percent_off=0, amount_off=0):
+    """Discount for a basket; never more than the basket itself"""
+    discount = subtotal * (percent_off or 0) / 100 + (amount_off or 0)
+    return round(min(subtotal, discount), 2)
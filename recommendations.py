@@ -0,0 +1,278 @@
+import argparse
+import math
+import sqlite3
+import time
+from collections import Counter, defaultdict
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+# "People who booked X also booked Y": a binary user x movie matrix is built
+# from every booking, movies are compared with cosine similarity over the
+# users who booked them, and the top K neighbours of each movie are kept.
+# A user's recommendations are the unseen movies with the highest summed
+# similarity to what they have booked. Both lists are stored one row per
+# movie / user, so serving them is a single primary-key lookup.
+#
+# Rebuilds fill *_new tables and rename them into place, so only one may run
+# at a time. The single recommendation_builds row is the lock: a rebuild
+# first claims it by moving locked_until into the future (a crashed rebuild's
+# claim lapses after REBUILD_LEASE_SECONDS) and records built_at when done,
+# which also lets every worker process agree on when the next one is due.
+TOP_K = 10
+DENSE_CHUNK_CELLS = 20_000_000  # max cells materialised at once when picking top K
+REBUILD_LEASE_SECONDS = 3600
+
+
+class RebuildBusy(RuntimeError):
+    """Another process is rebuilding the recommendations"""
+
+
+def recommendations_schema(suffix=''):
+    return [
+        f'''CREATE TABLE IF NOT EXISTS movie_neighbors{suffix} (
+            movie_id INTEGER PRIMARY KEY,
+            neighbor_ids TEXT NOT NULL,
+            scores TEXT NOT NULL
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS user_recommendations{suffix} (
+            u_id INTEGER PRIMARY KEY,
+            movie_ids TEXT NOT NULL,
+            scores TEXT NOT NULL
+        )''',
+    ]
+
+
+RECOMMENDATIONS_SCHEMA = recommendations_schema() + [
+    '''CREATE TABLE IF NOT EXISTS recommendation_builds (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        locked_until REAL NOT NULL DEFAULT 0,
+        built_at REAL NOT NULL DEFAULT 0
+    )''',
+]
+
+
+def claim_rebuild(conn, min_age=0):
+    """Take the rebuild lock; False if it is held or the last build is less than min_age seconds old"""
+    now = time.time()
+    c = conn.cursor()
+    c.execute("INSERT OR IGNORE INTO recommendation_builds (id) VALUES (1)")
+    c.execute('''UPDATE recommendation_builds SET locked_until = ?
+                 WHERE id = 1 AND locked_until < ? AND built_at <= ?''',
+              (now + REBUILD_LEASE_SECONDS, now, now - min_age))
+    claimed = c.rowcount == 1
+    conn.commit()
+    return claimed
+
+
+def release_rebuild(conn, built):
+    c = conn.cursor()
+    if built:
+        c.execute("UPDATE recommendation_builds SET locked_until = 0, built_at = ? WHERE id = 1", (time.time(),))
+    else:
+        c.execute("UPDATE recommendation_builds SET locked_until = 0 WHERE id = 1")
+    conn.commit()
+
+
+def load_bookings(conn):
+    """(u_id, movie_id) for every booking, current and archived"""
+    c = conn.cursor()
+    c.execute('''SELECT b.u_id, m.id FROM booking_history b
+                 JOIN movies m ON m.title = b.movie_name''')
+    return c.fetchall()
+
+
+def top_k_rows(matrix, k):
+    """Top k entries of every row of a CSR matrix, skipping zeros.
+
+    Returns flat (rows, columns, values) arrays ordered by row and then by
+    descending value.
+    """
+    rows, columns, values = [], [], []
+    chunk = max(1, DENSE_CHUNK_CELLS // max(1, matrix.shape[1]))
+    width = min(k, matrix.shape[1])
+    for start in range(0, matrix.shape[0], chunk):
+        dense = matrix[start:start + chunk].toarray()
+        if width < dense.shape[1]:
+            candidates = np.argpartition(-dense, width - 1, axis=1)[:, :width]
+        else:
+            candidates = np.tile(np.arange(dense.shape[1]), (dense.shape[0], 1))
+        scores = np.take_along_axis(dense, candidates, axis=1)
+        order = np.argsort(-scores, axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        keep = scores > 0
+        rows.append(np.nonzero(keep)[0] + start)
+        columns.append(candidates[keep])
+        values.append(scores[keep])
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(rows), np.concatenate(columns), np.concatenate(values)
+
+
+def group_rows(row_ids, column_ids, rows, columns, values):
+    """{row id: ([column ids], [scores])} from the output of top_k_rows"""
+    keys = row_ids[rows].tolist()
+    items = column_ids[columns].tolist()
+    scores = values.tolist()
+    bounds = [0, *(np.flatnonzero(np.diff(rows)) + 1).tolist(), len(keys)]
+    return {keys[low]: (items[low:high], scores[low:high])
+            for low, high in zip(bounds, bounds[1:]) if high > low}
+
+
+def build_with_numpy(pairs, top_k):
+    bookings = np.asarray(pairs, dtype=np.int64)
+    user_ids, user_index = np.unique(bookings[:, 0], return_inverse=True)
+    movie_ids, movie_index = np.unique(bookings[:, 1], return_inverse=True)
+
+    # Binary user x movie matrix (repeat bookings of a movie count once)
+    booked = sparse.csr_matrix((np.ones(len(bookings), dtype=np.float32), (user_index, movie_index)),
+                               shape=(len(user_ids), len(movie_ids)))
+    booked.sum_duplicates()
+    booked.data[:] = 1
+
+    # Cosine similarity between movie columns; the diagonal holds each movie's booker count
+    co_booked = (booked.T @ booked).tocsr()
+    inverse_norms = sparse.diags(1 / np.sqrt(co_booked.diagonal()))
+    co_booked.setdiag(0)
+    similarity = (inverse_norms @ co_booked @ inverse_norms).tocsr()
+    similarity.eliminate_zeros()
+
+    rows, columns, values = top_k_rows(similarity, top_k)
+    neighbors = group_rows(movie_ids, movie_ids, rows, columns, values)
+    nearest = sparse.csr_matrix((values, (rows, columns)), shape=similarity.shape, dtype=np.float32)
+
+    # Score every user against the top-K graph and drop what they've already booked
+    user_recs = {}
+    chunk = max(1, DENSE_CHUNK_CELLS // max(1, len(movie_ids)))
+    for start in range(0, len(user_ids), chunk):
+        block = booked[start:start + chunk]
+        scores = (block @ nearest).tocsr()
+        scores = (scores - scores.multiply(block)).tocsr()
+        scores.eliminate_zeros()
+        user_recs.update(group_rows(user_ids[start:start + chunk], movie_ids, *top_k_rows(scores, top_k)))
+    return neighbors, user_recs
+
+
+def build_with_python(pairs, top_k):
+    movies_by_user = defaultdict(set)
+    for user_id, movie_id in pairs:
+        movies_by_user[user_id].add(movie_id)
+
+    bookers = Counter()
+    co_booked = defaultdict(Counter)
+    for movies in movies_by_user.values():
+        for movie_id in movies:
+            bookers[movie_id] += 1
+            for other in movies:
+                if other != movie_id:
+                    co_booked[movie_id][other] += 1
+
+    neighbors = {}
+    for movie_id, others in co_booked.items():
+        scored = [(other, count / math.sqrt(bookers[movie_id] * bookers[other])) for other, count in others.items()]
+        neighbors[movie_id] = sorted(scored, key=lambda item: -item[1])[:top_k]
+
+    user_recs = {}
+    for user_id, movies in movies_by_user.items():
+        scores = Counter()
+        for movie_id in movies:
+            for other, score in neighbors.get(movie_id, []):
+                if other not in movies:
+                    scores[other] += score
+        if scores:
+            user_recs[user_id] = scores.most_common(top_k)
+    return ({key: tuple(map(list, zip(*items))) for key, items in neighbors.items()},
+            {key: tuple(map(list, zip(*items))) for key, items in user_recs.items()})
+
+
+def build_recommendations(pairs, top_k=TOP_K):
+    """Return ({movie_id: ([neighbor ids], [scores])}, {u_id: ([movie ids], [scores])})"""
+    if len(pairs) == 0:
+        return {}, {}
+    if np is not None:
+        return build_with_numpy(pairs, top_k)
+    return build_with_python(pairs, top_k)
+
+
+def encode(ids, scores):
+    return ','.join(map(str, ids)), ','.join(f"{score:.4f}" for score in scores)
+
+
+def save_recommendations(conn, neighbors, user_recs, batch_size=50_000):
+    """Fill fresh tables in batches, then swap them in with one short transaction"""
+    c = conn.cursor()
+    for table in ('movie_neighbors', 'user_recommendations'):
+        c.execute(f"DROP TABLE IF EXISTS {table}_new")
+    for statement in recommendations_schema('_new'):
+        c.execute(statement)
+    conn.commit()
+
+    for table, lists in (('movie_neighbors_new', neighbors), ('user_recommendations_new', user_recs)):
+        rows = [(key, *encode(ids, scores)) for key, (ids, scores) in lists.items()]
+        for start in range(0, len(rows), batch_size):
+            c.executemany(f"INSERT INTO {table} VALUES (?, ?, ?)", rows[start:start + batch_size])
+            conn.commit()
+
+    c.execute("BEGIN IMMEDIATE")
+    for table in ('movie_neighbors', 'user_recommendations'):
+        c.execute(f"DROP TABLE IF EXISTS {table}")
+        c.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    conn.commit()
+
+
+def rebuild_recommendations(database='database.db', top_k=TOP_K, min_age=0):
+    """Rebuild and return timings; None if the last build is less than min_age seconds old.
+
+    Raises RebuildBusy if another process holds the rebuild lock.
+    """
+    conn = sqlite3.connect(database, timeout=30)
+    try:
+        if not claim_rebuild(conn, min_age):
+            c = conn.cursor()
+            c.execute("SELECT locked_until FROM recommendation_builds WHERE id = 1")
+            if c.fetchone()[0] >= time.time():
+                raise RebuildBusy("Recommendations are being rebuilt by another process")
+            return None
+
+        built_ok = False
+        try:
+            started = time.perf_counter()
+            pairs = load_bookings(conn)
+            loaded = time.perf_counter()
+            neighbors, user_recs = build_recommendations(pairs, top_k)
+            built = time.perf_counter()
+            save_recommendations(conn, neighbors, user_recs)
+            built_ok = True
+        finally:
+            release_rebuild(conn, built_ok)
+    finally:
+        conn.close()
+    return {
+        'bookings': len(pairs),
+        'movies': len(neighbors),
+        'users': len(user_recs),
+        'engine': 'numpy' if np is not None else 'python',
+        'load_ms': round((loaded - started) * 1000, 1),
+        'build_ms': round((built - loaded) * 1000, 1),
+        'save_ms': round((time.perf_counter() - built) * 1000, 1)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild co-booking recommendations")
+    parser.add_argument('--database', default='database.db')
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    try:
+        result = rebuild_recommendations(args.database, args.top_k)
+    except RebuildBusy as e:
+        raise SystemExit(str(e))
+    print(f"🎯 {result['bookings']} bookings -> {result['movies']} movies with neighbours, "
+          f"{result['users']} users with recommendations ({result['engine']})")
+    print(f"  load {result['load_ms']} ms  build {result['build_ms']} ms  save {result['save_ms']} ms")
@@ -0,0 +1,494 @@
+// Modal functions
+function openEditModal(id, title, genre, duration, rating, description, poster_url) {
+    document.getElementById('editMovieId').value = id;
+    document.getElementById('editMovieTitle').value = title;
+    document.getElementById('editMovieGenre').value = genre;
+    document.getElementById('editMovieDuration').value = duration;
+    document.getElementById('editMovieRating').value = rating;
+    document.getElementById('editMovieDescription').value = description;
+    document.getElementById('editMoviePoster').value = poster_url || '';
+
+    // Update preview
+    const preview = document.getElementById('editPosterPreview');
+    if (poster_url) {
+        preview.src = poster_url;
+        preview.style.display = 'block';
+    } else {
+        preview.style.display = 'none';
+    }
+
+    document.getElementById('editMovieModal').style.display = 'block';
+}
+
+function closeEditModal() {
+    document.getElementById('editMovieModal').style.display = 'none';
+}
+
+// Schedule Modal Functions
+function openScheduleModal(movieId, movieTitle) {
+    document.getElementById('scheduleMovieId').value = movieId;
+    document.getElementById('scheduleMovieTitle').textContent = movieTitle;
+    document.getElementById('scheduleModal').style.display = 'block';
+    loadSchedules(movieId);
+}
+
+function closeScheduleModal() {
+    document.getElementById('scheduleModal').style.display = 'none';
+}
+
+// Load schedules for a movie
+async function loadSchedules(movieId) {
+    try {
+        const response = await fetch(`/get_movie_schedules?movie_id=${movieId}`);
+        const schedules = await response.json();
+
+        const schedulesList = document.getElementById('schedulesList');
+
+        if (schedules.length === 0) {
+            schedulesList.innerHTML = '<div class="no-schedules">No schedules added yet.</div>';
+            return;
+        }
+
+        schedulesList.innerHTML = schedules.map(schedule => `
+            <div class="schedule-item">
+                <div class="schedule-info">
+                    <span class="schedule-date">${schedule.show_date}</span>
+                    <span class="schedule-time">${schedule.showtime}</span>
+                    <span class="schedule-hall">Hall ${schedule.hall}</span>
+                    <span class="schedule-seats">${schedule.available_seats}/${schedule.total_seats} seats available</span>
+                </div>
+                <div class="schedule-actions">
+                    <button class="btn btn-info btn-sm" onclick="renderScheduleTickets(${schedule.id}, this)">🎟️ Tickets</button>
+                    <button class="btn btn-danger btn-sm" onclick="deleteSchedule(${schedule.id})">Delete</button>
+                </div>
+            </div>
+        `).join('');
+    } catch (error) {
+        console.error('Error loading schedules:', error);
+        document.getElementById('schedulesList').innerHTML = '<div class="no-schedules">Error loading schedules.</div>';
+    }
+}
+
+// Add schedule - FIXED VERSION
+document.getElementById('addScheduleForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const movieId = document.getElementById('scheduleMovieId').value;
+    const showDate = document.getElementById('scheduleDate').value;
+    const showTime = document.getElementById('scheduleTimeCustom').value || document.getElementById('scheduleTimePreset').value;
+    const initialSeats = document.getElementById('scheduleSeats').value || 40;
+    const hall = document.getElementById('scheduleHall').value || 1;
+
+    if (!showDate || !showTime) {
+        alert('Please fill in all schedule details.');
+        return;
+    }
+
+    try {
+        const formData = new URLSearchParams();
+        formData.append('movie_id', movieId);
+        formData.append('show_date', showDate);
+        formData.append('showtime', showTime);
+        formData.append('total_seats', initialSeats);
+        formData.append('hall', hall);
+
+        const response = await fetch('/add_schedule', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+            },
+            body: formData
+        });
+
+        if (response.ok) {
+            alert('✅ Schedule added successfully!');
+            loadSchedules(movieId);
+            document.getElementById('addScheduleForm').reset();
+        } else {
+            const errorText = await response.text();
+            alert('Error adding schedule: ' + errorText);
+        }
+    } catch (error) {
+        console.error('Error adding schedule:', error);
+        alert('Error adding schedule: ' + error.message);
+    }
+});
+
+// Add a batch of schedules from a recurrence rule
+document.getElementById('recurringScheduleForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const movieId = document.getElementById('scheduleMovieId').value;
+    const startDate = document.getElementById('recurrenceStart').value;
+    const rule = document.getElementById('recurrenceRule').value;
+    const initialSeats = document.getElementById('scheduleSeats').value || 40;
+    const hall = document.getElementById('scheduleHall').value || 1;
+
+    try {
+        const response = await fetch('/import_schedules', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ movie_id: movieId, start_date: startDate, rule: rule, total_seats: initialSeats, hall: hall })
+        });
+        const result = await response.json();
+
+        if (response.ok) {
+            alert(`✅ Added ${result.schedules} schedules (${result.rows_per_second} rows/sec)`);
+            loadSchedules(movieId);
+            document.getElementById('recurringScheduleForm').reset();
+        } else {
+            const details = (result.errors || []).slice(0, 5).map(err => `Row ${err.row}: ${err.error}`).join('\n');
+            alert('Error adding schedules: ' + result.error + (details ? '\n' + details : ''));
+        }
+    } catch (error) {
+        console.error('Error adding schedules:', error);
+        alert('Error adding schedules: ' + error.message);
+    }
+});
+
+// Render PDF tickets for every booking of a schedule and download them as a zip
+async function renderScheduleTickets(scheduleId, button) {
+    button.disabled = true;
+    button.textContent = '⏳ Rendering...';
+
+    try {
+        const response = await fetch(`/render_schedule_tickets/${scheduleId}`, { method: 'POST' });
+        let job = await response.json();
+        if (!response.ok) {
+            throw new Error(job.error || 'Unable to render tickets');
+        }
+        if (job.total === 0) {
+            alert('No bookings for this schedule yet.');
+            return;
+        }
+
+        while (job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            job = await (await fetch(job.status_url)).json();
+        }
+        if (job.status !== 'done') {
+            throw new Error(`${job.failed} ticket(s) failed to render`);
+        }
+        window.location.href = job.download_url;
+    } catch (error) {
+        console.error('Error rendering tickets:', error);
+        alert('Error rendering tickets: ' + error.message);
+    } finally {
+        button.disabled = false;
+        button.textContent = '🎟️ Tickets';
+    }
+}
+
+// Delete schedule - FIXED VERSION
+async function deleteSchedule(scheduleId) {
+    if (!confirm('Are you sure you want to delete this schedule?')) return;
+
+    try {
+        const formData = new URLSearchParams();
+        formData.append('schedule_id', scheduleId);
+
+        const response = await fetch('/delete_schedule', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+            },
+            body: formData
+        });
+
+        if (response.ok) {
+            alert('✅ Schedule deleted successfully!');
+            const movieId = document.getElementById('scheduleMovieId').value;
+            loadSchedules(movieId);
+        } else {
+            const errorText = await response.text();
+            alert('Error deleting schedule: ' + errorText);
+        }
+    } catch (error) {
+        console.error('Error deleting schedule:', error);
+        alert('Error deleting schedule: ' + error.message);
+    }
+}
+
+// Seat Management Functions - FIXED VERSION
+function openSeatModal(movieId, movieTitle) {
+    document.getElementById('seatMovieId').value = movieId;
+    document.getElementById('seatMovieTitle').textContent = movieTitle;
+    document.getElementById('seatModal').style.display = 'block';
+
+    // First load schedules to select one
+    loadSchedulesForSeat(movieId);
+}
+
+function closeSeatModal() {
+    document.getElementById('seatModal').style.display = 'none';
+}
+
+// Load schedules for seat management
+async function loadSchedulesForSeat(movieId) {
+    try {
+        const response = await fetch(`/get_movie_schedules?movie_id=${movieId}`);
+        const schedules = await response.json();
+
+        const scheduleSelect = document.getElementById('seatScheduleSelect');
+        scheduleSelect.innerHTML = '<option value="">Select a schedule</option>';
+
+        if (schedules.length === 0) {
+            scheduleSelect.innerHTML = '<option value="">No schedules available</option>';
+            return;
+        }
+
+        schedules.forEach(schedule => {
+            const option = document.createElement('option');
+            option.value = schedule.id;
+            option.textContent = `${schedule.show_date} - ${schedule.showtime} (${schedule.available_seats}/${schedule.total_seats} seats)`;
+            scheduleSelect.appendChild(option);
+        });
+    } catch (error) {
+        console.error('Error loading schedules for seat management:', error);
+    }
+}
+
+// Load seat configuration when schedule is selected
+document.getElementById('seatScheduleSelect').addEventListener('change', async function() {
+    const scheduleId = this.value;
+    if (scheduleId) {
+        await loadSeatConfiguration(scheduleId);
+        // Show schedule info and stats
+        document.getElementById('scheduleInfoCard').style.display = 'block';
+        document.getElementById('seatStats').style.display = 'block';
+    } else {
+        document.getElementById('scheduleInfoCard').style.display = 'none';
+        document.getElementById('seatStats').style.display = 'none';
+    }
+});
+
+// Load seat configuration - FIXED VERSION
+async function loadSeatConfiguration(scheduleId) {
+    try {
+        const response = await fetch(`/get_seat_configuration?schedule_id=${scheduleId}`);
+        const config = await response.json();
+
+        if (config) {
+            document.getElementById('totalSeats').value = config.total_seats || 40;
+            document.getElementById('availableSeats').value = config.available_seats || 40;
+            document.getElementById('seatLayout').value = config.seat_layout || 'A1,A2,A3,A4,A5,A6,A7,A8,B1,B2,B3,B4,B5,B6,B7,B8,C1,C2,C3,C4,C5,C6,C7,C8,D1,D2,D3,D4,D5,D6,D7,D8,E1,E2,E3,E4,E5,E6,E7,E8';
+
+            // Update current schedule info
+            document.getElementById('currentShowDate').textContent = config.show_date || 'Not set';
+            document.getElementById('currentShowTime').textContent = config.showtime || 'Not set';
+
+            // Update statistics
+            updateSeatStatistics(config);
+
+            // Generate seat preview
+            generateSeatPreview(config.seat_layout);
+        }
+    } catch (error) {
+        console.error('Error loading seat configuration:', error);
+        alert('Error loading seat configuration.');
+    }
+}
+
+// Generate seat preview
+function generateSeatPreview(seatLayout) {
+    const container = document.getElementById('seatPreviewContainer');
+    container.innerHTML = '';
+
+    if (!seatLayout) return;
+
+    const seats = seatLayout.split(',').map(seat => seat.trim());
+
+    seats.forEach(seat => {
+        const seatElement = document.createElement('div');
+        seatElement.className = 'preview-seat';
+        seatElement.textContent = seat;
+        seatElement.style.cssText = `
+            width: 35px;
+            height: 35px;
+            background: #28a745;
+            color: white;
+            border-radius: 4px;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            font-size: 0.8rem;
+            font-weight: bold;
+            cursor: default;
+        `;
+        container.appendChild(seatElement);
+    });
+}
+
+// Update seat statistics
+function updateSeatStatistics(config) {
+    const totalSeats = config.total_seats || 0;
+    const availableSeats = config.available_seats || 0;
+    const bookedSeats = totalSeats - availableSeats;
+    const occupancy = totalSeats > 0 ? ((bookedSeats / totalSeats) * 100).toFixed(1) : 0;
+
+    document.getElementById('statsTotalSeats').textContent = totalSeats;
+    document.getElementById('statsAvailableSeats').textContent = availableSeats;
+    document.getElementById('statsBookedSeats').textContent = bookedSeats;
+    document.getElementById('statsOccupancy').textContent = occupancy + '%';
+}
+
+// Save seat configuration - FIXED VERSION
+document.getElementById('seatConfigForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const scheduleId = document.getElementById('seatScheduleSelect').value;
+    const totalSeats = document.getElementById('totalSeats').value;
+    const availableSeats = document.getElementById('availableSeats').value;
+    const seatLayout = document.getElementById('seatLayout').value;
+
+    if (!scheduleId) {
+        alert('Please select a schedule first.');
+        return;
+    }
+
+    if (parseInt(availableSeats) > parseInt(totalSeats)) {
+        alert('Available seats cannot be greater than total seats.');
+        return;
+    }
+
+    try {
+        const formData = new URLSearchParams();
+        formData.append('schedule_id', scheduleId);
+        formData.append('total_seats', totalSeats);
+        formData.append('available_seats', availableSeats);
+        formData.append('seat_layout', seatLayout);
+
+        const response = await fetch('/save_seat_configuration', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+            },
+            body: formData
+        });
+
+        if (response.ok) {
+            alert('✅ Seat configuration saved successfully!');
+            loadSeatConfiguration(scheduleId); // Reload to show updated data
+        } else {
+            const errorText = await response.text();
+            alert('Error saving seat configuration: ' + errorText);
+        }
+    } catch (error) {
+        console.error('Error saving seat configuration:', error);
+        alert('Error saving seat configuration: ' + error.message);
+    }
+});
+
+// Update schedule form to handle custom time input
+document.getElementById('scheduleTimePreset').addEventListener('change', function() {
+    if (this.value) {
+        document.getElementById('scheduleTimeCustom').value = this.value;
+    }
+});
+
+document.getElementById('scheduleTimeCustom').addEventListener('input', function() {
+    if (this.value) {
+        document.getElementById('scheduleTimePreset').value = '';
+    }
+});
+
+// Set minimum date to today
+const today = new Date().toISOString().split('T')[0];
+document.getElementById('scheduleDate').min = today;
+
+// Close modal when clicking outside
+window.onclick = function(event) {
+    const editModal = document.getElementById('editMovieModal');
+    const scheduleModal = document.getElementById('scheduleModal');
+    const seatModal = document.getElementById('seatModal');
+    if (event.target === editModal) {
+        closeEditModal();
+    }
+    if (event.target === scheduleModal) {
+        closeScheduleModal();
+    }
+    if (event.target === seatModal) {
+        closeSeatModal();
+    }
+}
+
+// Poster URL preview
+document.getElementById('moviePoster')?.addEventListener('input', function(e) {
+    const preview = document.getElementById('posterPreview');
+    if (this.value) {
+        preview.src = this.value;
+        preview.style.display = 'block';
+    } else {
+        preview.style.display = 'none';
+    }
+});
+
+document.getElementById('editMoviePoster')?.addEventListener('input', function(e) {
+    const preview = document.getElementById('editPosterPreview');
+    if (this.value) {
+        preview.src = this.value;
+        preview.style.display = 'block';
+    } else {
+        preview.style.display = 'none';
+    }
+});
+
+// Handle add movie form submission
+document.getElementById('addMovieForm')?.addEventListener('submit', function(e) {
+    const title = document.getElementById('movieTitle').value.trim();
+    const genre = document.getElementById('movieGenre').value.trim();
+    const duration = document.getElementById('movieDuration').value.trim();
+    const rating = document.getElementById('movieRating').value;
+    const description = document.getElementById('movieDescription').value.trim();
+    const poster_url = document.getElementById('moviePoster').value.trim();
+
+    if (!title || !genre || !duration || !rating || !description) {
+        e.preventDefault();
+        alert('❌ Please fill in all required movie details.');
+        return false;
+    }
+
+    console.log('✅ Adding movie:', { title, genre, duration, rating, description, poster_url });
+});
+
+// Handle edit movie form submission
+document.getElementById('editMovieForm')?.addEventListener('submit', function(e) {
+    const title = document.getElementById('editMovieTitle').value.trim();
+    const genre = document.getElementById('editMovieGenre').value.trim();
+    const duration = document.getElementById('editMovieDuration').value.trim();
+    const rating = document.getElementById('editMovieRating').value;
+    const description = document.getElementById('editMovieDescription').value.trim();
+    const poster_url = document.getElementById('editMoviePoster').value.trim();
+
+    if (!title || !genre || !duration || !rating || !description) {
+        e.preventDefault();
+        alert('❌ Please fill in all required movie details.');
+        return false;
+    }
+
+    console.log('✅ Updating movie:', { title, genre, duration, rating, description, poster_url });
+});
+
+// Auto-submit status changes
+document.querySelectorAll('.status-select').forEach(select => {
+    select.addEventListener('change', function() {
+        this.form.submit();
+    });
+});
+
+// Add some interactive effects
+document.addEventListener('DOMContentLoaded', function() {
+    const cards = document.querySelectorAll('.dashboard-card');
+    cards.forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(20px)';
+
+        setTimeout(() => {
+            card.style.transition = 'all 0.5s ease';
+            card.style.opacity = '1';
+            card.style.transform = 'translateY(0)';
+        }, index * 100);
+    });
+});
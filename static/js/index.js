@@ -0,0 +1,264 @@
+// Initialize on page load
+document.addEventListener('DOMContentLoaded', function() {
+  loadDashboardData();
+  loadGenres();
+  loadFeaturedMovies();
+  setupEventListeners();
+
+  // Set current year in footer
+  document.getElementById('currentYear').textContent = new Date().getFullYear();
+});
+
+// Load dashboard data (tickets count, stats)
+async function loadDashboardData() {
+  // The server inlines the bootstrap payload, so first paint needs no extra requests
+  if (window.BOOTSTRAP) {
+    applyBootstrap(window.BOOTSTRAP);
+    return;
+  }
+
+  try {
+    const response = await fetch('/bootstrap');
+    applyBootstrap(await response.json());
+  } catch (error) {
+    console.error('Error loading dashboard data:', error);
+    // Fallback to counting from featured movies
+    loadStatsFallback();
+  }
+}
+
+// Fill in ticket and movie counts from a /bootstrap payload
+function applyBootstrap(data) {
+  const ticketCount = data.ticket_count || 0;
+  document.getElementById('ticketCountNumber').textContent = ticketCount;
+  document.getElementById('bookingsCount').textContent = ticketCount;
+  document.getElementById('moviesCount').textContent = data.total_movies || 0;
+  document.getElementById('featuredCount').textContent = data.featured_count || 0;
+  document.getElementById('viewAllBtn').innerHTML = `View All ${data.total_movies || 0} Movies →`;
+}
+
+// Fallback for stats if API endpoints don't exist
+async function loadStatsFallback() {
+  try {
+    const response = await fetch('/get_featured_movies');
+    const data = await response.json();
+
+    document.getElementById('featuredCount').textContent = data.featured_count || 0;
+    document.getElementById('moviesCount').textContent = data.total_movies || 0;
+
+  } catch (error) {
+    console.error('Error in fallback:', error);
+  }
+}
+
+// Load all genres
+async function loadGenres() {
+  const genreSelect = document.getElementById('genreFilter');
+  if (genreSelect.options.length > 1) {
+    return; // Already rendered by the server
+  }
+
+  try {
+    const response = await fetch('/get_all_genres');
+    const genres = await response.json();
+
+    genres.forEach(genre => {
+      if (genre) {
+        const option = document.createElement('option');
+        option.value = genre;
+        option.textContent = genre;
+        genreSelect.appendChild(option);
+      }
+    });
+  } catch (error) {
+    console.error('Error loading genres:', error);
+  }
+}
+
+// Load featured movies (grid layout, no carousel)
+async function loadFeaturedMovies() {
+  const featuredMoviesGrid = document.getElementById('featuredMoviesGrid');
+  if (featuredMoviesGrid.dataset.serverRendered) {
+    // Cards were rendered by the server; just animate them in
+    featuredMoviesGrid.querySelectorAll('.movie-card').forEach((card, index) => {
+      card.style.opacity = '0';
+      card.style.transform = 'translateY(30px)';
+
+      setTimeout(() => {
+        card.style.transition = 'all 0.6s ease';
+        card.style.opacity = '1';
+        card.style.transform = 'translateY(0)';
+      }, index * 100);
+    });
+    return;
+  }
+
+  try {
+    const response = await fetch('/get_featured_movies');
+    const data = await response.json();
+
+
+    if (data.featured_movies && data.featured_movies.length > 0) {
+      featuredMoviesGrid.innerHTML = '';
+
+      // Limit to featured_count from your logic
+      const moviesToShow = data.featured_movies.slice(0, data.featured_count || 6);
+
+      moviesToShow.forEach(movie => {
+        const movieCard = createMovieCard(movie);
+        featuredMoviesGrid.appendChild(movieCard);
+      });
+
+      // Add animation to movie cards
+      const movieCards = featuredMoviesGrid.querySelectorAll('.movie-card');
+      movieCards.forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(30px)';
+
+        setTimeout(() => {
+          card.style.transition = 'all 0.6s ease';
+          card.style.opacity = '1';
+          card.style.transform = 'translateY(0)';
+        }, index * 100);
+      });
+
+    } else {
+      featuredMoviesGrid.innerHTML = document.getElementById('noResultsTemplate').innerHTML;
+    }
+
+    // Update View All button
+    document.getElementById('viewAllBtn').innerHTML = `View All ${data.total_movies || 0} Movies →`;
+
+  } catch (error) {
+    console.error('Error loading featured movies:', error);
+    const featuredMoviesGrid = document.getElementById('featuredMoviesGrid');
+    featuredMoviesGrid.innerHTML = '<div class="no-results"><div class="no-results-icon">⚠️</div><h3 class="no-results-title">Unable to load movies</h3><p class="no-results-text">Please try refreshing the page.</p></div>';
+  }
+}
+
+// Create movie card HTML
+function createMovieCard(movie) {
+  const description = movie.description ? 
+    (movie.description.length > 120 ? movie.description.substring(0, 120) + '...' : movie.description) : 
+    'Experience this amazing movie on the big screen!';
+
+  const card = document.createElement('div');
+  card.className = 'movie-card';
+  card.innerHTML = `
+    <div class="movie-poster-container">
+      ${movie.poster_url ? 
+        `<img src="${movie.poster_url}" alt="${movie.title}" class="movie-poster" onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">` : 
+        ''
+      }
+      <div class="no-poster" style="${movie.poster_url ? 'display: none;' : ''}">
+        🎬
+      </div>
+    </div>
+    <div class="movie-info">
+      <h3 class="movie-title">${movie.title}</h3>
+      <div class="movie-meta">
+        <span class="movie-genre">${movie.genre || 'Unknown Genre'}</span>
+        <span class="movie-rating">${movie.rating || 'PG'}</span>
+      </div>
+      <p class="movie-description">${description}</p>
+      <button class="movie-btn" onclick="bookMovie('${movie.title}')">
+        <i class="fas fa-ticket-alt"></i> Book Tickets
+      </button>
+    </div>
+  `;
+  return card;
+}
+
+// Setup event listeners
+function setupEventListeners() {
+  // Search form
+  document.getElementById('searchForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    searchMovies();
+  });
+
+  // Auto-search when filters change
+  document.getElementById('genreFilter').addEventListener('change', searchMovies);
+  document.getElementById('ratingFilter').addEventListener('change', searchMovies);
+
+  // Clear search button
+  document.getElementById('clearSearchBtn').addEventListener('click', function(e) {
+    e.preventDefault();
+    clearSearch();
+  });
+}
+
+// Search movies
+async function searchMovies() {
+  const query = document.getElementById('searchQuery').value;
+  const genre = document.getElementById('genreFilter').value;
+  const rating = document.getElementById('ratingFilter').value;
+
+  const resultsSection = document.getElementById('searchResultsSection');
+  const resultsGrid = document.getElementById('resultsGrid');
+
+  // Show loading
+  resultsSection.style.display = 'block';
+  resultsGrid.innerHTML = document.getElementById('loadingTemplate').innerHTML;
+
+  // Scroll to search results
+  resultsSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+
+  try {
+    // Build query string
+    const params = new URLSearchParams();
+    if (query) params.append('query', query);
+    if (genre) params.append('genre', genre);
+    if (rating) params.append('rating', rating);
+
+    const response = await fetch(`/search_movies?${params.toString()}`);
+    const movies = await response.json();
+
+    // Display results
+    if (movies.length === 0) {
+      resultsGrid.innerHTML = document.getElementById('noResultsTemplate').innerHTML;
+    } else {
+      resultsGrid.innerHTML = '';
+      movies.forEach(movie => {
+        const movieCard = createMovieCard(movie);
+        resultsGrid.appendChild(movieCard);
+      });
+    }
+
+    // Add animation to results
+    const movieCards = resultsGrid.querySelectorAll('.movie-card');
+    movieCards.forEach((card, index) => {
+      card.style.opacity = '0';
+      card.style.transform = 'translateY(30px)';
+
+      setTimeout(() => {
+        card.style.transition = 'all 0.6s ease';
+        card.style.opacity = '1';
+        card.style.transform = 'translateY(0)';
+      }, index * 100);
+    });
+
+  } catch (error) {
+    console.error('Error searching movies:', error);
+    resultsGrid.innerHTML = '<div class="no-results"><div class="no-results-icon">⚠️</div><h3 class="no-results-title">Search Error</h3><p class="no-results-text">Please try again later.</p></div>';
+  }
+}
+
+// Clear search results
+function clearSearch() {
+  // Reset search form
+  document.getElementById('searchQuery').value = '';
+  document.getElementById('genreFilter').value = '';
+  document.getElementById('ratingFilter').value = '';
+
+  // Hide search results
+  document.getElementById('searchResultsSection').style.display = 'none';
+
+  // Scroll back to featured movies
+  document.querySelector('.featured-section').scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
+// Book movie function
+function bookMovie(movieTitle) {
+  window.location.href = `/book_ticket?movie=${encodeURIComponent(movieTitle)}`;
+}
@@ -0,0 +1,358 @@
+// Global variables
+let currentSlide = 0;
+let totalSlides = 0;
+let slidesPerView = 6; // Start with 6 columns
+let featuredMovies = [];
+let allGenres = [];
+let autoSlideInterval = null;
+let isAutoSlideEnabled = true;
+
+// Initialize on page load
+document.addEventListener('DOMContentLoaded', function() {
+  loadGenres();
+  loadFeaturedMovies();
+  setupEventListeners();
+  startAutoSlide();
+
+  // Adjust slides per view based on screen size
+  updateSlidesPerView();
+  window.addEventListener('resize', updateSlidesPerView);
+
+  // Set current year in footer
+  document.getElementById('currentYear').textContent = new Date().getFullYear();
+});
+
+// Update slides per view based on screen width
+function updateSlidesPerView() {
+  const width = window.innerWidth;
+  if (width < 576) {
+    slidesPerView = 1;
+  } else if (width < 768) {
+    slidesPerView = 2;
+  } else if (width < 992) {
+    slidesPerView = 3;
+  } else if (width < 1200) {
+    slidesPerView = 4;
+  } else if (width < 1400) {
+    slidesPerView = 5;
+  } else {
+    slidesPerView = 6;
+  }
+  updateCarousel();
+}
+
+// Load all genres
+async function loadGenres() {
+  const genreSelect = document.getElementById('genreFilter');
+  if (genreSelect.options.length > 1) {
+    return; // Already rendered by the server
+  }
+
+  try {
+    const response = await fetch('/get_all_genres');
+    allGenres = await response.json();
+
+    allGenres.forEach(genre => {
+      if (genre) {
+        const option = document.createElement('option');
+        option.value = genre;
+        option.textContent = genre;
+        genreSelect.appendChild(option);
+      }
+    });
+  } catch (error) {
+    console.error('Error loading genres:', error);
+  }
+}
+
+// Load featured movies with your logic
+async function loadFeaturedMovies() {
+  try {
+    const response = await fetch('/get_featured_movies');
+    const data = await response.json();
+
+    // Use the featured movies from the API response
+    featuredMovies = data.featured_movies;
+
+    // Calculate total slides based on featured count
+    totalSlides = Math.ceil(featuredMovies.length / slidesPerView);
+
+    // Update View All button with total movies count
+    document.getElementById('viewAllBtn').innerHTML = `Sign In to View All ${data.total_movies} Movies →`;
+
+    // Render carousel
+    renderCarousel();
+
+    // Setup carousel controls
+    setupCarouselControls();
+
+  } catch (error) {
+    console.error('Error loading featured movies:', error);
+    const carouselTrack = document.getElementById('carouselTrack');
+    carouselTrack.innerHTML = '<div class="no-results"><div class="no-results-icon">⚠️</div><h3 class="no-results-title">Unable to load movies</h3><p class="no-results-text">Please try refreshing the page.</p></div>';
+  }
+}
+
+// Render carousel with movies
+function renderCarousel() {
+  const carouselTrack = document.getElementById('carouselTrack');
+  const dotsContainer = document.getElementById('carouselDots');
+
+  carouselTrack.innerHTML = '';
+  dotsContainer.innerHTML = '';
+
+  // Create movie cards
+  featuredMovies.forEach((movie, index) => {
+    const movieCard = createMovieCard(movie);
+    movieCard.classList.add('carousel-item');
+    carouselTrack.appendChild(movieCard);
+  });
+
+  // Create dots
+  for (let i = 0; i < totalSlides; i++) {
+    const dot = document.createElement('div');
+    dot.className = 'carousel-dot' + (i === 0 ? ' active' : '');
+    dot.addEventListener('click', () => goToSlide(i));
+    dotsContainer.appendChild(dot);
+  }
+
+  updateCarousel();
+  updateCarouselControls();
+}
+
+// Create movie card HTML
+function createMovieCard(movie) {
+  const description = movie.description ?
+    (movie.description.length > 120 ? movie.description.substring(0, 120) + '...' : movie.description) :
+    'Experience this amazing movie on the big screen!';
+
+  const card = document.createElement('div');
+  card.className = 'movie-card';
+  card.innerHTML = `
+    <div class="movie-poster-container">
+      ${movie.poster_url ?
+        `<img src="${movie.poster_url}" alt="${movie.title}" class="movie-poster" onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">` :
+        ''
+      }
+      <div class="no-poster" style="${movie.poster_url ? 'display: none;' : ''}">
+        🎬
+      </div>
+    </div>
+    <div class="movie-info">
+      <h3 class="movie-title">${movie.title}</h3>
+      <div class="movie-meta">
+        <span class="movie-genre">${movie.genre || 'Unknown Genre'}</span>
+        <span class="movie-rating">${movie.rating || 'PG'}</span>
+      </div>
+      <p class="movie-description">${description}</p>
+      <button class="movie-btn" onclick="bookMovie('${movie.title}')">
+        <i class="fas fa-ticket-alt"></i> Sign In to Book
+      </button>
+    </div>
+  `;
+  return card;
+}
+
+// Setup carousel controls
+function setupCarouselControls() {
+  const prevBtn = document.getElementById('prevBtn');
+  const nextBtn = document.getElementById('nextBtn');
+
+  prevBtn.addEventListener('click', () => {
+    goToSlide(currentSlide - 1);
+    resetAutoSlide();
+  });
+
+  nextBtn.addEventListener('click', () => {
+    goToSlide(currentSlide + 1);
+    resetAutoSlide();
+  });
+
+  // Auto slide toggle
+  const autoSlideToggle = document.getElementById('autoSlideToggle');
+  autoSlideToggle.addEventListener('click', function() {
+    isAutoSlideEnabled = !isAutoSlideEnabled;
+    this.classList.toggle('active', isAutoSlideEnabled);
+
+    if (isAutoSlideEnabled) {
+      startAutoSlide();
+    } else {
+      stopAutoSlide();
+    }
+  });
+}
+
+// Go to specific slide
+function goToSlide(slideIndex) {
+  if (slideIndex < 0) {
+    slideIndex = totalSlides - 1; // Loop to last slide
+  } else if (slideIndex >= totalSlides) {
+    slideIndex = 0; // Loop to first slide
+  }
+
+  currentSlide = slideIndex;
+  updateCarousel();
+  updateCarouselControls();
+}
+
+// Go to next slide automatically
+function goToNextSlide() {
+  const nextSlide = (currentSlide + 1) % totalSlides;
+  goToSlide(nextSlide);
+}
+
+// Update carousel position
+function updateCarousel() {
+  const carouselTrack = document.getElementById('carouselTrack');
+  const slideWidth = 100 / slidesPerView;
+  const translateX = -currentSlide * slideWidth * slidesPerView;
+  carouselTrack.style.transform = `translateX(${translateX}%)`;
+
+  // Update dots
+  const dots = document.querySelectorAll('.carousel-dot');
+  dots.forEach((dot, index) => {
+    dot.classList.toggle('active', index === currentSlide);
+  });
+}
+
+// Update carousel controls state
+function updateCarouselControls() {
+  const prevBtn = document.getElementById('prevBtn');
+  const nextBtn = document.getElementById('nextBtn');
+
+  // Enable/disable buttons based on current slide
+  prevBtn.disabled = totalSlides <= 1;
+  nextBtn.disabled = totalSlides <= 1;
+}
+
+// Start auto slide
+function startAutoSlide() {
+  if (isAutoSlideEnabled && totalSlides > 1) {
+    stopAutoSlide(); // Clear any existing interval
+    autoSlideInterval = setInterval(goToNextSlide, 2000); // Slide every 2 seconds
+  }
+}
+
+// Stop auto slide
+function stopAutoSlide() {
+  if (autoSlideInterval) {
+    clearInterval(autoSlideInterval);
+    autoSlideInterval = null;
+  }
+}
+
+// Reset auto slide timer
+function resetAutoSlide() {
+  if (isAutoSlideEnabled) {
+    stopAutoSlide();
+    startAutoSlide();
+  }
+}
+
+// Setup event listeners
+function setupEventListeners() {
+  // Search form
+  document.getElementById('searchForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    searchMovies();
+  });
+
+  // Auto-search when filters change
+  document.getElementById('genreFilter').addEventListener('change', searchMovies);
+  document.getElementById('ratingFilter').addEventListener('change', searchMovies);
+
+  // Clear search button
+  document.getElementById('clearSearchBtn').addEventListener('click', function(e) {
+    e.preventDefault();
+    clearSearch();
+  });
+
+  // Pause auto-slide on hover
+  const carouselContainer = document.querySelector('.carousel-container');
+  carouselContainer.addEventListener('mouseenter', () => {
+    if (isAutoSlideEnabled) {
+      stopAutoSlide();
+    }
+  });
+
+  carouselContainer.addEventListener('mouseleave', () => {
+    if (isAutoSlideEnabled) {
+      startAutoSlide();
+    }
+  });
+}
+
+// Search movies
+async function searchMovies() {
+  const query = document.getElementById('searchQuery').value;
+  const genre = document.getElementById('genreFilter').value;
+  const rating = document.getElementById('ratingFilter').value;
+
+  const resultsSection = document.getElementById('searchResultsSection');
+  const resultsGrid = document.getElementById('resultsGrid');
+
+  // Show loading
+  resultsSection.style.display = 'block';
+  resultsGrid.innerHTML = document.getElementById('loadingTemplate').innerHTML;
+
+  // Scroll to search results
+  resultsSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+
+  try {
+    // Build query string
+    const params = new URLSearchParams();
+    if (query) params.append('query', query);
+    if (genre) params.append('genre', genre);
+    if (rating) params.append('rating', rating);
+
+    const response = await fetch(`/search_movies?${params.toString()}`);
+    const movies = await response.json();
+
+    // Display results
+    if (movies.length === 0) {
+      resultsGrid.innerHTML = document.getElementById('noResultsTemplate').innerHTML;
+    } else {
+      resultsGrid.innerHTML = '';
+      movies.forEach(movie => {
+        const movieCard = createMovieCard(movie);
+        resultsGrid.appendChild(movieCard);
+      });
+    }
+
+    // Add animation to results
+    const movieCards = resultsGrid.querySelectorAll('.movie-card');
+    movieCards.forEach((card, index) => {
+      card.style.opacity = '0';
+      card.style.transform = 'translateY(30px)';
+
+      setTimeout(() => {
+        card.style.transition = 'all 0.6s ease';
+        card.style.opacity = '1';
+        card.style.transform = 'translateY(0)';
+      }, index * 100);
+    });
+
+  } catch (error) {
+    console.error('Error searching movies:', error);
+    resultsGrid.innerHTML = '<div class="no-results"><div class="no-results-icon">⚠️</div><h3 class="no-results-title">Search Error</h3><p class="no-results-text">Please try again later.</p></div>';
+  }
+}
+
+// Clear search results
+function clearSearch() {
+  // Reset search form
+  document.getElementById('searchQuery').value = '';
+  document.getElementById('genreFilter').value = '';
+  document.getElementById('ratingFilter').value = '';
+
+  // Hide search results
+  document.getElementById('searchResultsSection').style.display = 'none';
+
+  // Scroll back to top of featured movies
+  document.querySelector('.featured-section').scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
+// Book movie function (redirects to login)
+function bookMovie(movieTitle) {
+  window.location.href = '/login';
+}
@@ -0,0 +1,302 @@
+let currentBookingId = null;
+let currentSeats = [];
+let selectedSeatsToCancel = [];
+let cancelIdempotencyKey = null;
+const ticketsById = {};
+
+// crypto.randomUUID only exists on HTTPS and localhost; getRandomValues works everywhere
+function newIdempotencyKey() {
+  if (crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+// Load the ticket wallet
+document.addEventListener('DOMContentLoaded', function() {
+  loadWallet();
+
+  // Add animation to feature items
+  const featureItems = document.querySelectorAll('.feature-item');
+  featureItems.forEach((item, index) => {
+    item.style.opacity = '0';
+    item.style.transform = 'translateY(20px)';
+
+    setTimeout(() => {
+      item.style.transition = 'all 0.6s ease';
+      item.style.opacity = '1';
+      item.style.transform = 'translateY(0)';
+    }, 300 + (index * 100));
+  });
+});
+
+const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+
+function escapeHtml(value) {
+  return String(value == null ? '' : value).replace(/[&<>"']/g, ch => HTML_ESCAPES[ch]);
+}
+
+// Tickets and the movies to show under them come from one request
+async function loadWallet() {
+  try {
+    const response = await fetch('/ticket_wallet');
+    const wallet = await response.json();
+    if (!response.ok) {
+      throw new Error(wallet.error);
+    }
+
+    renderTickets(wallet.upcoming, wallet.past);
+    renderAvailableMovies(wallet.now_showing);
+  } catch (error) {
+    console.error('Error loading tickets:', error);
+    document.getElementById('ticketsLoading').textContent = 'Unable to load your tickets. Please try refreshing the page.';
+    renderAvailableMovies([]);
+  }
+}
+
+function ticketRow(ticket, upcoming) {
+  ticketsById[ticket.booking_id] = ticket;
+  const poster = ticket.poster_url
+    ? `<img src="${escapeHtml(ticket.poster_url)}" alt="${escapeHtml(ticket.movie_title)}" class="movie-poster">`
+    : '<div class="no-poster">🎬</div>';
+  const cancelButton = upcoming && !ticket.archived
+    ? `<button class="btn-danger" onclick="cancelTicket(${ticket.booking_id})">
+              🗑️ Cancel
+            </button>`
+    : '';
+
+  return `
+    <tr>
+      <td>
+        <div class="movie-cell">
+          ${poster}
+          <span class="movie-title">${escapeHtml(ticket.movie_title)}</span>
+        </div>
+      </td>
+      <td>${escapeHtml(ticket.show_date || 'N/A')}</td>
+      <td>${escapeHtml(ticket.showtime)}${ticket.hall ? ` · Hall ${escapeHtml(ticket.hall)}` : ''}</td>
+      <td><span class="quantity-badge">${ticket.quantity || 1}</span></td>
+      <td>${escapeHtml(ticket.seats.join(', '))}</td>
+      <td>
+        <div class="action-buttons">
+          <button class="btn-view-movie" onclick="bookMovie(ticketsById[${ticket.booking_id}].movie_title)">
+            🎬 View Movie
+          </button>
+          ${cancelButton}
+          <a href="/print_ticket/${ticket.booking_id}" class="btn-print">
+            🖨️ Print
+          </a>
+        </div>
+      </td>
+    </tr>
+  `;
+}
+
+function renderTickets(upcoming, past) {
+  document.getElementById('ticketsLoading').style.display = 'none';
+  document.getElementById('upcomingTickets').innerHTML = upcoming.map(ticket => ticketRow(ticket, true)).join('');
+  document.getElementById('pastTickets').innerHTML = past.map(ticket => ticketRow(ticket, false)).join('');
+  document.getElementById('upcomingSection').style.display = upcoming.length ? 'block' : 'none';
+  document.getElementById('pastSection').style.display = past.length ? 'block' : 'none';
+  document.getElementById('ticketsEmpty').style.display = upcoming.length || past.length ? 'none' : 'block';
+}
+
+function cancelTicket(bookingId) {
+  const ticket = ticketsById[bookingId];
+  openCancelModal(ticket.booking_id, ticket.movie_title, ticket.show_date, ticket.showtime, ticket.seats.join(', '));
+}
+
+// Render the now-showing movies sent with the wallet
+function renderAvailableMovies(movies) {
+  try {
+    const moviesContainer = document.getElementById('availableMovies');
+
+    if (movies.length === 0) {
+      moviesContainer.innerHTML = `
+        <div class="empty-state" style="grid-column: 1 / -1; padding: 40px 20px;">
+          <div class="empty-icon">🎭</div>
+          <h3 class="empty-title">No Movies Available</h3>
+          <p class="empty-subtitle">Check back later for new movie releases!</p>
+        </div>
+      `;
+      return;
+    }
+
+    moviesContainer.innerHTML = movies.map(movie => `
+      <div class="movie-card">
+        <div class="movie-poster-container">
+          ${movie.poster_url ?
+            `<img src="${escapeHtml(movie.poster_url)}" alt="${escapeHtml(movie.title)}" class="movie-poster-small" onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">` :
+            ''
+          }
+          <div class="no-poster-small" style="${movie.poster_url ? 'display: none;' : ''}">
+            🎬 No Poster
+          </div>
+        </div>
+        <div class="movie-info-small">
+          <h3 class="movie-title-small">${escapeHtml(movie.title)}</h3>
+          <div class="movie-meta-small">
+            <span>🎭 ${escapeHtml(movie.genre)}</span>
+            <span>⏱️ ${escapeHtml(movie.duration)}</span>
+            <span style="background: #e23020; color: white; padding: 2px 6px; border-radius: 4px; font-size: 0.75rem;">
+              ${escapeHtml(movie.rating)}
+            </span>
+          </div>
+          <button class="book-now-btn" onclick="bookMovie(${escapeHtml(JSON.stringify(movie.title))})">
+            🎫 Book Now
+          </button>
+        </div>
+      </div>
+    `).join('');
+
+    // Add animation to movie cards
+    const movieCards = document.querySelectorAll('.movie-card');
+    movieCards.forEach((card, index) => {
+      card.style.opacity = '0';
+      card.style.transform = 'translateY(30px)';
+
+      setTimeout(() => {
+        card.style.transition = 'all 0.6s ease';
+        card.style.opacity = '1';
+        card.style.transform = 'translateY(0)';
+      }, index * 100);
+    });
+
+  } catch (error) {
+    console.error('Error rendering movies:', error);
+    document.getElementById('availableMovies').innerHTML = `
+      <div class="empty-state" style="grid-column: 1 / -1; padding: 40px 20px;">
+        <div class="empty-icon">⚠️</div>
+        <h3 class="empty-title">Unable to Load Movies</h3>
+        <p class="empty-subtitle">Please try refreshing the page.</p>
+      </div>
+    `;
+  }
+}
+
+// Function to book a movie
+function bookMovie(movieTitle) {
+  window.location.href = '/book_ticket?movie=' + encodeURIComponent(movieTitle);
+}
+
+// Cancel modal functions
+function openCancelModal(bookingId, movieTitle, showDate, showTime, seats) {
+  currentBookingId = bookingId;
+  currentSeats = seats.split(',').map(seat => seat.trim());
+  selectedSeatsToCancel = [];
+  cancelIdempotencyKey = newIdempotencyKey();
+
+  // Update modal info
+  document.getElementById('modalMovieInfo').innerHTML = `
+    <div style="text-align: center; margin-bottom: 20px;">
+      <h4 style="color: #e23020; margin-bottom: 5px;">${escapeHtml(movieTitle)}</h4>
+      <p style="color: #666;">${escapeHtml(showDate)} | ${escapeHtml(showTime)}</p>
+      <p style="color: #666;">Currently booked: ${escapeHtml(seats)}</p>
+    </div>
+  `;
+
+  // Generate seats grid
+  const seatsContainer = document.getElementById('cancelSeatsContainer');
+  seatsContainer.innerHTML = '';
+
+  const rows = ["A", "B", "C", "D", "E"];
+  const seatsPerRow = 8;
+
+  for (let r of rows) {
+    for (let i = 1; i <= seatsPerRow; i++) {
+      const seatLabel = r + i;
+      const seatEl = document.createElement("div");
+      seatEl.classList.add("seat");
+      seatEl.textContent = seatLabel;
+
+      // Check if this seat is in the booked seats
+      if (currentSeats.includes(seatLabel)) {
+        seatEl.style.backgroundColor = '#28a745'; // Available for cancellation
+        seatEl.addEventListener("click", () => {
+          seatEl.classList.toggle("selected");
+          if (seatEl.classList.contains("selected")) {
+            selectedSeatsToCancel.push(seatLabel);
+          } else {
+            selectedSeatsToCancel = selectedSeatsToCancel.filter(seat => seat !== seatLabel);
+          }
+          updateSelectedSeatsInfo();
+        });
+      } else {
+        seatEl.style.backgroundColor = '#6c757d'; // Not booked
+        seatEl.style.cursor = 'not-allowed';
+      }
+
+      seatsContainer.appendChild(seatEl);
+    }
+  }
+
+  // Reset selection info
+  document.getElementById('selectedSeatsInfo').style.display = 'none';
+  document.getElementById('confirmCancelBtn').disabled = true;
+
+  // Show modal
+  document.getElementById('cancelModal').style.display = 'block';
+}
+
+function closeCancelModal() {
+  document.getElementById('cancelModal').style.display = 'none';
+  currentBookingId = null;
+  currentSeats = [];
+  selectedSeatsToCancel = [];
+}
+
+function updateSelectedSeatsInfo() {
+  const selectedSeatsInfo = document.getElementById('selectedSeatsInfo');
+  const selectedSeatsList = document.getElementById('selectedSeatsList');
+  const confirmBtn = document.getElementById('confirmCancelBtn');
+
+  if (selectedSeatsToCancel.length > 0) {
+    selectedSeatsList.textContent = selectedSeatsToCancel.join(', ');
+    selectedSeatsInfo.style.display = 'block';
+    confirmBtn.disabled = false;
+  } else {
+    selectedSeatsInfo.style.display = 'none';
+    confirmBtn.disabled = true;
+  }
+}
+
+function confirmCancellation() {
+  if (selectedSeatsToCancel.length === 0) {
+    alert('Please select at least one seat to cancel.');
+    return;
+  }
+
+  if (!confirm(`Are you sure you want to cancel seats: ${selectedSeatsToCancel.join(', ')}?`)) {
+    return;
+  }
+
+  // Create a form and submit it
+  const form = document.createElement('form');
+  form.method = 'POST';
+  form.action = `/cancel_ticket/${currentBookingId}`;
+
+  const seatsInput = document.createElement('input');
+  seatsInput.type = 'hidden';
+  seatsInput.name = 'seats_to_cancel';
+  seatsInput.value = selectedSeatsToCancel.join(',');
+
+  // Resubmitting the same cancellation replays the first result instead of running it twice
+  const keyInput = document.createElement('input');
+  keyInput.type = 'hidden';
+  keyInput.name = 'idempotency_key';
+  keyInput.value = cancelIdempotencyKey;
+
+  form.appendChild(seatsInput);
+  form.appendChild(keyInput);
+  document.body.appendChild(form);
+  form.submit();
+}
+
+// Close modal when clicking outside
+window.onclick = function(event) {
+  const modal = document.getElementById('cancelModal');
+  if (event.target === modal) {
+    closeCancelModal();
+  }
+}
@@ -0,0 +1,92 @@
+import hashlib
+import io
+import json
+
+try:
+    import qrcode
+except ImportError:
+    qrcode = None
+
+try:
+    from reportlab.lib.pagesizes import A6, landscape
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+except ImportError:
+    canvas = None
+
+# Ticket PDFs are rendered in worker processes from plain booking dicts (the
+# same shape print_ticket.html uses), so nothing here touches Flask or SQLite.
+TICKET_STATE_FIELDS = ('id', 'movie', 'date', 'time', 'seats', 'fee', 'status',
+                       'payment_status', 'reference', 'user_name')
+PAGE_SIZE = landscape(A6) if canvas is not None else None
+BRAND_RED = (0.886, 0.188, 0.125)
+
+
+def ticket_state_key(booking):
+    """Short hash of everything printed on the ticket; changes whenever the booking does"""
+    state = [booking.get(field) for field in TICKET_STATE_FIELDS]
+    return hashlib.sha256(json.dumps(state, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def draw_ticket(pdf, booking):
+    width, height = PAGE_SIZE
+
+    # Header band
+    pdf.setFillColorRGB(*BRAND_RED)
+    pdf.rect(0, height - 42, width, 42, stroke=0, fill=1)
+    pdf.setFillColorRGB(1, 1, 1)
+    pdf.setFont('Helvetica-Bold', 14)
+    pdf.drawString(18, height - 27, 'MOVIE TICKET')
+    pdf.setFont('Helvetica', 9)
+    pdf.drawRightString(width - 18, height - 27, f"#{booking['reference'] or booking['id']}")
+
+    # Booking details
+    pdf.setFillColorRGB(0.2, 0.2, 0.2)
+    pdf.setFont('Helvetica-Bold', 13)
+    pdf.drawString(18, height - 66, booking['movie'][:40])
+
+    date = booking['date'] if booking['date'] and booking['date'] != 'N/A' else 'To be announced'
+    details = [
+        ('Customer', booking['user_name']),
+        ('Date', date),
+        ('Time', booking['time']),
+        ('Seats', booking['seats']),
+        ('Total', f"PHP {float(booking['fee'] or 0):.2f}"),
+        ('Status', f"{booking['status']} / {booking['payment_status']}"),
+    ]
+    y = height - 88
+    for label, value in details:
+        pdf.setFont('Helvetica', 8)
+        pdf.setFillColorRGB(0.45, 0.45, 0.45)
+        pdf.drawString(18, y, label.upper())
+        pdf.setFont('Helvetica-Bold', 10)
+        pdf.setFillColorRGB(0.2, 0.2, 0.2)
+        pdf.drawString(78, y, str(value)[:34])
+        y -= 17
+
+    # Scannable QR code carrying the booking reference
+    if qrcode is not None and booking['reference']:
+        buffer = io.BytesIO()
+        qrcode.make(booking['reference'], box_size=4, border=1).save(buffer)
+        buffer.seek(0)
+        size = 110
+        pdf.drawImage(ImageReader(buffer), width - size - 18, 38, size, size)
+
+    pdf.setFont('Helvetica', 7)
+    pdf.setFillColorRGB(0.45, 0.45, 0.45)
+    pdf.drawString(18, 20, 'Please arrive 15 minutes before showtime. Present this ticket at the entrance.')
+
+
+def render_tickets_pdf(bookings):
+    """Render one page per booking and return the PDF bytes"""
+    if canvas is None:
+        raise RuntimeError("reportlab is required for PDF tickets (pip install reportlab qrcode)")
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+    pdf.setTitle('Movie Tickets')
+    for booking in bookings:
+        draw_ticket(pdf, booking)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()